@@ -1,11 +1,13 @@
 # Nome do Arquivo: 0_🏠_Dashboard_Principal.py (ou o nome que você deu à sua página principal)
 
 import streamlit as st
-import yfinance as yf
-import pandas as pd
-import plotly.express as px
-from datetime import datetime
-import time
+from pag.snapshot import MarketSnapshotService
+
+# pandas/plotly só são importados depois do login (ver abaixo), para que o formulário
+# de login renderize sem pagar o custo dessas importações.
+
+# Tempo máximo que a tela de splash espera pelo aquecimento do cache
+SPLASH_MAX_SECONDS = 5
 
 # --- Configuração da Página ---
 st.set_page_config(
@@ -29,19 +31,10 @@ VALID_CREDENTIALS = {
 }
 
 # --- FUNÇÕES AUXILIARES ---
-@st.cache_data(ttl=900) # Cache de 15 minutos
-def get_homepage_market_data():
-    """Busca os dados de mercado para o ticker do topo da página."""
-    tickers = {"S&P 500": "^GSPC", "Ibovespa": "^BVSP", "Dólar (USD/BRL)": "BRL=X", "VIX": "^VIX", "US 10Y Treasury": "^TNX"}
-    data = yf.download(list(tickers.values()), period="5d", progress=False)['Close']
-    results = {}
-    for name, ticker in tickers.items():
-        if ticker in data.columns and not data[ticker].isnull().all():
-            latest_price = data[ticker].dropna().iloc[-1]
-            previous_price = data[ticker].dropna().iloc[-2]
-            change = ((latest_price / previous_price) - 1) * 100
-            results[name] = {"price": latest_price, "change": change}
-    return results
+@st.cache_resource
+def get_snapshot_service():
+    """Serviço único (compartilhado por todas as sessões) que mantém o snapshot de mercado atualizado."""
+    return MarketSnapshotService().start()
 
 def login_form():
     """Cria e gerencia o formulário de login."""
@@ -73,17 +66,22 @@ if 'authentication_status' not in st.session_state:
     st.session_state.authentication_status = None
 
 # Lógica da Tela de Splash (só roda uma vez por sessão)
+# O splash dura apenas o tempo do aquecimento real (prefetch do snapshot de mercado).
+# Se o cache já estiver quente, a tela é pulada e o login aparece imediatamente; o
+# snapshot em disco é lido pela thread do serviço, e o login não importa o pandas.
 if 'splash_screen_done' not in st.session_state:
-    col1, col2, col3 = st.columns([1, 1.5, 1])
-    with col2:
-        try:
-            st.image("logo.png", use_container_width=True)
-        except Exception:
-            st.markdown("<h1 style='text-align: center;'>Highpar Global</h1>", unsafe_allow_html=True)
-        with st.spinner("Carregando plataforma..."):
-            time.sleep(3)
+    snapshot_service = get_snapshot_service()
     st.session_state.splash_screen_done = True
-    st.rerun()
+    if not snapshot_service.has_cached():
+        col1, col2, col3 = st.columns([1, 1.5, 1])
+        with col2:
+            try:
+                st.image("logo.png", use_container_width=True)
+            except Exception:
+                st.markdown("<h1 style='text-align: center;'>Highpar Global</h1>", unsafe_allow_html=True)
+            with st.spinner("Carregando plataforma..."):
+                snapshot_service.wait_ready(timeout=SPLASH_MAX_SECONDS)
+        st.rerun()
 
 # Se não estiver autenticado, mostra o formulário de login
 if not st.session_state["authentication_status"]:
@@ -92,6 +90,9 @@ if not st.session_state["authentication_status"]:
         login_form()
 else:
     # Se o login for bem-sucedido, mostra o dashboard principal
+    import pandas as pd
+    import plotly.express as px
+
     with st.sidebar:
         st.write(f'Bem-vindo(a), *{st.session_state["name"]}*')
         if st.button("Logout"):
@@ -100,18 +101,27 @@ else:
             st.rerun()
 
     st.title("Dashboard de Visão Geral - Highpar Global")
-    st.caption(f"Dados de mercado atualizados em: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
 
-    try:
-        market_data = get_homepage_market_data()
+    # Todas as sessões leem o mesmo snapshot; apenas a thread do serviço consulta o provedor.
+    snapshot_service = get_snapshot_service()
+    snapshot = snapshot_service.get()
+    if snapshot is None:
+        with st.spinner("Carregando dados de mercado..."):
+            snapshot = snapshot_service.wait_ready(timeout=20)
+
+    if snapshot is None:
+        st.warning(f"Não foi possível carregar os dados do ticker de mercado no momento.")
+    else:
+        st.caption(f"Dados de mercado atualizados em: {snapshot.updated_at.strftime('%d/%m/%Y %H:%M:%S')} ({snapshot.age_label()})")
+        market_data = snapshot.quotes
         c1, c2, c3, c4, c5 = st.columns(5)
         if "S&P 500" in market_data: c1.metric("S&P 500", f"{market_data['S&P 500']['price']:,.2f}", f"{market_data['S&P 500']['change']:.2f}%")
         if "Ibovespa" in market_data: c2.metric("Ibovespa", f"{market_data['Ibovespa']['price']:,.2f}", f"{market_data['Ibovespa']['change']:.2f}%")
         if "Dólar (USD/BRL)" in market_data: c3.metric("Dólar (USD/BRL)", f"{market_data['Dólar (USD/BRL)']['price']:.2f}", f"{market_data['Dólar (USD/BRL)']['change']:.2f}%")
         if "US 10Y Treasury" in market_data: c4.metric("US 10Y Yield", f"{market_data['US 10Y Treasury']['price']:.2f}%", f"{market_data['US 10Y Treasury']['change']:.2f}%")
         if "VIX" in market_data: c5.metric("VIX (Volatilidade)", f"{market_data['VIX']['price']:.2f}", f"{market_data['VIX']['change']:.2f}%", delta_color="inverse")
-    except Exception:
-        st.warning(f"Não foi possível carregar os dados do ticker de mercado no momento.")
+        if snapshot_service.last_error:
+            st.caption(f"⚠️ Última atualização falhou; exibindo o snapshot anterior. ({snapshot_service.last_error})")
 
     st.divider()
 
@@ -124,10 +134,10 @@ else:
     with col2:
         st.subheader("Pulso dos Mercados (Últimos 30 dias)")
         
-        # --- CORREÇÃO APLICADA AQUI ---
-        # Baixa os dados ANTES de tentar criar os gráficos
-        data_sp500 = yf.download("^GSPC", period="1mo", progress=False)['Close']
-        data_tnx = yf.download("^TNX", period="1mo", progress=False)['Close']
+        # O histórico de 1 mês já vem no snapshot compartilhado (sem downloads por sessão)
+        history = snapshot.history if snapshot is not None else pd.DataFrame()
+        data_sp500 = history["^GSPC"].dropna() if "^GSPC" in history.columns else pd.Series(dtype='float64')
+        data_tnx = history["^TNX"].dropna() if "^TNX" in history.columns else pd.Series(dtype='float64')
         
         tab1, tab2 = st.tabs(["Ações (S&P 500)", "Juros (US 10Y)"])
         with tab1:
@@ -0,0 +1,2 @@
+# benchmarks/__init__.py
+"""Benchmarks de desempenho da plataforma (executados fora do Streamlit)."""
@@ -0,0 +1,92 @@
+# benchmarks/bench_compute.py
+"""
+Vazão com vários usuários simultâneos: cálculos na thread da sessão vs. pool de processos.
+
+Cada "usuário" é uma thread (como uma sessão do Streamlit) que repete um
+cálculo CPU-bound da plataforma:
+- carteira: métricas de risco de um painel de preços (covariância dos retornos,
+  página Portfólios e Risco), com o painel em memória compartilhada;
+- curva: risco de curva de uma carteira de títulos (KRDs, duration e P&L dos
+  cenários, página Renda Fixa).
+
+No modo "thread" o cálculo roda na própria thread, como sem o pool; no modo
+"pool" ele vai para pag.compute.run. A vazão (cálculos por segundo) do modo
+pool deve crescer com o número de usuários até o número de núcleos. O custo
+estimado de cada caso mostra se, no app, esse tamanho passa do limite de
+despacho (MIN_COST) ou roda na thread.
+
+Uso:
+    python -m benchmarks.bench_compute [--assets 600] [--bonds 1000] [--users 1 2 4 8] [--calls 4]
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.fixtures import FACTOR_TICKERS, load_fixtures
+from pag import compute, curve_risk, portfolio
+from pag.curves import YieldCurve
+
+
+def _portfolio_case(assets):
+    prices = load_fixtures(1000)["prices"]
+    prices = prices[[c for c in prices.columns if c not in FACTOR_TICKERS.values()][:assets]].iloc[-5 * 252:]
+    weights = np.full(prices.shape[1], 1 / prices.shape[1])
+    cost = portfolio.covariance_cost(prices)
+    return cost, lambda: compute.run(portfolio.calculate_portfolio_metrics, prices, weights, cost=cost)
+
+def _curve_case(bonds):
+    fx = load_fixtures(1000)
+    curve = YieldCurve(fx["curves"], "nss")
+    today = curve.dates[-1]
+    rows = (fx["bonds"] * (bonds // len(fx["bonds"]) + 1))[:bonds]
+    blotter = pd.DataFrame([(f"B{i}", face, coupon * 100, today + pd.DateOffset(years=years), freq, 0.0) for i, (_, face, coupon, years, freq) in enumerate(rows)],
+                           columns=curve_risk.BOND_COLUMNS)
+    scenarios = pd.concat([curve_risk.standard_scenarios(), curve_risk.historical_scenarios(curve, "US")])
+    n_flows = int((blotter["Frequência"] * 30).max())
+    cost = (3 + 2 * len(curve_risk.KEY_RATES) + len(scenarios)) * bonds * n_flows * curve_risk.REPRICE_SECONDS_PER_CELL
+    return cost, lambda: curve_risk.curve_risk(curve, blotter, scenarios)
+
+
+def measure(call, users, calls, dispatch):
+    """Cálculos por segundo com `users` sessões simultâneas fazendo `calls` cálculos cada."""
+    def session(_):
+        for _ in range(calls): call()
+    saved = compute.MIN_COST
+    compute.MIN_COST = 0.0 if dispatch else float("inf")  # Sempre despacha no modo pool, nunca no modo thread
+    try:
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=users) as sessions: list(sessions.map(session, range(users)))
+        return users * calls / (time.perf_counter() - t0)
+    finally:
+        compute.MIN_COST = saved
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vazão de cálculos CPU-bound com usuários simultâneos (thread vs. pool de processos).")
+    parser.add_argument("--assets", type=int, default=600, help="Ativos no painel da carteira (5 anos de pregões)")
+    parser.add_argument("--bonds", type=int, default=1000, help="Títulos na carteira de renda fixa")
+    parser.add_argument("--users", nargs="+", type=int, default=[1, 2, 4, 8])
+    parser.add_argument("--calls", type=int, default=4, help="Cálculos por usuário")
+    args = parser.parse_args(argv)
+
+    cases = {"carteira": _portfolio_case(args.assets), "curva": _curve_case(args.bonds)}
+    print(f"Núcleos: {os.cpu_count()} • workers: {compute.COMPUTE_WORKERS} • MIN_COST: {compute.MIN_COST * 1000:.0f} ms")
+    for name, (cost, call) in cases.items():
+        measure(call, compute.COMPUTE_WORKERS, 1, dispatch=True)  # Aquece o pool (inicia os workers e importa o pandas)
+        print(f"\n{name} • Custo estimado: {cost * 1000:,.0f} ms ({'despacha' if compute.should_dispatch(cost) else 'abaixo do limite: roda na thread'})")
+        print(f"{'Usuários':>8} {'Thread (calc/s)':>16} {'Pool (calc/s)':>14} {'Ganho':>7}")
+        for users in args.users:
+            inline = measure(call, users, args.calls, dispatch=False)
+            pooled = measure(call, users, args.calls, dispatch=True)
+            print(f"{users:8d} {inline:16.2f} {pooled:14.2f} {pooled / inline:6.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+# benchmarks/bench_figures.py
+"""
+Medição do cache de figuras (pag.charts.cached_figure) em reruns simulados.
+
+Cada "rerun" reproduz o trabalho de gráficos que as páginas fazem sem mudança
+de dados (ex: mover um slider do teste de estresse): as 5 pizzas da alocação
+estratégica do Wealth Management e um conjunto de indicadores do Macro Hub
+(séries diárias e mensais dos fixtures), incluindo a serialização para JSON
+que o st.plotly_chart faz em toda chamada. Os dois modos montam a mesma figura
+(a do indicator_figure, já com a série reduzida): a diferença medida é só a do cache.
+
+Uso:
+    python -m benchmarks.bench_figures [--reruns 20] [--indicators 12]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+
+import plotly.io as pio
+
+from benchmarks.fixtures import load_fixtures
+from pag import charts
+from pag.wealth import MODEL_PORTFOLIOS, create_allocation_chart
+
+
+def _indicator_inputs(n):
+    """Séries no formato do plot_indicator_with_analysis: diárias (FRED) e mensais (SGS)."""
+    macro = load_fixtures(10)["macro"]
+    series = [macro["fred"]["DGS3MO"], macro["fred"]["DGS10"], macro["sgs"]["selic"], macro["sgs"]["ipca"]]
+    return [(series[i % len(series)] * (1 + i / 100), f"Indicador {i}", "%", 0 if i % 3 == 0 else None) for i in range(n)]
+
+def _rerun(indicators, cached):
+    for name, allocation in MODEL_PORTFOLIOS.items():
+        fig = charts.cached_figure(create_allocation_chart, name, allocation) if cached else create_allocation_chart(name, allocation)
+        pio.to_json(fig, validate=False)  # O que o st.plotly_chart faz a cada chamada
+    width_px = charts.CHART_WIDTH_PX * 3 // 4
+    for series, title, unit, hline in indicators:
+        # Sem cache: o mesmo construtor do indicator_figure, chamado direto
+        fig = charts.indicator_figure(series, title, unit, hline, width_px) if cached else charts._indicator(series, title, unit, hline, width_px)
+        pio.to_json(fig, validate=False)
+
+def measure(reruns=20, n_indicators=12):
+    indicators = _indicator_inputs(n_indicators)
+    results = {}
+    for label, cached in (("Sem cache", False), ("Com cache", True)):
+        _rerun(indicators, cached)  # Primeiro rerun (aquece imports e, no modo com cache, o próprio cache)
+        times = []
+        for _ in range(reruns):
+            t0 = time.perf_counter()
+            _rerun(indicators, cached)
+            times.append(time.perf_counter() - t0)
+        results[label] = times
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mede o tempo de gráficos por rerun com e sem o cache de figuras.")
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--indicators", type=int, default=12, help="Gráficos de indicadores por rerun (além das 5 pizzas)")
+    args = parser.parse_args(argv)
+
+    results = measure(args.reruns, args.indicators)
+    print(f"{'Modo':12} {'Mediana (ms)':>13} {'p90 (ms)':>10}")
+    for label, times in results.items():
+        p90 = sorted(times)[int(0.9 * (len(times) - 1))]
+        print(f"{label:12} {statistics.median(times) * 1000:13.1f} {p90 * 1000:10.1f}")
+    before, after = statistics.median(results["Sem cache"]), statistics.median(results["Com cache"])
+    print(f"Economia por rerun: {(before - after) * 1000:.1f} ms ({1 - after / before:.0%}). Cache: {charts.figure_cache_info()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
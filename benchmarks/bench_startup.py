@@ -0,0 +1,100 @@
+# benchmarks/bench_startup.py
+"""
+Benchmark de inicialização da plataforma.
+
+Mede, em processos Python "frios" (sem módulos em cache), o tempo até o
+formulário de login renderizar e o tempo até o primeiro gráfico de cada página,
+usando o AppTest do Streamlit (execução headless do script).
+
+Uso:
+    python -m benchmarks.bench_startup [--runs 3] [--timeout 120]
+
+A chave do FRED é lida da variável de ambiente FRED_API_KEY.
+"""
+
+import argparse
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Script executado em um subprocesso limpo para cada medição
+_PROBE = r'''
+import json, os, sys, time
+sys.path.insert(0, {root!r})
+os.chdir({root!r})
+from streamlit.testing.v1 import AppTest
+
+mode, path, timeout = {mode!r}, {path!r}, {timeout!r}
+at = AppTest.from_file(path, default_timeout=timeout)
+if os.environ.get("FRED_API_KEY"): at.secrets["FRED_API_KEY"] = os.environ["FRED_API_KEY"]
+
+result = {{"ok": False}}
+t0 = time.perf_counter()
+if mode == "login":
+    at.run()
+    # A primeira execução pode ser o splash; o AppTest reexecuta após st.rerun()
+    result["ok"] = any(t.label == "Usuário" for t in at.text_input)
+    result["seconds"] = time.perf_counter() - t0
+else:
+    at.session_state["authentication_status"] = True
+    at.session_state["username"] = "aoliveira"
+    at.session_state["name"] = "Benchmark"
+    at.session_state["role"] = "Analista"
+    at.run()
+    if not at.get("plotly_chart") and at.button:
+        # Páginas que só desenham após um clique (ex: ETFs, Portfólios)
+        at.button[0].click().run()
+    result["ok"] = bool(at.get("plotly_chart"))
+    result["seconds"] = time.perf_counter() - t0
+    result["exceptions"] = [str(e.value) for e in at.exception]
+print("__RESULT__" + json.dumps(result))
+'''
+
+
+def _measure(mode, path, timeout):
+    code = _PROBE.format(root=ROOT_DIR, mode=mode, path=path, timeout=timeout)
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT_DIR)
+    for line in proc.stdout.splitlines():
+        if line.startswith("__RESULT__"):
+            return json.loads(line[len("__RESULT__"):])
+    return {"ok": False, "seconds": None, "error": proc.stderr.strip().splitlines()[-1:]}
+
+
+def _summarize(samples):
+    times = [s["seconds"] for s in samples if s.get("seconds") is not None]
+    if not times: return {"median_s": None, "min_s": None, "ok": False}
+    return {"median_s": round(statistics.median(times), 3), "min_s": round(min(times), 3), "ok": all(s.get("ok") for s in samples)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de tempo de inicialização das páginas.")
+    parser.add_argument("--runs", type=int, default=3, help="Número de medições por cenário")
+    parser.add_argument("--timeout", type=float, default=120, help="Timeout (s) de cada execução do script")
+    parser.add_argument("--json", help="Arquivo opcional para gravar os resultados")
+    args = parser.parse_args()
+
+    results = {}
+    main_script = os.path.join(ROOT_DIR, "Plataforma_PAG.py")
+    results["Login (time-to-login-form)"] = _summarize([_measure("login", main_script, args.timeout) for _ in range(args.runs)])
+    for page in sorted(glob.glob(os.path.join(ROOT_DIR, "pages", "*.py"))):
+        name = os.path.splitext(os.path.basename(page))[0]
+        results[f"{name} (time-to-first-chart)"] = _summarize([_measure("page", page, args.timeout) for _ in range(args.runs)])
+
+    width = max(len(k) for k in results)
+    print(f"{'Cenário'.ljust(width)}  {'mediana (s)':>12}  {'mínimo (s)':>11}  ok")
+    for name, r in results.items():
+        median = f"{r['median_s']:.3f}" if r['median_s'] is not None else "-"
+        minimum = f"{r['min_s']:.3f}" if r['min_s'] is not None else "-"
+        print(f"{name.ljust(width)}  {median:>12}  {minimum:>11}  {'sim' if r['ok'] else 'não'}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f: json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+# benchmarks/fixtures.py
+"""
+Conjuntos de dados fixos para os benchmarks offline.
+
+Os fixtures sintéticos são determinísticos (semente fixa) e reproduzem o
+formato devolvido pelos provedores: painéis de fechamentos diários no formato
+do yf.download, demonstrativos no formato do yf.Ticker (linhas = contas,
+colunas = datas), séries do FRED/SGS, um painel de curva de juros (datas x
+prazos) e parâmetros de títulos.
+
+Eles são gerados na primeira execução e gravados em .pag_cache/benchmarks/,
+para que todas as rodadas (e a linha de base) usem exatamente os mesmos dados.
+
+Uso:
+    python -m benchmarks.fixtures [--rebuild]     # gera os fixtures sintéticos
+    python -m benchmarks.fixtures --record        # grava dados reais via pag.providers
+"""
+
+import argparse
+import os
+import pickle
+import sys
+
+import numpy as np
+import pandas as pd
+
+from pag.config import cache_path
+from pag.portfolio import FACTOR_TICKERS
+
+SCALES = [10, 100, 1000]
+YEARS = 20
+SEED = 20240101
+
+
+def _fixture_path(name):
+    return cache_path("benchmarks", "fixtures", f"{name}.pkl")
+
+def _load_or_build(name, builder, rebuild=False):
+    path = _fixture_path(name)
+    if not rebuild and os.path.exists(path):
+        with open(path, "rb") as f: return pickle.load(f)
+    data = builder()
+    with open(path, "wb") as f: pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return data
+
+
+# --- GERADORES SINTÉTICOS ---
+def _business_days(years=YEARS, end="2024-12-31"):
+    return pd.bdate_range(end=end, periods=years * 261)
+
+def _build_price_panel(n_tickers, years=YEARS, seed=SEED):
+    """Painel de fechamentos com estrutura de fatores (cada ativo tem um beta ao primeiro fator)."""
+    rng = np.random.default_rng(seed + n_tickers)
+    index = _business_days(years)
+    n_days = len(index)
+    factors = rng.normal(0.0003, 0.011, size=(n_days, len(FACTOR_TICKERS)))
+    betas = rng.uniform(0.3, 1.5, size=n_tickers)
+    idio = rng.normal(0.0002, 0.015, size=(n_days, n_tickers))
+    returns = np.column_stack([factors, factors[:, [0]] * betas + idio])
+    prices = 100 * np.exp(np.cumsum(np.log1p(returns), axis=0))
+    columns = list(FACTOR_TICKERS.values()) + [f"T{i:04d}" for i in range(n_tickers)]
+    return pd.DataFrame(prices, index=index, columns=columns)
+
+def _build_statements(n_companies, seed=SEED):
+    """Demonstrativos anuais (4 exercícios) no formato do yf.Ticker."""
+    rng = np.random.default_rng(seed + 7 * n_companies)
+    dates = pd.to_datetime(["2024-12-31", "2023-12-31", "2022-12-31", "2021-12-31"])
+    statements = []
+    for _ in range(n_companies):
+        revenue = rng.uniform(1e9, 5e10) * rng.uniform(0.85, 1.15, size=4)
+        ebit = revenue * rng.uniform(0.05, 0.3)
+        assets = revenue * rng.uniform(1.0, 2.5)
+        debt = assets * rng.uniform(0.1, 0.5)
+        income = pd.DataFrame([ebit, revenue * 0.04, debt * rng.uniform(0.03, 0.09), revenue], columns=dates,
+                              index=['Operating Income', 'Depreciation And Amortization', 'Interest Expense Non Operating', 'Total Revenue'])
+        balance = pd.DataFrame([assets * 0.6, assets * 0.08, debt, assets * 0.4, assets, debt * 0.25, debt * 0.75], columns=dates,
+                               index=['Total Liabilities Net Minority Interest', 'Cash And Cash Equivalents', 'Total Debt', 'Stockholders Equity',
+                                      'Total Assets', 'Current Debt And Capital Lease Obligation', 'Long Term Debt And Capital Lease Obligation'])
+        cash_flow = pd.DataFrame([ebit * rng.uniform(0.8, 1.3)], columns=dates, index=['Operating Cash Flow'])
+        statements.append((income, balance, cash_flow, {}))
+    return statements
+
+def _build_macro_series(seed=SEED):
+    """Séries do FRED (diárias, em %) e do SGS (Selic e IPCA) usadas como taxa livre de risco e juro real."""
+    rng = np.random.default_rng(seed + 1)
+    index = _business_days()
+    dgs3mo = pd.Series(np.clip(2 + np.cumsum(rng.normal(0, 0.03, len(index))), 0, None), index=index, name="DGS3MO")
+    dgs10 = pd.Series(np.clip(3 + np.cumsum(rng.normal(0, 0.04, len(index))), 0.5, None), index=index, name="DGS10")
+    months = pd.date_range(end="2024-12-01", periods=YEARS * 12, freq="MS")
+    sgs = pd.DataFrame({"selic": np.clip(10 + np.cumsum(rng.normal(0, 0.3, len(months))), 2, None),
+                        "ipca": np.clip(5 + np.cumsum(rng.normal(0, 0.2, len(months))), 0, None)}, index=months)
+    return {"fred": {"DGS3MO": dgs3mo, "DGS10": dgs10}, "sgs": sgs}
+
+def _build_curve_panel(seed=SEED):
+    """Painel diário datas x prazos (anos) de uma curva de Treasuries: fatores de nível, inclinação e curvatura em passeio aleatório."""
+    rng = np.random.default_rng(seed + 11)
+    index = _business_days()
+    maturities = np.array([1 / 12, 0.25, 0.5, 1, 2, 3, 5, 7, 10, 20, 30])
+    factors = np.array([4.0, -1.5, 0.5]) + np.cumsum(rng.normal(0, [0.03, 0.04, 0.05], size=(len(index), 3)), axis=0)
+    x = maturities / 2.0
+    loadings = np.column_stack([np.ones_like(x), (1 - np.exp(-x)) / x, (1 - np.exp(-x)) / x - np.exp(-x)])
+    rates = factors @ loadings.T + rng.normal(0, 0.02, size=(len(index), len(maturities)))
+    rates[rng.random(rates.shape) < 0.01] = np.nan  # Vértices faltantes em alguns dias, como no FRED
+    return pd.DataFrame(rates, index=index, columns=pd.Index(maturities, name="Prazo (anos)"))
+
+def _build_bonds(n_bonds, seed=SEED):
+    """Parâmetros de títulos: (preço, valor de face, cupom, anos até o vencimento, frequência)."""
+    rng = np.random.default_rng(seed + 3 * n_bonds)
+    bonds = []
+    for _ in range(n_bonds):
+        coupon, years, freq = rng.uniform(0.0, 0.12), int(rng.integers(1, 31)), int(rng.choice([1, 2]))
+        price = 1000 * rng.uniform(0.8, 1.15)
+        bonds.append((price, 1000.0, coupon, years, freq))
+    return bonds
+
+def _build_minutes(n_meetings, words=3000, seed=SEED):
+    """Atas sintéticas {data: texto}: palavras comuns intercaladas com os termos dos léxicos padrão."""
+    from pag.text_index import DISCOURSE_LEXICONS
+    rng = np.random.default_rng(seed + 7 * n_meetings)
+    terms = [t for lexicon in DISCOURSE_LEXICONS.values() for group in lexicon.values() for t in group]
+    vocabulary = np.array([f"palavra{i}" for i in range(2000)] + terms * 5)
+    dates = pd.date_range(end="2024-12-31", periods=n_meetings, freq="6W")
+    return {f"{d:%Y-%m-%d}": " ".join(rng.choice(vocabulary, words)) for d in dates}
+
+
+# --- API ---
+def load_fixtures(scale, source="synthetic", rebuild=False):
+    """Todos os dados de uma escala (número de ativos, empresas e títulos)."""
+    if source == "recorded":
+        recorded = load_recorded()
+        if recorded is None: raise FileNotFoundError("Nenhum fixture gravado. Rode: python -m benchmarks.fixtures --record")
+        tickers = [c for c in recorded["prices"].columns if c not in FACTOR_TICKERS.values()][:scale]
+        prices = recorded["prices"][[c for c in FACTOR_TICKERS.values() if c in recorded["prices"].columns] + tickers]
+        macro = recorded["macro"]
+    else:
+        prices = _load_or_build(f"prices_{scale}", lambda: _build_price_panel(scale), rebuild)
+        macro = _load_or_build("macro", _build_macro_series, rebuild)
+    return {
+        "prices": prices,
+        "statements": _load_or_build(f"statements_{scale}", lambda: _build_statements(scale), rebuild),
+        "bonds": _load_or_build(f"bonds_{scale}", lambda: _build_bonds(scale), rebuild),
+        "macro": macro,
+        "curves": _load_or_build("curves", _build_curve_panel, rebuild),
+        "minutes": _load_or_build(f"minutes_{scale}", lambda: _build_minutes(scale), rebuild),
+    }
+
+
+# --- GRAVAÇÃO DE DADOS REAIS ---
+RECORDED_FILE = "recorded"
+
+def record_fixtures(tickers, start="-20y"):
+    """Baixa fechamentos reais e séries macro pelos provedores (com cache) e grava um fixture."""
+    from pag import providers
+    all_tickers = list(FACTOR_TICKERS.values()) + [t for t in tickers if t not in FACTOR_TICKERS.values()]
+    data = {
+        "prices": providers.fetch_market_data(all_tickers, start),
+        "macro": {
+            "fred": {code: providers.fetch_fred_series(code, start) for code in ("DGS3MO", "DGS10")},
+            "sgs": providers.fetch_bcb_series({"selic": 432, "ipca": 13522}, start),
+        },
+    }
+    with open(_fixture_path(RECORDED_FILE), "wb") as f: pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return data
+
+def load_recorded():
+    try:
+        with open(_fixture_path(RECORDED_FILE), "rb") as f: return pickle.load(f)
+    except OSError:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera ou grava os fixtures dos benchmarks offline.")
+    parser.add_argument("--rebuild", action="store_true", help="Regera os fixtures sintéticos")
+    parser.add_argument("--record", nargs="*", metavar="TICKER", help="Grava dados reais (padrão: tickers dos painéis de mercado)")
+    args = parser.parse_args(argv)
+
+    if args.record is not None:
+        from pag.registry import MARKET_PANELS
+        tickers = args.record or [t for panel in MARKET_PANELS.values() for t in panel.values()]
+        data = record_fixtures(tickers)
+        print(f"Fixture gravado: {data['prices'].shape[1]} tickers, {len(data['prices'])} pregões.")
+        return 0
+    for scale in SCALES:
+        fixtures = load_fixtures(scale, rebuild=args.rebuild)
+        print(f"Escala {scale}: preços {fixtures['prices'].shape}, {len(fixtures['statements'])} empresas, {len(fixtures['bonds'])} títulos.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
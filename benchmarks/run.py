@@ -0,0 +1,258 @@
+# benchmarks/run.py
+"""
+Benchmarks offline dos cálculos da plataforma, sem acesso a Yahoo/FRED/BCB.
+
+Cada caso roda sobre os fixtures de benchmarks/fixtures.py em cada escala
+(10, 100 e 1000 ativos/empresas/títulos sobre 20 anos de pregões) e registra o
+melhor tempo de N repetições.
+
+Uso:
+    python -m benchmarks.run                               # relatório no terminal
+    python -m benchmarks.run --save baseline.json          # grava a linha de base
+    python -m benchmarks.run --compare baseline.json       # compara e falha (exit 1) se houver regressão
+
+Uma regressão é um caso cujo tempo passou de --threshold vezes a linha de base
+(padrão 1.25x) e de --min-delta milissegundos (evita ruído em casos muito rápidos).
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.fixtures import FACTOR_TICKERS, SCALES, load_fixtures
+from pag import compute, curves, freshness
+from pag.cache import DATA_CACHE
+from pag.charts import downsample
+from pag.curve_risk import curve_risk, standard_scenarios
+from pag.curves import YieldCurve, curve_surface, inversion_flags, shape_metrics
+from pag.drawdown import drawdown_summary
+from pag.fixed_income import calculate_macaulay_duration, calculate_ytm
+from pag.fundamentals import calculate_credit_metrics
+from pag.performance import calculate_performance_metrics, trailing_returns
+from pag.tracking import RollingMoments, tracking_summary
+from pag.portfolio import backtest_from_prices, calculate_portfolio_metrics, calculate_portfolio_risk, factor_betas_from_prices
+from pag.registry import CURVE_MATURITIES, US_CURVE_TENORS
+from pag.text_index import DISCOURSE_LEXICONS, scorer, tokenize
+
+
+# --- CASOS ---
+def _assets(fx):
+    """Preços dos ativos (sem as colunas de fatores) e pesos iguais, como nas páginas."""
+    tickers = [c for c in fx["prices"].columns if c not in FACTOR_TICKERS.values()]
+    return fx["prices"][tickers], tickers, np.full(len(tickers), 1 / len(tickers))
+
+def _risk_free(fx):
+    return fx["macro"]["fred"]["DGS3MO"].dropna().iloc[-1] / 100
+
+def case_portfolio_metrics(fx):
+    prices, _, weights = _assets(fx)
+    return lambda: calculate_portfolio_metrics(prices, weights)
+
+def case_portfolio_risk(fx):
+    prices, _, weights = _assets(fx)
+    return lambda: calculate_portfolio_risk(prices, weights)
+
+def case_run_backtest(fx):
+    prices, tickers, weights = _assets(fx)
+    return lambda: backtest_from_prices(prices, tickers, weights)
+
+def case_factor_betas(fx):
+    _, tickers, _ = _assets(fx)
+    return lambda: factor_betas_from_prices(fx["prices"], tickers, FACTOR_TICKERS)
+
+def case_credit_metrics(fx):
+    return lambda: [calculate_credit_metrics(*statements) for statements in fx["statements"]]
+
+def case_ytm(fx):
+    return lambda: [calculate_ytm(*bond) for bond in fx["bonds"]]
+
+def case_macaulay_duration(fx):
+    # A YTM é calculada fora do cronômetro: mede-se apenas a duration
+    inputs = [(price, face, coupon, calculate_ytm(price, face, coupon, years, freq), years, freq) for price, face, coupon, years, freq in fx["bonds"]]
+    return lambda: [calculate_macaulay_duration(*args) for args in inputs]
+
+def case_performance_metrics(fx):
+    prices, _, _ = _assets(fx)
+    risk_free_rate = _risk_free(fx)
+    return lambda: calculate_performance_metrics(prices, risk_free_rate)
+
+def case_drawdown_summary(fx):
+    prices, _, _ = _assets(fx)
+    return lambda: drawdown_summary(prices)
+
+def case_trailing_returns(fx):
+    prices, _, _ = _assets(fx)
+    return lambda: trailing_returns(prices)
+
+def case_tracking(fx):
+    # Lote: todos os ativos contra o primeiro fator, resumo + três janelas móveis
+    prices, _, _ = _assets(fx)
+    returns = prices.pct_change()
+    benchmark = fx["prices"][[FACTOR_TICKERS["S&P 500"]]].pct_change()
+    def run():
+        tracking_summary(returns, benchmark)
+        moments = RollingMoments(returns, benchmark)
+        for window in (21, 63, 252): moments.window(window)
+    return run
+
+def case_downsample(fx):
+    # Um gráfico típico tem poucas séries: reduz as 10 primeiras a ~1400 pontos
+    prices, _, _ = _assets(fx)
+    panel = prices.iloc[:, :10]
+    return lambda: (downsample(panel, method="lttb"), downsample(panel, method="minmax"))
+
+@contextmanager
+def _benchmark_cache():
+    # O cache persistente aponta para o namespace "benchmarks": os fixtures não se misturam aos dados reais
+    namespace, DATA_CACHE.namespace = DATA_CACHE.namespace, "benchmarks"
+    try: yield
+    finally: DATA_CACHE.namespace = namespace
+
+def case_curve_panel(fx):
+    # curves.curve_panel sobre o cache primado com os vértices do fixture (idade dos vértices, agenda de
+    # divulgação e leitura do painel de 20 anos) + forma da curva (meta: < 1 s no total). O aquecimento
+    # monta o painel; as repetições medem o caminho das páginas com o cache em dia.
+    with _benchmark_cache():
+        for name, code in US_CURVE_TENORS.items():
+            key, series = curves._tenor_key("US", code), fx["curves"][CURVE_MATURITIES[name]].dropna()
+            DATA_CACHE.set(key, series)
+            freshness.record_fetch(key, series)
+    def run():
+        with _benchmark_cache():
+            panel = curves.curve_panel("US")
+            metrics = shape_metrics(panel, "US")
+            inversion_flags(metrics, "US"); curve_surface(panel)
+    return run
+
+def case_curve_fit(fx):
+    # Ajuste de todas as datas (NSS e spline) e uma consulta de fatores de desconto
+    def run():
+        for method in ("nss", "spline"):
+            YieldCurve(fx["curves"], method).discount_factors(np.arange(0.5, 30.5, 0.5))
+    return run
+
+def case_curve_risk(fx):
+    # KRDs, duration/convexidade e P&L dos cenários padrão para todos os títulos da escala em uma reprecificação
+    curve = YieldCurve(fx["curves"], "nss")
+    today = curve.dates[-1]
+    bonds = pd.DataFrame([(f"B{i}", face, coupon * 100, today + pd.DateOffset(years=years), freq, 0.0) for i, (_, face, coupon, years, freq) in enumerate(fx["bonds"])],
+                         columns=["Título", "Nominal", "Cupom (%)", "Vencimento", "Frequência", "Spread (bps)"])
+    scenarios = standard_scenarios()
+    return lambda: curve_risk(curve, bonds, scenarios)
+
+def case_minutes_tone(fx):
+    # Tokenização e placar hawkish/dovish (Aho-Corasick, uma passada) de todas as atas da escala
+    lexicon_scorer = scorer(DISCOURSE_LEXICONS["pt"])
+    return lambda: [lexicon_scorer.score(tokenize(text)) for text in fx["minutes"].values()]
+
+CASES = {
+    "calculate_portfolio_metrics": case_portfolio_metrics,
+    "calculate_portfolio_risk": case_portfolio_risk,
+    "run_backtest": case_run_backtest,
+    "calculate_factor_betas": case_factor_betas,
+    "calculate_credit_metrics": case_credit_metrics,
+    "calculate_ytm": case_ytm,
+    "calculate_macaulay_duration": case_macaulay_duration,
+    "calculate_performance_metrics": case_performance_metrics,
+    "drawdown_summary": case_drawdown_summary,
+    "trailing_returns": case_trailing_returns,
+    "tracking": case_tracking,
+    "downsample": case_downsample,
+    "curve_panel": case_curve_panel,
+    "curve_fit": case_curve_fit,
+    "curve_risk": case_curve_risk,
+    "minutes_tone": case_minutes_tone,
+}
+
+
+# --- EXECUÇÃO ---
+def _time(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def run_benchmarks(scales=SCALES, cases=None, repeat=3, source="synthetic"):
+    """Executa os casos e devolve {"meta": ..., "results": {caso: {escala: segundos}}}."""
+    results = {name: {} for name in (cases or CASES)}
+    for scale in scales:
+        fx = load_fixtures(scale, source)
+        for name in results:
+            try:
+                fn = CASES[name](fx)
+                fn()  # Aquecimento (imports tardios, caches do pandas)
+                results[name][str(scale)] = _time(fn, repeat)
+            except Exception as e:
+                results[name][str(scale)] = None
+                print(f"  {name} @ {scale}: erro {type(e).__name__}: {e}", file=sys.stderr)
+    meta = {"date": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+            "numpy": np.__version__, "pandas": pd.__version__, "machine": platform.machine(),
+            "source": source, "repeat": repeat}
+    return {"meta": meta, "results": results}
+
+
+# --- RELATÓRIO ---
+def _fmt_ms(seconds):
+    return "—" if seconds is None else f"{seconds * 1000:10.2f}"
+
+def compare(current, baseline, threshold=1.25, min_delta_ms=5.0):
+    """Linhas do relatório (caso, escala, atual, base, razão, regressão)."""
+    rows = []
+    for name, by_scale in current["results"].items():
+        for scale, seconds in by_scale.items():
+            base = baseline["results"].get(name, {}).get(scale) if baseline else None
+            ratio = seconds / base if seconds is not None and base else None
+            regression = bool(ratio and ratio > threshold and (seconds - base) * 1000 > min_delta_ms)
+            rows.append({"case": name, "scale": scale, "ms": seconds, "base_ms": base, "ratio": ratio, "regression": regression})
+    return rows
+
+def print_report(rows, baseline_meta=None):
+    if baseline_meta: print(f"Linha de base: {baseline_meta.get('date')} (pandas {baseline_meta.get('pandas')}, numpy {baseline_meta.get('numpy')})")
+    print(f"{'Caso':32} {'Escala':>6} {'Atual (ms)':>10} {'Base (ms)':>10} {'Razão':>7}")
+    for r in rows:
+        ratio = f"{r['ratio']:6.2f}x" if r["ratio"] else "      —"
+        flag = "  << REGRESSÃO" if r["regression"] else ""
+        print(f"{r['case']:32} {r['scale']:>6} {_fmt_ms(r['ms'])} {_fmt_ms(r['base_ms'])} {ratio}{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks offline dos cálculos da plataforma.")
+    parser.add_argument("--scales", nargs="+", type=int, default=SCALES)
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=None)
+    parser.add_argument("--repeat", type=int, default=3, help="Repetições por caso (vale o melhor tempo)")
+    parser.add_argument("--source", choices=["synthetic", "recorded"], default="synthetic")
+    parser.add_argument("--save", metavar="ARQUIVO", help="Grava os resultados em JSON (linha de base)")
+    parser.add_argument("--compare", metavar="ARQUIVO", help="Compara com uma linha de base gravada com --save")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Razão a partir da qual o caso é regressão")
+    parser.add_argument("--min-delta", type=float, default=5.0, help="Diferença mínima (ms) para contar como regressão")
+    args = parser.parse_args(argv)
+
+    compute.MIN_COST = float("inf")  # Os casos medem os cálculos na própria thread; o pool de processos é medido em bench_compute
+    current = run_benchmarks(args.scales, args.cases, args.repeat, args.source)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f: baseline = json.load(f)
+    rows = compare(current, baseline, args.threshold, args.min_delta)
+    print_report(rows, baseline["meta"] if baseline else None)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f: json.dump(current, f, ensure_ascii=False, indent=2)
+        print(f"Resultados gravados em {args.save}")
+    regressions = [r for r in rows if r["regression"]]
+    if regressions:
+        print(f"{len(regressions)} regressão(ões) acima de {args.threshold:.2f}x.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
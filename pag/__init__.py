@@ -0,0 +1,2 @@
+# pag/__init__.py
+"""Módulos compartilhados da plataforma Highpar (PAG), usados pelas páginas do Streamlit."""
@@ -0,0 +1,64 @@
+# pag/cache.py
+"""
+Cache persistente em disco, compartilhado entre sessões e processos.
+
+O st.cache_data vive apenas na memória do processo do Streamlit. Este cache
+grava cada resultado em um arquivo pickle dentro do CACHE_DIR, de modo que o
+job de warm-up (rodando em outro processo) possa deixar os dados prontos para
+as páginas.
+"""
+
+import hashlib
+import os
+import pickle
+import time
+
+from pag.config import cache_path
+
+# Sentinela para diferenciar "não encontrado" de um valor None armazenado
+MISS = object()
+
+
+class PersistentCache:
+    """Armazenamento chave -> valor em arquivos pickle, com idade baseada no mtime."""
+
+    def __init__(self, namespace="data"):
+        self.namespace = namespace
+
+    def _path(self, key):
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return cache_path(self.namespace, digest[:2], f"{digest}.pkl")
+
+    def age(self, key):
+        """Idade da entrada em segundos (None se não existir)."""
+        try:
+            return time.time() - os.path.getmtime(self._path(key))
+        except OSError:
+            return None
+
+    def get(self, key, max_age=None):
+        """Retorna o valor armazenado, ou MISS se não existir ou for mais velho que max_age (segundos)."""
+        path = self._path(key)
+        try:
+            if max_age is not None and time.time() - os.path.getmtime(path) > max_age: return MISS
+            with open(path, "rb") as f: return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return MISS
+
+    def set(self, key, value):
+        """Grava o valor de forma atômica (arquivo temporário + rename)."""
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f: pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path): os.remove(tmp_path)
+
+    def delete(self, key):
+        try: os.remove(self._path(key))
+        except OSError: pass
+
+
+# Instância padrão usada pelos provedores de dados
+DATA_CACHE = PersistentCache("data")
@@ -0,0 +1,185 @@
+# pag/charts.py
+"""
+Camada de dados dos gráficos: downsampling no servidor e cache das figuras.
+
+Séries diárias longas (5 a 20 anos) viram dezenas de milhares de pontos no
+JSON enviado ao navegador a cada rerun, mas um gráfico de ~1400 px de largura
+não mostra mais do que um ponto por pixel. Antes de montar a figura, cada
+série é reduzida para o número de pontos da largura do gráfico:
+
+- "lttb" (Largest-Triangle-Three-Buckets): preserva a forma visual da série;
+- "minmax": mínimo e máximo de cada faixa, ideal para séries com picos.
+
+Em ambos os métodos os extremos globais (máximo e mínimo) de cada série são
+sempre mantidos. A figura pronta é guardada como JSON em um cache LRU em
+memória, com chave pelo hash dos dados e dos parâmetros do gráfico. O mesmo
+cache serve figuras estáticas de qualquer tipo via cached_figure().
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Largura de referência de um gráfico em largura total no layout "wide"
+CHART_WIDTH_PX = 1400
+POINTS_PER_PX = 1.0
+FIGURE_CACHE_SIZE = 256
+
+_figure_cache = OrderedDict()
+_figure_cache_lock = threading.Lock()
+
+
+# --- DOWNSAMPLING ---
+def target_points(width_px=CHART_WIDTH_PX, points_per_px=POINTS_PER_PX):
+    return max(int(width_px * points_per_px), 16)
+
+def lttb_indices(x, y, n_out):
+    """Índices escolhidos pelo LTTB (x e y numéricos, sem NaN)."""
+    n = len(y)
+    if n_out >= n or n_out < 3: return np.arange(n)
+    bucket = (n - 2) / (n_out - 2)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = int(i * bucket) + 1, int((i + 1) * bucket) + 1
+        next_end = min(int((i + 2) * bucket) + 1, n)
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        # Ponto da faixa que forma o maior triângulo com o ponto anterior e a média da próxima faixa
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+def minmax_indices(y, n_out):
+    """Índices do mínimo e do máximo de cada faixa (n_out / 2 faixas), além do primeiro e do último ponto."""
+    n = len(y)
+    if n_out >= n: return np.arange(n)
+    edges = np.linspace(0, n, max(n_out // 2, 1) + 1).astype(np.int64)
+    picks = [0, n - 1]
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end > start: picks += [start + int(np.argmin(y[start:end])), start + int(np.argmax(y[start:end]))]
+    return np.unique(picks)
+
+def downsample(data, n_points=None, method="lttb", columns=None):
+    """
+    Reduz uma Série/DataFrame a ~n_points linhas por série. Em painéis, as linhas mantidas
+    são a união das escolhidas para cada coluna (todas as séries preservam sua forma).
+    """
+    n_points = n_points or target_points()
+    if len(data) <= n_points: return data
+    frame = data.to_frame() if isinstance(data, pd.Series) else data
+    columns = [c for c in (columns or frame.columns) if c in frame.columns and pd.api.types.is_numeric_dtype(frame[c])]
+    if not columns: return data
+
+    index = frame.index
+    x_all = index.asi8.astype(float) if isinstance(index, pd.DatetimeIndex) else np.arange(len(index), dtype=float)
+    keep = [np.array([0, len(index) - 1])]
+    for col in columns:
+        y_all = frame[col].to_numpy(dtype=float)
+        valid = np.flatnonzero(~np.isnan(y_all))
+        if len(valid) == 0: continue
+        y = y_all[valid]
+        picked = lttb_indices(x_all[valid], y, n_points) if method == "lttb" else minmax_indices(y, n_points)
+        keep.append(valid[picked])
+        keep.append(valid[[np.argmin(y), np.argmax(y)]])  # Extremos globais sempre presentes
+    rows = np.unique(np.concatenate(keep))
+    return data.iloc[rows]
+
+
+# --- CACHE DE FIGURAS ---
+def data_hash(data):
+    """Hash estável do conteúdo: Séries/DataFrames pelos valores, índice e colunas; o resto pelo repr."""
+    if isinstance(data, (pd.Series, pd.DataFrame)):
+        frame = data.to_frame() if isinstance(data, pd.Series) else data
+        digest = hashlib.sha1(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+        digest.update(repr(list(frame.columns)).encode("utf-8"))
+        return digest.hexdigest()
+    return hashlib.sha1(repr(data).encode("utf-8")).hexdigest()
+
+def _cached_figure(key, build):
+    import plotly.io as pio
+    with _figure_cache_lock:
+        figure_json = _figure_cache.get(key)
+        if figure_json is not None: _figure_cache.move_to_end(key)
+    if figure_json is None:
+        figure_json = build().to_json()
+        with _figure_cache_lock:
+            _figure_cache[key] = figure_json
+            while len(_figure_cache) > FIGURE_CACHE_SIZE: _figure_cache.popitem(last=False)
+    # Cada chamada recebe uma figura nova: as páginas ainda podem chamar update_layout/add_hline
+    return pio.from_json(figure_json)
+
+def cached_figure(build, *args):
+    """
+    Figura build(*args) guardada como JSON, com chave pelo hash de cada argumento e pelo código
+    de build. Em reruns com os mesmos dados a figura não é remontada.
+    """
+    code = hashlib.sha1(build.__code__.co_code + repr(build.__code__.co_consts).encode("utf-8")).hexdigest()
+    key = (build.__qualname__, code) + tuple(data_hash(arg) for arg in args)
+    return _cached_figure(key, lambda: build(*args))
+
+def figure_cache_info():
+    with _figure_cache_lock:
+        return {"entries": len(_figure_cache), "bytes": sum(len(v) for v in _figure_cache.values())}
+
+def _build_chart(kind, data, width_px, method, px_kwargs):
+    import plotly.express as px
+    y = px_kwargs.get("y")
+    columns = [y] if isinstance(y, str) else y
+    return getattr(px, kind)(downsample(data, target_points(width_px), method, columns), **px_kwargs)
+
+def _chart(kind, data, width_px, method, px_kwargs):
+    key = (kind, data_hash(data), width_px, method, repr(sorted(px_kwargs.items())))
+    return _cached_figure(key, lambda: _build_chart(kind, data, width_px, method, px_kwargs))
+
+def line_chart(data, width_px=CHART_WIDTH_PX, method="lttb", **px_kwargs):
+    """px.line sobre os dados reduzidos para a largura do gráfico, com cache da figura."""
+    return _chart("line", data, width_px, method, px_kwargs)
+
+def area_chart(data, width_px=CHART_WIDTH_PX, method="minmax", **px_kwargs):
+    """px.area sobre os dados reduzidos (min-max por padrão, para não cortar picos)."""
+    return _chart("area", data, width_px, method, px_kwargs)
+
+
+# --- FIGURAS PADRÃO ---
+def _indicator(series, title, unit, hline, width_px):
+    fig = _build_chart("area", series, width_px, "minmax", {"title": title})
+    fig.update_layout(showlegend=False, yaxis_title=unit, xaxis_title="Data", yaxis_tickformat=",.2f")
+    if hline is not None:
+        fig.add_hline(y=hline, line_dash="dash", line_color="red", annotation_text=f"Nível {hline}")
+    return fig
+
+def indicator_figure(series, title, unit="Índice", hline=None, width_px=CHART_WIDTH_PX * 3 // 4):
+    """Gráfico de área de um indicador econômico (layout padrão das páginas Macro), com cache da figura."""
+    return cached_figure(_indicator, series, title, unit, hline, width_px)
+
+def _surface(surface, title):
+    import plotly.graph_objects as go
+    fig = go.Figure(go.Surface(x=surface.columns.to_numpy(dtype=float), y=surface.index, z=surface.to_numpy(), colorscale="Viridis", colorbar=dict(title="%")))
+    fig.update_layout(title=title, height=650, margin=dict(l=0, r=0, t=50, b=0), scene=dict(xaxis_title="Prazo (anos)", yaxis_title="Data", zaxis_title="Taxa (%)"))
+    return fig
+
+def surface_figure(surface, title):
+    """Superfície 3D datas x prazos (ex: histórico da curva de juros), com cache da figura."""
+    return cached_figure(_surface, surface, title)
+
+def _tone_policy(tone, rate, title):
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    fig.add_trace(go.Scatter(x=rate.index, y=rate.to_numpy(), name=rate.name, line_shape="hv", line=dict(color="#7F8C8D")), secondary_y=True)
+    fig.add_trace(go.Scatter(x=tone.index, y=tone.to_numpy(), name=tone.name, mode="lines+markers",
+                             marker=dict(size=9, color=np.where(tone.to_numpy() >= 0, "#C70039", "#2E8B57")), line=dict(color="#34495E", width=1)), secondary_y=False)
+    fig.add_hline(y=0, line_dash="dash", line_color="gray")
+    fig.update_layout(title=title, legend=dict(orientation="h", y=-0.15), hovermode="x unified")
+    fig.update_yaxes(title_text=tone.name, range=[-1.05, 1.05], secondary_y=False)
+    fig.update_yaxes(title_text=rate.name, secondary_y=True, showgrid=False)
+    return fig
+
+def tone_policy_figure(tone, rate, title):
+    """Tom líquido de cada reunião (pontos: vermelho hawkish, verde dovish) sobre o juro básico (degraus, eixo secundário)."""
+    return cached_figure(_tone_policy, tone, rate, title)
@@ -0,0 +1,111 @@
+# pag/composites.py
+"""
+Índices de difusão e de momento sobre os indicadores registrados (Brasil e EUA).
+
+Cada indicador de pag.registry entra pela mesma série que a página Macro
+plota (nível, variação anual ou mensal, via pag.transforms; os níveis com
+tendência entram pela variação, ver registry.COMPOSITE_STEPS), alinhada ao calendário
+mensal (último dado do mês, repetido por até 2 meses para cobrir defasagens
+de divulgação e séries trimestrais) e padronizada por um z-score móvel de
+5 anos (com ao menos 2 anos de histórico). As séries são as mesmas (e com a
+mesma data inicial) que a página já busca: nenhum download a mais. Com o
+painel meses x indicadores, os índices saem em uma única passada vetorizada:
+
+- Composto: média dos z-scores (com o sinal de cada indicador);
+- Momento: média das variações de 3 meses dos z-scores;
+- Difusão: % dos indicadores cuja variação de 3 meses do z-score é positiva
+  (acima de 50 = a maioria melhorando/acelerando).
+
+O sinal é +1 quando alta do indicador = economia mais forte ou mais aquecida
+(inflação inclusive) e -1 nos de registry.COMPOSITE_INVERTED.
+
+O painel padronizado fica no cache persistente junto com a versão (última
+data e hash do conteúdo) de cada série: quando um indicador tem dado novo ou
+revisado, só a coluna dele é realinhada e padronizada de novo.
+"""
+
+import pandas as pd
+
+from pag import charts, providers, transforms
+from pag.cache import DATA_CACHE, MISS
+from pag.registry import COMPOSITE_EXCLUDE, COMPOSITE_INVERTED, COMPOSITE_STEPS, MACRO_START, all_indicators
+
+COUNTRIES = ["Brasil", "EUA"]
+ZSCORE_MONTHS, ZSCORE_MIN_MONTHS = 60, 24
+MOMENTUM_MONTHS = 3
+FILL_MONTHS = 2
+MIN_COVERAGE = 0.5  # Meses com menos da metade dos indicadores publicados ficam de fora dos índices
+
+
+def composite_indicators(country):
+    """
+    Indicadores do país que entram nos compostos (um por série e sinal: o mesmo código com a
+    mesma transformação entra uma vez, mas um indicador invertido nunca é fundido a um direto).
+    """
+    seen, specs = set(), []
+    for ind in all_indicators():
+        if ind["country"] != country or ind["name"] in COMPOSITE_EXCLUDE: continue
+        steps = COMPOSITE_STEPS.get(ind["name"], ("yoy",) if ind["is_pct_change"] else ())
+        sign = -1 if ind["name"] in COMPOSITE_INVERTED else 1
+        node = (ind["source"], str(ind["code"]), steps, sign)
+        if node in seen: continue
+        seen.add(node)
+        specs.append({**ind, "steps": steps, "sign": sign})
+    return specs
+
+
+# --- PAINEL PADRONIZADO ---
+def _standardize(series):
+    """Série mensal (fim de mês) e z-score móvel de uma série já transformada."""
+    monthly = series.resample("ME").last().ffill(limit=FILL_MONTHS)
+    rolling = monthly.rolling(ZSCORE_MONTHS, min_periods=ZSCORE_MIN_MONTHS)
+    return (monthly - rolling.mean()) / rolling.std()
+
+def indicator_panel(country, max_age=providers.SCHEDULED):
+    """Painel meses x indicadores de z-scores (já com o sinal), atualizado coluna a coluna quando uma série muda."""
+    key = ("composite_panel", country, MACRO_START)
+    stored = DATA_CACHE.get(key)
+    versions, columns = (stored["versions"], stored["columns"]) if stored is not MISS else ({}, {})
+    new_versions, new_columns, changed = {}, {}, False
+    for spec in composite_indicators(country):
+        try: series = transforms.derive(spec["source"], spec["code"], spec["steps"], MACRO_START, max_age)
+        except Exception: continue
+        if series.empty: continue
+        name, version = spec["title"], (str(series.index[-1]), charts.data_hash(series))
+        if versions.get(name) == version and name in columns: new_columns[name] = columns[name]
+        else:
+            new_columns[name], changed = _standardize(series) * spec["sign"], True
+        new_versions[name] = version
+    if changed or set(new_columns) != set(columns):
+        DATA_CACHE.set(key, {"versions": new_versions, "columns": new_columns})
+    return pd.DataFrame(new_columns).sort_index() if new_columns else pd.DataFrame()
+
+
+# --- ÍNDICES ---
+def composite_indices(z):
+    """Composto, Momento e Difusão mensais (uma passada sobre o painel) e a cobertura de cada mês."""
+    change = z - z.shift(MOMENTUM_MONTHS)
+    available = change.notna()
+    coverage = available.sum(axis=1) / z.shape[1]
+    indices = pd.DataFrame({
+        "Composto": z.mean(axis=1),
+        "Momento": change.mean(axis=1),
+        "Difusão (%)": (change > 0).astype(float).where(available).mean(axis=1) * 100,
+        "Cobertura (%)": coverage * 100,
+    })
+    return indices[coverage >= MIN_COVERAGE]
+
+def contributions(z, month=None):
+    """Z-score e variação de 3 meses de cada indicador em um mês (padrão: o último dos índices)."""
+    change = z - z.shift(MOMENTUM_MONTHS)
+    month = z.index[-1] if month is None else month
+    table = pd.DataFrame({"Z-score": z.loc[month], f"Variação {MOMENTUM_MONTHS}m": change.loc[month]})
+    return table.dropna(how="all").sort_values(f"Variação {MOMENTUM_MONTHS}m", ascending=False)
+
+def country_summary(country, start_date=MACRO_START, max_age=providers.SCHEDULED):
+    """Índices do país a partir de start_date e a tabela de contribuições do último mês com cobertura suficiente."""
+    z = indicator_panel(country, max_age)
+    if z.empty: return pd.DataFrame(), pd.DataFrame()
+    indices = composite_indices(z)
+    if indices.empty: return indices, pd.DataFrame()
+    return indices.loc[providers.resolve_start(start_date):], contributions(z, indices.index[-1])
@@ -0,0 +1,127 @@
+# pag/compute.py
+"""
+Pool de processos compartilhado para os cálculos CPU-bound (NumPy/pandas).
+
+Cada sessão do Streamlit roda o script em uma thread do mesmo processo, então
+os cálculos pesados de usuários simultâneos disputam o GIL e acabam rodando em
+fila. run() despacha a função para um pool de processos único (um worker por
+núcleo) compartilhado por todas as sessões.
+
+As matrizes numéricas (DataFrames de preços/retornos) não são serializadas:
+cada uma é copiada uma vez para um bloco de memória compartilhada
+(multiprocessing.shared_memory) e o worker monta o DataFrame diretamente sobre
+esse bloco. Pelo pipe passam apenas o nome do bloco, o formato, os rótulos e
+os argumentos pequenos (pesos, arrays de fluxos).
+
+Quem chama informa o custo estimado do cálculo (segundos, pelos modelos de
+custo de cada módulo, ex: pag.portfolio.covariance_cost). Abaixo de MIN_COST o
+cálculo roda na própria thread: o custo de despachar (cópia para a memória
+compartilhada, pipe e o resultado de volta: ~5 ms para um painel de 250
+ativos x 5 anos) superaria o ganho. Na prática, a reprecificação de carteiras
+de títulos passa do limite a partir de algumas centenas de títulos (ou menos,
+com títulos de cupom mensal, que têm mais fluxos); as métricas de carteira só
+passam com painéis de algumas centenas de ativos.
+
+A função despachada precisa ser importável pelo worker (definida no nível de
+módulo em pag/, e não a versão instrumentada da página). Dentro de um worker
+(deste pool ou do pool de jobs), run() sempre roda no próprio processo.
+"""
+
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import ExitStack
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+COMPUTE_WORKERS = int(os.environ.get("PAG_COMPUTE_WORKERS", os.cpu_count() or 1))
+MIN_COST = float(os.environ.get("PAG_COMPUTE_MIN_MS", 20)) / 1000  # Custo estimado mínimo (s) para despachar
+
+_pool = None
+_pool_lock = threading.Lock()
+_in_worker = multiprocessing.current_process().name != "MainProcess"  # Workers deste pool e do pool de jobs
+
+
+# --- MEMÓRIA COMPARTILHADA ---
+class SharedFrame:
+    """Cópia float64 da matriz de um DataFrame em memória compartilhada (liberada ao sair do bloco with)."""
+
+    def __init__(self, frame):
+        values = frame.to_numpy(dtype=float)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        np.ndarray(values.shape, dtype=float, buffer=self._shm.buf)[:] = values
+        self.handle = _Shared(self._shm.name, values.shape, frame.index, frame.columns)
+
+    def close(self):
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _Shared:
+    """O que vai pelo pipe no lugar de um DataFrame compartilhado."""
+
+    def __init__(self, name, shape, index, columns):
+        self.name, self.shape, self.index, self.columns = name, shape, index, columns
+
+
+def _is_numeric_frame(value):
+    return isinstance(value, pd.DataFrame) and value.size > 0 and all(pd.api.types.is_numeric_dtype(dtype) for dtype in value.dtypes)
+
+def _attach(handle, blocks):
+    # No Python 3.13+ o worker não registra o bloco no resource tracker (quem cria é quem libera)
+    shm = shared_memory.SharedMemory(name=handle.name, **({"track": False} if sys.version_info >= (3, 13) else {}))
+    blocks.append(shm)
+    return pd.DataFrame(np.ndarray(handle.shape, dtype=float, buffer=shm.buf), index=handle.index, columns=handle.columns, copy=False)
+
+def _call(fn, args, kwargs):
+    """Roda no worker: monta os DataFrames sobre os blocos compartilhados e chama fn."""
+    blocks = []
+    args = [_attach(a, blocks) if isinstance(a, _Shared) else a for a in args]
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        del args
+        for shm in blocks:
+            try: shm.close()
+            except BufferError: pass  # O resultado ainda aponta para o bloco: o mapeamento é liberado junto com ele
+
+
+# --- EXECUÇÃO ---
+def _get_pool(reset=False):
+    global _pool
+    with _pool_lock:
+        if reset and _pool is not None:
+            _pool.shutdown(wait=False); _pool = None
+        if _pool is None:
+            # "spawn": os workers não herdam as threads do servidor do Streamlit
+            _pool = ProcessPoolExecutor(max_workers=COMPUTE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def should_dispatch(cost):
+    return COMPUTE_WORKERS > 1 and not _in_worker and cost >= MIN_COST
+
+def run(fn, *args, cost=0.0, **kwargs):
+    """
+    fn(*args, **kwargs) em um processo do pool se o custo estimado (s) for de pelo menos MIN_COST,
+    com os DataFrames numéricos de args em memória compartilhada. Bloqueia a sessão que chamou,
+    mas não as outras: cada chamada ocupa um núcleo.
+    """
+    if not should_dispatch(cost): return fn(*args, **kwargs)
+    with ExitStack() as stack:
+        shared = [stack.enter_context(SharedFrame(a)).handle if _is_numeric_frame(a) else a for a in args]
+        try:
+            future = _get_pool().submit(_call, fn, shared, kwargs)
+        except BrokenProcessPool:  # Um worker morreu (ex: falta de memória): recria o pool
+            future = _get_pool(reset=True).submit(_call, fn, shared, kwargs)
+        return future.result()
@@ -0,0 +1,21 @@
+# pag/config.py
+"""Caminhos e parâmetros compartilhados entre as páginas e os jobs da plataforma."""
+
+import os
+
+# Diretório raiz do projeto (onde fica o Plataforma_PAG.py)
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Diretório do cache persistente compartilhado entre sessões e processos
+CACHE_DIR = os.environ.get("PAG_CACHE_DIR", os.path.join(ROOT_DIR, ".pag_cache"))
+
+# Banco SQLite com os dados editados pelos analistas (reuniões, visões e recomendações).
+# Fica fora do CACHE_DIR: não é cache e não pode ser apagado junto com ele.
+STORE_DB = os.environ.get("PAG_STORE_DB", os.path.join(ROOT_DIR, "pag_data.sqlite"))
+
+
+def cache_path(*parts):
+    """Retorna um caminho dentro do CACHE_DIR, criando os diretórios necessários."""
+    path = os.path.join(CACHE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
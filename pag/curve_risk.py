@@ -0,0 +1,195 @@
+# pag/curve_risk.py
+"""
+Risco de curva de uma carteira de títulos contra a curva ajustada (pag.curves).
+
+Todos os títulos são reprecificados de uma vez: os fluxos ficam em matrizes
+títulos x fluxos (tempos e valores, preenchidas com zero após o vencimento) e
+cada cenário é um vetor de choques (bps) nos vértices de KEY_RATES, levado aos
+prazos dos fluxos por interpolação linear. Com a matriz de interpolação W
+calculada uma vez, o choque de todos os cenários em todos os fluxos é um único
+produto matricial, e o preço de todos os títulos em todos os cenários é uma
+soma sobre o eixo dos fluxos (reprecificação completa, sem aproximação).
+
+- Key-rate durations: choques de ±1 bp em um vértice por vez (a interpolação
+  linear dá o "triângulo" clássico); a soma das KRDs é a duration efetiva.
+- Duration e convexidade efetivas: choques paralelos de ±1 bp.
+- Cenários: paralelos, steepener/flattener e choques históricos medidos na
+  própria curva ajustada (variação das taxas zero entre duas datas).
+
+Preços por 100 de face (preço sujo: sem separar juros acumulados); os fluxos
+são contados para trás a partir do vencimento (o último cupom cai no vencimento).
+
+Carteiras grandes (cenários x títulos x fluxos acima do custo mínimo de
+pag.compute) são reprecificadas no pool de processos, fora da thread da sessão.
+"""
+
+import numpy as np
+import pandas as pd
+
+from pag import compute
+
+# Vértices (anos) das key-rate durations e dos choques de cenário
+KEY_RATES = np.array([0.25, 0.5, 1, 2, 3, 5, 7, 10, 20, 30])
+BUMP_BPS = 1.0
+REPRICE_SECONDS_PER_CELL = 20e-9  # Custo por célula cenário x título x fluxo, para pag.compute (calibrado com benchmarks/bench_compute.py)
+
+BOND_COLUMNS = ["Título", "Nominal", "Cupom (%)", "Vencimento", "Frequência", "Spread (bps)"]
+BOND_FREQUENCIES = [1, 2, 4, 12]
+
+# Janelas históricas (início, fim) cuja variação da curva ajustada vira cenário, por mercado
+HISTORICAL_SHOCKS = {
+    "US": {"Taper Tantrum (mai-set/2013)": ("2013-05-01", "2013-09-05"), "Covid (fev-mar/2020)": ("2020-02-19", "2020-03-09"),
+           "Aperto do Fed (2022)": ("2022-01-03", "2022-10-21"), "Crise SVB (mar/2023)": ("2023-03-08", "2023-03-17")},
+    "BR": {"Joesley Day (mai/2017)": ("2017-05-17", "2017-05-18"), "Greve dos caminhoneiros (2018)": ("2018-05-18", "2018-06-14"),
+           "Covid (fev-mar/2020)": ("2020-02-19", "2020-03-18"), "Risco fiscal (nov-dez/2024)": ("2024-11-26", "2024-12-18")},
+}
+WORST_SHOCK_HORIZON = 21  # Pregões do "pior choque histórico" (maior alta média das taxas na janela)
+
+
+# --- FLUXOS ---
+def cashflow_grid(coupons, years, freqs):
+    """
+    Fluxos por 100 de face de N títulos: matrizes N x K de tempos (anos) e valores.
+    coupons em decimal, years até o vencimento e freqs (pagamentos por ano), um valor por título.
+    """
+    coupons, years, freqs = (np.asarray(a, dtype=float) for a in (coupons, years, freqs))
+    periods = np.maximum(np.ceil(years * freqs - 1e-9).astype(int), 1)
+    k = np.arange(1, periods.max() + 1)[None, :]
+    alive = k <= periods[:, None]
+    # Posições após o vencimento: fluxo zero em um prazo qualquer positivo (mantém as taxas finitas)
+    times = np.where(alive, years[:, None] - (periods[:, None] - k) / freqs[:, None], 1.0)
+    flows = np.where(alive, 100 * coupons[:, None] / freqs[:, None], 0.0)
+    flows[np.arange(len(periods)), periods - 1] += 100
+    return times, flows
+
+
+def interpolation_weights(times, keys=KEY_RATES):
+    """Matriz (prazos x vértices) da interpolação linear, constante fora da faixa: choque(t) = W @ choque(vértices)."""
+    t = np.clip(np.ravel(times), keys[0], keys[-1])
+    i = np.clip(np.searchsorted(keys, t, side="right") - 1, 0, len(keys) - 2)
+    w = (t - keys[i]) / (keys[i + 1] - keys[i])
+    W = np.zeros((len(t), len(keys)))
+    rows = np.arange(len(t))
+    W[rows, i] = 1 - w
+    W[rows, i + 1] += w
+    return W
+
+
+# --- CENÁRIOS (bps nos vértices de KEY_RATES) ---
+def standard_scenarios(size_bps=100.0):
+    """Choques paralelos (±), steepener e flattener (rotação linear no log do prazo, pivô no meio da curva)."""
+    tilt = np.interp(np.log(KEY_RATES), np.log(KEY_RATES[[0, -1]]), [-0.5, 0.5]) * size_bps
+    return pd.DataFrame({f"Paralelo +{size_bps:g} bps": np.full(len(KEY_RATES), size_bps), f"Paralelo -{size_bps:g} bps": np.full(len(KEY_RATES), -size_bps),
+                         "Steepener": tilt, "Flattener": -tilt}, index=pd.Index(KEY_RATES, name="Prazo (anos)")).T
+
+def historical_scenarios(curve, market):
+    """Variação (bps) da curva ajustada nas janelas de HISTORICAL_SHOCKS e o pior choque de WORST_SHOCK_HORIZON pregões."""
+    scenarios = {}
+    for name, (start, end) in HISTORICAL_SHOCKS.get(market, {}).items():
+        if pd.Timestamp(start) < curve.dates[0] or pd.Timestamp(end) > curve.dates[-1]: continue
+        rates = curve.zero_rates(KEY_RATES, [start, end]).to_numpy()
+        scenarios[name] = (rates[1] - rates[0]) * 100
+    history = curve.zero_rates(KEY_RATES)
+    changes = history.diff(WORST_SHOCK_HORIZON).dropna() * 100
+    if not changes.empty:
+        worst = changes.mean(axis=1).idxmax()
+        scenarios[f"Pior choque de {WORST_SHOCK_HORIZON} pregões (até {worst:%d/%m/%Y})"] = changes.loc[worst].to_numpy()
+    return pd.DataFrame(scenarios, index=pd.Index(KEY_RATES, name="Prazo (anos)")).T
+
+
+# --- CARTEIRA INFORMADA ---
+def validate_bonds(bonds):
+    """
+    Separa os títulos utilizáveis dos inválidos (sem título, nominal ou vencimento, cupom ausente ou
+    negativo, frequência fora de BOND_FREQUENCIES): devolve (válidos, inválidos com a coluna "Problema").
+    Sem a coluna de spread, ele é zero; sem alguma das outras colunas, ValueError.
+    """
+    bonds = bonds.dropna(how="all").copy()
+    if "Spread (bps)" not in bonds.columns: bonds["Spread (bps)"] = 0.0
+    missing = [c for c in BOND_COLUMNS if c not in bonds.columns]
+    if missing: raise ValueError("Colunas ausentes: " + ", ".join(missing))
+    for column in ("Nominal", "Cupom (%)", "Frequência", "Spread (bps)"): bonds[column] = pd.to_numeric(bonds[column], errors="coerce")
+    bonds["Vencimento"] = pd.to_datetime(bonds["Vencimento"], errors="coerce")
+    bonds["Spread (bps)"] = bonds["Spread (bps)"].fillna(0.0)
+    checks = pd.DataFrame({
+        "sem título": bonds["Título"].isna() | bonds["Título"].astype(str).str.strip().eq(""),
+        "nominal inválido": ~(bonds["Nominal"] > 0), "sem vencimento": bonds["Vencimento"].isna(),
+        "cupom inválido": ~(bonds["Cupom (%)"] >= 0), "frequência inválida": ~bonds["Frequência"].isin(BOND_FREQUENCIES),
+    })
+    problems = checks.apply(lambda row: ", ".join(label for label, bad in row.items() if bad), axis=1) if not bonds.empty else pd.Series(dtype=str)
+    ok = problems.eq("")
+    return bonds[ok].reset_index(drop=True), bonds[~ok].assign(Problema=problems[~ok])
+
+
+# --- REPRECIFICAÇÃO ---
+def _prices(times, flows, freqs, base, shocks):
+    """Preços S x N: base (N x K, decimal) + choques (S x N x K, decimal), capitalização na frequência de cada título."""
+    f = np.asarray(freqs, dtype=float)[None, :, None]
+    discount = (1 + (base[None] + shocks) / f) ** (-f * times[None])
+    return (flows[None] * discount).sum(axis=2)
+
+def reprice(times, flows, freqs, base, shocks_bps):
+    """Preços S x N de todos os títulos em todos os cenários (choques em bps nos vértices de KEY_RATES)."""
+    n_bonds, n_flows = times.shape
+    shocks = (shocks_bps @ interpolation_weights(times).T).reshape(len(shocks_bps), n_bonds, n_flows) / 10_000
+    return _prices(times, flows, freqs, base, shocks)
+
+def curve_risk(curve, bonds, scenarios=None, date=None):
+    """
+    Risco de curva de uma carteira (DataFrame com BOND_COLUMNS) na data pedida (padrão: a mais recente da curva).
+    Devolve {"bonds": preço, valor, DV01, duration e convexidade por título, "krd": key-rate durations
+    (títulos x vértices), "pnl": P&L (na moeda do nominal) por título x cenário}.
+    """
+    date = curve.dates[-1] if date is None else pd.Timestamp(date)
+    years = (pd.to_datetime(bonds["Vencimento"]) - date).dt.days.to_numpy() / 365.25
+    valid = years > 0
+    bonds, years = bonds[valid].reset_index(drop=True), years[valid]
+    if bonds.empty: return {"bonds": pd.DataFrame(), "krd": pd.DataFrame(), "pnl": pd.DataFrame()}
+    freqs = bonds["Frequência"].to_numpy(dtype=float)
+    times, flows = cashflow_grid(bonds["Cupom (%)"].to_numpy(dtype=float) / 100, years, freqs)
+    n_bonds, n_flows = times.shape
+
+    # Taxa zero de cada fluxo (+ spread do título) em decimal
+    zero = curve.zero_rates(times.ravel(), [date]).to_numpy()[0].reshape(n_bonds, n_flows) / 100
+    base = zero + bonds["Spread (bps)"].fillna(0).to_numpy(dtype=float)[:, None] / 10_000
+
+    # Cenários: base, ±1 bp paralelo, ±1 bp em cada vértice e os cenários pedidos, todos em uma reprecificação
+    n_keys = len(KEY_RATES)
+    bumps = np.vstack([np.zeros(n_keys), np.full(n_keys, BUMP_BPS), np.full(n_keys, -BUMP_BPS), np.eye(n_keys) * BUMP_BPS, -np.eye(n_keys) * BUMP_BPS])
+    scenarios = scenarios if scenarios is not None else standard_scenarios()
+    shocks_bps = np.vstack([bumps, scenarios.to_numpy(dtype=float)]) if len(scenarios) else bumps
+    prices = compute.run(reprice, times, flows, freqs, base, shocks_bps, cost=len(shocks_bps) * times.size * REPRICE_SECONDS_PER_CELL)
+
+    p0, up, down = prices[0], prices[1], prices[2]
+    dy = BUMP_BPS / 10_000
+    krd = (prices[3 + n_keys:3 + 2 * n_keys] - prices[3:3 + n_keys]) / (2 * dy * p0)
+    position = bonds["Nominal"].to_numpy(dtype=float) / 100
+    summary = pd.DataFrame({
+        "Título": bonds["Título"], "Prazo (anos)": years, "Preço": p0, "Valor": p0 * position,
+        "Duration Efetiva": (down - up) / (2 * dy * p0), "Convexidade": (up + down - 2 * p0) / (dy ** 2 * p0),
+        "DV01": (down - up) / 2 * position,
+    })
+    labels = pd.Index(bonds["Título"], name="Título")
+    pnl = pd.DataFrame(((prices[3 + 2 * n_keys:] - p0) * position).T, index=labels, columns=scenarios.index)
+    return {"bonds": summary, "krd": pd.DataFrame(krd.T, index=labels, columns=pd.Index(KEY_RATES, name="Prazo (anos)")), "pnl": pnl}
+
+def portfolio_totals(risk):
+    """Duration, convexidade e KRDs da carteira (ponderadas pelo valor de mercado), DV01 e P&L totais."""
+    bonds = risk["bonds"]
+    weights = bonds["Valor"].to_numpy() / bonds["Valor"].sum()
+    return {
+        "Valor": bonds["Valor"].sum(), "DV01": bonds["DV01"].sum(),
+        "Duration Efetiva": float(weights @ bonds["Duration Efetiva"].to_numpy()), "Convexidade": float(weights @ bonds["Convexidade"].to_numpy()),
+        "krd": pd.Series(weights @ risk["krd"].to_numpy(), index=risk["krd"].columns), "pnl": risk["pnl"].sum(),
+    }
+
+
+# --- CARTEIRA DE EXEMPLO ---
+def sample_portfolio(market="US", today=None):
+    """Carteira ilustrativa (títulos públicos e corporativos) para a tela de risco de curva."""
+    today = pd.Timestamp(today or pd.Timestamp.today().normalize())
+    if market == "BR":
+        rows = [("LTN 2 anos", 1_000_000, 0.0, 2, 1, 0), ("NTN-F 5 anos", 2_000_000, 10.0, 5, 2, 0), ("NTN-F 10 anos", 1_500_000, 10.0, 10, 2, 0), ("Debênture 7 anos", 800_000, 12.5, 7, 2, 150)]
+    else:
+        rows = [("UST 2Y", 1_000_000, 4.0, 2, 2, 0), ("UST 5Y", 2_000_000, 4.0, 5, 2, 0), ("UST 10Y", 1_500_000, 4.25, 10, 2, 0), ("UST 30Y", 500_000, 4.5, 30, 2, 0), ("Corp BBB 7Y", 800_000, 5.5, 7, 2, 150)]
+    return pd.DataFrame([(name, nominal, coupon, today + pd.DateOffset(years=years), freq, spread) for name, nominal, coupon, years, freq, spread in rows], columns=BOND_COLUMNS)
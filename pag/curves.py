@@ -0,0 +1,299 @@
+# pag/curves.py
+"""
+Motor de curvas de juros: histórico diário por vértice e curvas ajustadas
+para todas as datas de uma vez.
+
+O histórico de cada vértice (FRED para os EUA, SGS com atualização
+incremental para o Brasil) vem do cache persistente de pag.providers. Sobre o painel datas x prazos (em anos)
+a curva de cada data é ajustada por um de dois métodos, sempre vetorizado
+entre as datas:
+
+- "nss" (Nelson-Siegel-Svensson): com os τ fixos o modelo é linear nos β, então
+  cada par (τ1, τ2) de uma grade é resolvido por mínimos quadrados para todas
+  as datas em uma única chamada, e cada data fica com o par de menor erro.
+  Com menos de 6 vértices observados a data usa Nelson-Siegel (3 fatores).
+- "spline": Hermite cúbico monotônico (PCHIP) sobre os vértices, sem
+  oscilações entre eles e com extrapolação constante fora da faixa.
+
+As taxas dos vértices (par yields do Tesouro, taxas pré do SGS) são tratadas
+como taxas zero em % a.a. A curva responde taxas zero, fatores de desconto e
+spreads (ex: 10A - 2A) para prazos arbitrários em qualquer data.
+
+O painel montado (curve_panel) e as curvas ajustadas sobre ele (load_curve)
+também ficam inteiros no cache persistente: as páginas leem um único arquivo e tiram dele, por recorte e aritmética
+vetorizada, as curvas em qualquer data, a superfície datas x prazos, as séries
+de inclinação e curvatura e os sinais de inversão.
+"""
+
+import numpy as np
+import pandas as pd
+
+from pag import freshness, providers
+from pag.cache import DATA_CACHE, MISS
+from pag.registry import BR_CURVE_HISTORY_START, BR_CURVE_TENORS, CURVE_HISTORY_START, CURVE_MATURITIES, US_CURVE_TENORS
+
+MARKETS = {
+    "US": {"source": "fred", "tenors": US_CURVE_TENORS, "start": CURVE_HISTORY_START},
+    "BR": {"source": "bcb", "tenors": BR_CURVE_TENORS, "start": BR_CURVE_HISTORY_START},
+}
+
+# Grade de τ (anos) do Nelson-Siegel-Svensson; τ2 > τ1 para separar as duas corcovas
+NSS_TAU_GRID = [(t1, t2) for t1 in (0.25, 0.5, 1.0, 1.5, 2.0, 3.0, 5.0) for t2 in (3.0, 5.0, 7.5, 10.0, 15.0, 20.0) if t2 > t1]
+NSS_PARAMS = ["β0", "β1", "β2", "β3", "τ1", "τ2"]
+
+# Spreads de inclinação (longo, curto) e borboleta (curto, médio, longo) de cada mercado, em anos
+CURVE_SPREADS = {"US": {"10A - 2A": (10, 2), "10A - 3M": (10, 0.25), "2A - 3M": (2, 0.25)}, "BR": {"5A - 2A": (5, 2), "10A - 1A": (10, 1)}}
+CURVE_BUTTERFLY = {"US": (2, 5, 10), "BR": (1, 3, 10)}
+
+# Prazos (anos) usados para desenhar curvas ajustadas
+PLOT_MATURITIES = np.round(np.concatenate([np.arange(1, 12) / 12, np.arange(1, 30.5, 0.5)]), 4)
+
+
+# --- HISTÓRICO DOS VÉRTICES ---
+def curve_history(market="US", tenors=None, max_age=providers.SCHEDULED):
+    """Painel diário datas x prazos (anos) com as taxas (%) de cada vértice; vértices indisponíveis são omitidos."""
+    spec = MARKETS[market]
+    tenors = {name: code for name, code in spec["tenors"].items() if tenors is None or name in tenors}
+    columns = {}
+    for name, code in tenors.items():
+        try:
+            if spec["source"] == "fred": series = providers.fetch_fred_series(code, spec["start"], max_age)
+            else: series = providers.fetch_bcb_incremental(code, spec["start"], max_age)
+        except Exception: continue
+        if series is not None and not series.dropna().empty: columns[CURVE_MATURITIES[name]] = series
+    if not columns: return pd.DataFrame()
+    panel = pd.DataFrame(columns).sort_index(axis=1).astype(float).dropna(how="all")
+    panel.columns.name = "Prazo (anos)"
+    return panel
+
+def _tenor_key(market, code):
+    # Mesma chave usada por providers.fetch_fred_series / fetch_bcb_incremental para o histórico do vértice
+    spec = MARKETS[market]
+    if spec["source"] == "fred": return ("fred", code, providers.resolve_start(spec["start"]))
+    return ("bcb_incremental", int(code), providers.resolve_start(spec["start"]))
+
+def curve_panel(market="US", max_age=providers.SCHEDULED):
+    """
+    Painel completo do mercado (ver curve_history), gravado inteiro no cache persistente: uma
+    leitura em vez de uma por vértice. É remontado quando algum vértice é mais novo que ele
+    (ex: depois do warm-up, que atualiza os vértices em paralelo) ou, com a agenda
+    (max_age=SCHEDULED), quando algum vértice tem um pregão novo a buscar.
+    """
+    spec = MARKETS[market]
+    key = ("curve_panel", market, providers.resolve_start(spec["start"]), tuple(spec["tenors"].values()))
+    panel_age = DATA_CACHE.age(key)
+    tenor_keys = [_tenor_key(market, code) for code in spec["tenors"].values()]
+    tenor_ages = [DATA_CACHE.age(tenor_key) for tenor_key in tenor_keys]
+    if max_age == providers.SCHEDULED: current = not any(age is not None and freshness.refresh_due(k) for k, age in zip(tenor_keys, tenor_ages))
+    else: current = panel_age is not None and panel_age <= max_age
+    if panel_age is not None and current and all(age is None or age >= panel_age for age in tenor_ages):
+        cached = DATA_CACHE.get(key)
+        if cached is not MISS: return cached
+    panel = curve_history(market, max_age=max_age)
+    if not panel.empty: DATA_CACHE.set(key, panel)
+    return panel
+
+def latest_table(panel, labels=None):
+    """Último valor de cada vértice (cada um na sua data mais recente) no formato Prazo/Taxa (%) das páginas."""
+    names = {maturity: name for name, maturity in CURVE_MATURITIES.items() if labels is None or name in labels}
+    last = panel[[m for m in panel.columns if m in names]].ffill().iloc[-1].dropna() if not panel.empty else pd.Series(dtype=float)
+    if last.empty: return pd.DataFrame()
+    order = [names[m] for m in sorted(names)]
+    return pd.DataFrame({"Prazo": pd.Categorical([names[m] for m in last.index], categories=order, ordered=True), "Taxa (%)": last.to_numpy(), "Prazo (anos)": last.index.to_numpy(dtype=float)})
+
+
+# --- NELSON-SIEGEL-SVENSSON ---
+def _nss_loadings(maturities, tau1, tau2):
+    """Cargas dos 4 fatores (nível, inclinação, curvatura 1 e 2). Aceita τ por data (broadcast)."""
+    x1, x2 = maturities / tau1, maturities / tau2
+    slope1, slope2 = (1 - np.exp(-x1)) / x1, (1 - np.exp(-x2)) / x2
+    return np.ones_like(x1), slope1, slope1 - np.exp(-x1), slope2 - np.exp(-x2)
+
+def fit_nss(panel, tau_grid=NSS_TAU_GRID):
+    """Parâmetros NSS de cada data (colunas NSS_PARAMS) e o RMSE do ajuste em pontos percentuais."""
+    maturities = panel.columns.to_numpy(dtype=float)
+    Y = panel.to_numpy(dtype=float)
+    observed = ~np.isnan(Y)
+    params = np.full((len(Y), 6), np.nan)
+    best_sse = np.full(len(Y), np.inf)
+    # Datas com o mesmo conjunto de vértices observados compartilham a matriz de regressão
+    patterns, inverse = np.unique(observed, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    groups = [(mask, np.flatnonzero(inverse == p)) for p, mask in enumerate(patterns)]
+    for tau1, tau2 in tau_grid:
+        X = np.column_stack(_nss_loadings(maturities, tau1, tau2))
+        for mask, rows in groups:
+            n_obs = int(mask.sum())
+            n_factors = 4 if n_obs >= 6 else 3 if n_obs >= 3 else 0
+            if not n_factors: continue
+            Xp, Yp = X[mask, :n_factors], Y[np.ix_(rows, np.flatnonzero(mask))]
+            coef = np.linalg.lstsq(Xp, Yp.T, rcond=None)[0].T
+            sse = ((Yp - coef @ Xp.T) ** 2).sum(axis=1)
+            better = sse < best_sse[rows]
+            target = rows[better]
+            best_sse[target] = sse[better]
+            params[target, :4] = 0.0
+            params[target, :n_factors] = coef[better]
+            params[target, 4:] = (tau1, tau2)
+    rmse = np.sqrt(best_sse / np.maximum(observed.sum(axis=1), 1))
+    result = pd.DataFrame(params, index=panel.index, columns=NSS_PARAMS)
+    result["RMSE"] = np.where(np.isfinite(best_sse), rmse, np.nan)
+    return result
+
+def nss_rates(params, maturities):
+    """Taxas (%) do NSS: uma linha por data de `params`, uma coluna por prazo."""
+    p = params[NSS_PARAMS].to_numpy(dtype=float)
+    m = np.asarray(maturities, dtype=float)[None, :]
+    level, slope, curve1, curve2 = _nss_loadings(m, p[:, 4:5], p[:, 5:6])
+    return p[:, 0:1] * level + p[:, 1:2] * slope + p[:, 2:3] * curve1 + p[:, 3:4] * curve2
+
+
+# --- SPLINE MONOTÔNICA (PCHIP) ---
+def _pchip_slopes(x, Y):
+    """Derivadas nos nós pelo método de Fritsch-Carlson, para todas as linhas de Y ao mesmo tempo."""
+    h = np.diff(x)
+    delta = np.diff(Y, axis=1) / h
+    D = np.zeros_like(Y)
+    if len(x) == 2:
+        D[:] = delta
+        return D
+    w1, w2 = 2 * h[1:] + h[:-1], h[1:] + 2 * h[:-1]
+    same_sign = delta[:, :-1] * delta[:, 1:] > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        D[:, 1:-1] = np.where(same_sign, (w1 + w2) / (w1 / delta[:, :-1] + w2 / delta[:, 1:]), 0.0)
+
+    def edge(h0, h1, d0, d1):
+        d = ((2 * h0 + h1) * d0 - h0 * d1) / (h0 + h1)
+        d = np.where(np.sign(d) != np.sign(d0), 0.0, d)
+        return np.where((np.sign(d0) != np.sign(d1)) & (np.abs(d) > 3 * np.abs(d0)), 3 * d0, d)
+    D[:, 0] = edge(h[0], h[1], delta[:, 0], delta[:, 1])
+    D[:, -1] = edge(h[-1], h[-2], delta[:, -1], delta[:, -2])
+    return D
+
+def pchip_rates(x, Y, D, maturities):
+    """Avalia as splines (uma por linha de Y) nos prazos pedidos; fora dos vértices a taxa é constante."""
+    t = np.clip(np.asarray(maturities, dtype=float), x[0], x[-1])
+    i = np.clip(np.searchsorted(x, t, side="right") - 1, 0, len(x) - 2)
+    h = (x[i + 1] - x[i])
+    s = (t - x[i]) / h
+    h00, h10, h01, h11 = 2 * s**3 - 3 * s**2 + 1, s**3 - 2 * s**2 + s, -2 * s**3 + 3 * s**2, s**3 - s**2
+    return h00 * Y[:, i] + h10 * h * D[:, i] + h01 * Y[:, i + 1] + h11 * h * D[:, i + 1]
+
+
+# --- CURVA AJUSTADA ---
+class YieldCurve:
+    """Curvas ajustadas de todas as datas de um painel (datas x prazos em anos, taxas em %)."""
+
+    def __init__(self, panel, method="nss"):
+        if method not in ("nss", "spline"): raise ValueError(f"Método de curva desconhecido: {method}")
+        panel = panel.sort_index().sort_index(axis=1)
+        panel = panel[panel.notna().sum(axis=1) >= (3 if method == "nss" else 2)]
+        self.method, self.observed, self.dates = method, panel, panel.index
+        self.maturities = panel.columns.to_numpy(dtype=float)
+        if method == "nss":
+            self.params = fit_nss(panel)
+        else:
+            # Vértices ausentes em uma data: interpolação linear entre os vizinhos antes da spline
+            filled = panel.interpolate(method="index", axis=1, limit_direction="both")
+            self._Y = filled.to_numpy(dtype=float)
+            self._D = _pchip_slopes(self.maturities, self._Y)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def _rows(self, dates):
+        if dates is None: return np.arange(len(self.dates))
+        single = np.ndim(dates) == 0
+        positions = self.dates.searchsorted(pd.DatetimeIndex([dates] if single else dates), side="right") - 1
+        return np.clip(positions, 0, len(self.dates) - 1)
+
+    def _rates(self, rows, maturities):
+        if self.method == "nss": return nss_rates(self.params.iloc[rows], maturities)
+        return pchip_rates(self.maturities, self._Y[rows], self._D[rows], maturities)
+
+    def zero_rates(self, maturities, dates=None):
+        """Taxas zero (% a.a.) nos prazos pedidos (anos): uma linha por data (a última data em ou antes de cada data pedida)."""
+        maturities = np.atleast_1d(np.asarray(maturities, dtype=float))
+        rows = self._rows(dates)
+        return pd.DataFrame(self._rates(rows, maturities), index=self.dates[rows], columns=pd.Index(maturities, name="Prazo (anos)"))
+
+    def zero_rate(self, maturity, date=None):
+        """Taxa zero (% a.a.) de um prazo em uma data (padrão: a mais recente)."""
+        rows = self._rows(self.dates[-1] if date is None else date)
+        return float(self._rates(rows, np.array([float(maturity)]))[0, 0])
+
+    def discount_factors(self, maturities, date=None, spread=0.0, freq=1):
+        """Fatores de desconto de uma data com a taxa zero + spread (decimal), capitalizada `freq` vezes ao ano."""
+        maturities = np.atleast_1d(np.asarray(maturities, dtype=float))
+        rows = self._rows(self.dates[-1] if date is None else date)
+        rates = self._rates(rows, maturities)[0] / 100 + spread
+        return (1 + rates / freq) ** (-freq * maturities)
+
+    def spread(self, long, short):
+        """Série histórica do spread entre dois prazos (p.p.), ex: spread(10, 2) = 2s10s."""
+        rates = self._rates(np.arange(len(self.dates)), np.array([float(long), float(short)]))
+        return pd.Series(rates[:, 0] - rates[:, 1], index=self.dates, name=f"{long:g}A - {short:g}A")
+
+    def history_frames(self, freq="ME", maturities=PLOT_MATURITIES, periods=None):
+        """Curvas ajustadas no último dia de cada período (formato longo: Data, Prazo (anos), Taxa (%)), para animações."""
+        anchors = pd.Series(np.arange(len(self.dates)), index=self.dates).resample(freq).last().dropna().astype(int)
+        if periods: anchors = anchors.iloc[-periods:]
+        rates = pd.DataFrame(self._rates(anchors.to_numpy(), maturities), index=self.dates[anchors.to_numpy()], columns=pd.Index(maturities, name="Prazo (anos)"))
+        frames = rates.rename_axis("Data").stack().rename("Taxa (%)").reset_index()
+        frames["Data"] = frames["Data"].dt.strftime("%Y-%m-%d")
+        return frames
+
+
+def _panel_version(panel):
+    return (str(panel.index[-1]), panel.shape, float(np.nansum(panel.iloc[-1].to_numpy(dtype=float))))
+
+def load_curve(market="US", method="nss", max_age=providers.SCHEDULED):
+    """
+    YieldCurve do histórico completo de um mercado ("US" ou "BR"); None se não houver dados.
+    As curvas ajustadas ficam no cache persistente (uma entrada por mercado e método) e só
+    são reajustadas quando o painel muda, ex: depois do warm-up.
+    """
+    panel = curve_panel(market, max_age)
+    if panel.empty: return None
+    key, version = ("yield_curve", market, method), _panel_version(panel)
+    stored = DATA_CACHE.get(key)
+    if stored is not MISS and stored["version"] == version: return stored["curve"]
+    curve = YieldCurve(panel, method)
+    DATA_CACHE.set(key, {"version": version, "curve": curve})
+    return curve
+
+
+# --- FORMA DA CURVA (recortes do painel) ---
+def curve_snapshot(panel, date):
+    """Vértices observados em uma data: o último valor de cada vértice até ela (None se a data for anterior ao painel)."""
+    history = panel.loc[:pd.Timestamp(date)]
+    if history.empty: return None
+    return history.tail(10).ffill().iloc[-1].rename(history.index[-1])
+
+def curve_surface(panel, freq="W"):
+    """Superfície datas x prazos (último valor de cada período) para o gráfico 3D."""
+    return panel.resample(freq).last().ffill().dropna(how="all")
+
+def shape_metrics(panel, market="US"):
+    """Séries diárias de nível (média dos vértices), spreads de inclinação (p.p.) e curvatura (borboleta) do mercado."""
+    filled = panel.ffill(limit=5)  # Feriados de um só vértice não abrem buracos nos spreads
+    metrics = {"Nível": filled.mean(axis=1)}
+    for name, (long, short) in CURVE_SPREADS[market].items():
+        if long in filled.columns and short in filled.columns: metrics[name] = filled[long] - filled[short]
+    short, mid, long = CURVE_BUTTERFLY[market]
+    if {short, mid, long} <= set(filled.columns): metrics["Curvatura"] = 2 * filled[mid] - filled[short] - filled[long]
+    return pd.DataFrame(metrics).dropna(how="all")
+
+def inversion_flags(metrics, market="US"):
+    """True nos dias em que cada spread de inclinação do mercado está negativo (curva invertida naquele trecho)."""
+    spreads = [name for name in CURVE_SPREADS[market] if name in metrics.columns]
+    return metrics[spreads].lt(0).where(metrics[spreads].notna())
+
+def inversion_episodes(flags):
+    """Períodos contínuos de inversão de uma série de sinais: Início, Fim e Dias (pregões)."""
+    flags = flags.dropna().astype(bool)
+    runs = flags.ne(flags.shift()).cumsum()[flags]
+    if runs.empty: return pd.DataFrame(columns=["Início", "Fim", "Dias"])
+    dates = runs.index.to_series()
+    episodes = dates.groupby(runs.to_numpy()).agg(["first", "last", "size"])
+    return episodes.set_axis(["Início", "Fim", "Dias"], axis=1).reset_index(drop=True)
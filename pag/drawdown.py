@@ -0,0 +1,107 @@
+# pag/drawdown.py
+"""
+Análise de drawdowns (curva "underwater", drawdown máximo, duração e recuperação).
+
+Tudo é calculado em uma única passada por série com máximos acumulados
+(np.fmax.accumulate) e operado sobre o painel inteiro de uma vez, então o
+custo é O(T) por série mesmo com centenas de colunas.
+"""
+
+import numpy as np
+import pandas as pd
+
+SUMMARY_FORMATS = {
+    "Drawdown Máximo": "{:.2%}", "Drawdown Atual": "{:.2%}", "Duração da Queda (dias)": "{:.0f}",
+    "Tempo de Recuperação (dias)": "{:.0f}", "Maior Período Submerso (dias)": "{:.0f}",
+}
+EPISODE_FORMATS = {"Drawdown": "{:.2%}", "Duração da Queda (dias)": "{:.0f}", "Tempo de Recuperação (dias)": "{:.0f}"}
+
+
+def _as_frame(values):
+    return values.to_frame() if isinstance(values, pd.Series) else values
+
+def underwater(values):
+    """Curva underwater (queda em relação ao pico anterior) de uma série ou de cada coluna de um painel."""
+    filled = values.ffill()
+    return filled / filled.cummax() - 1
+
+
+def _kernels(values):
+    """Arrays do painel: drawdown, último pico até cada data e próximo pico a partir de cada data."""
+    filled = values.ffill().to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dd = filled / np.fmax.accumulate(filled, axis=0) - 1
+    n = len(dd)
+    rows = np.arange(n)[:, None]
+    at_peak = dd == 0
+    last_peak = np.maximum.accumulate(np.where(at_peak, rows, -1), axis=0)
+    next_peak = np.minimum.accumulate(np.where(at_peak, rows, n)[::-1], axis=0)[::-1]
+    return dd, last_peak, next_peak
+
+
+def drawdown_summary(values):
+    """
+    Uma linha por série: drawdown máximo, datas de pico/vale/recuperação, duração da queda,
+    tempo de recuperação, maior período submerso e drawdown atual. Séries que não
+    recuperaram o pico têm recuperação vazia (NaT/NaN).
+    """
+    values = _as_frame(values).dropna(axis=1, how="all")
+    columns = ["Drawdown Máximo", "Pico", "Vale", "Recuperação", "Duração da Queda (dias)",
+               "Tempo de Recuperação (dias)", "Maior Período Submerso (dias)", "Drawdown Atual"]
+    if values.empty: return pd.DataFrame(columns=columns)
+
+    index = values.index
+    dd, last_peak, next_peak = _kernels(values)
+    cols = np.arange(dd.shape[1])
+    trough = np.argmin(np.where(np.isnan(dd), np.inf, dd), axis=0)
+    peak, recovery = last_peak[trough, cols], next_peak[trough, cols]
+    recovered = recovery < len(index)
+
+    naive = index.tz_convert(None) if getattr(index, "tz", None) is not None else index
+    days = naive.values.astype("datetime64[D]").astype(np.int64)
+    # Dias corridos desde o último pico, para cada data e série (datas antes do início da série não contam)
+    submerged = np.where((last_peak >= 0) & ~np.isnan(dd), days[:, None] - days[np.clip(last_peak, 0, None)], 0)
+
+    peak_dates = pd.DatetimeIndex(index[np.clip(peak, 0, None)])
+    trough_dates = pd.DatetimeIndex(index[trough])
+    recovery_dates = pd.DatetimeIndex(index[np.clip(recovery, 0, len(index) - 1)]).where(recovered)
+    return pd.DataFrame({
+        "Drawdown Máximo": dd[trough, cols],
+        "Pico": peak_dates,
+        "Vale": trough_dates,
+        "Recuperação": recovery_dates,
+        "Duração da Queda (dias)": (trough_dates - peak_dates).days,
+        "Tempo de Recuperação (dias)": (recovery_dates - trough_dates).days,
+        "Maior Período Submerso (dias)": submerged.max(axis=0),
+        "Drawdown Atual": dd[-1],
+    }, index=values.columns)
+
+
+def drawdown_episodes(series, top_n=5):
+    """Os top_n maiores episódios de drawdown de uma série (pico, vale, recuperação e durações)."""
+    columns = ["Pico", "Vale", "Recuperação", "Drawdown", "Duração da Queda (dias)", "Tempo de Recuperação (dias)"]
+    series = series.dropna()
+    if series.empty: return pd.DataFrame(columns=columns)
+    dd = (series / series.cummax() - 1).to_numpy()
+    index = series.index
+
+    # Cada episódio é um trecho contíguo abaixo do pico: começa na saída do pico e termina na volta a ele
+    under = dd < 0
+    starts = np.flatnonzero(under & ~np.r_[False, under[:-1]])
+    ends = np.flatnonzero(under & ~np.r_[under[1:], False])
+    if not len(starts): return pd.DataFrame(columns=columns)
+    # Fora dos episódios o drawdown é zero, então o mínimo entre dois inícios é o vale do episódio
+    episode_min = np.minimum.reduceat(dd, starts)
+
+    rows = []
+    for i in np.argsort(episode_min)[:top_n]:
+        s, e = starts[i], ends[i]
+        t = s + np.argmin(dd[s:e + 1])
+        recovery = index[e + 1] if e + 1 < len(index) else pd.NaT
+        peak = index[s - 1] if s > 0 else index[s]
+        rows.append({
+            "Pico": peak, "Vale": index[t], "Recuperação": recovery, "Drawdown": dd[t],
+            "Duração da Queda (dias)": (index[t] - peak).days,
+            "Tempo de Recuperação (dias)": (recovery - index[t]).days if pd.notna(recovery) else np.nan,
+        })
+    return pd.DataFrame(rows, columns=columns)
@@ -0,0 +1,82 @@
+# pag/etf.py
+"""
+Comparação e ranking de ETFs (sem dependência do Streamlit).
+
+Os preços de todos os ETFs e benchmarks vêm de um único download em lote
+(providers.fetch_market_data) e o cadastro de cada fundo de buscas paralelas
+ao .info (providers.fetch_ticker_infos), ambos com cache persistente por ticker.
+"""
+
+import numpy as np
+import pandas as pd
+
+from pag import providers
+from pag.performance import trailing_returns
+from pag.registry import MARKET_HISTORY_START
+from pag.tracking import TRACKING_FORMATS, tracking_summary
+
+COMPARISON_WINDOW = "-6y"  # Um ano de folga para a janela de 5A ter âncora (recortada na leitura)
+# Limite de dias seguidos preenchidos no alinhamento (feriados locais, não ativos sem negociação)
+ALIGN_FILL_LIMIT = 5
+
+COMPARISON_FORMATS = {
+    "TER": "{:.2%}", "AUM (bi)": "{:,.2f}", "Retorno 1M": "{:.2%}", "Retorno YTD": "{:.2%}",
+    "Retorno 1A": "{:.2%}", "Retorno 3A (a.a.)": "{:.2%}", "Retorno 5A (a.a.)": "{:.2%}",
+    **TRACKING_FORMATS,
+}
+
+
+def benchmark_for(ticker):
+    """Benchmark de referência: Ibovespa para ativos brasileiros (.SA), S&P 500 para os demais."""
+    return "^BVSP" if ".SA" in ticker.upper() else "^GSPC"
+
+
+def align_prices(prices):
+    """Alinha o painel em um calendário comum (união das datas), preenchendo apenas lacunas curtas."""
+    return prices.sort_index().ffill(limit=ALIGN_FILL_LIMIT)
+
+
+def etf_comparison_table(prices, infos, benchmarks):
+    """
+    Tabela numérica de comparação: cadastro (TER, AUM), retornos por janela de calendário e
+    risco ativo (tracking error, information ratio, beta, capture) contra o benchmark de cada ETF.
+    - prices: painel de fechamentos contendo os ETFs e os benchmarks
+    - benchmarks: {etf: ticker do benchmark}
+    """
+    etfs = [t for t in benchmarks if t in prices.columns]
+    if not etfs: return pd.DataFrame(columns=["Nome", "Gestora", "Benchmark"] + list(COMPARISON_FORMATS))
+    aligned = align_prices(prices)
+    trailing = trailing_returns(aligned[etfs])
+
+    returns = aligned.pct_change(fill_method=None)
+    benchmark_returns = pd.DataFrame({etf: returns[benchmarks[etf]] if benchmarks[etf] in returns.columns else np.nan for etf in etfs}, index=returns.index)
+    stats = tracking_summary(returns[etfs], benchmark_returns)
+
+    info = pd.DataFrame.from_dict({t: infos.get(t, {}) for t in etfs}, orient="index")
+    info_col = lambda key: pd.to_numeric(info[key], errors="coerce") if key in info.columns else pd.Series(np.nan, index=etfs)
+    name_col = lambda key: info[key] if key in info.columns else pd.Series(None, index=etfs, dtype=object)
+    # O yfinance usa chaves diferentes para a taxa conforme o fundo
+    ter = info_col("annualReportExpenseRatio").fillna(info_col("netExpenseRatio") / 100)
+    table = pd.DataFrame({
+        "Nome": name_col("longName"),
+        "Gestora": name_col("fundFamily"),
+        "Benchmark": pd.Series(benchmarks)[etfs],
+        "TER": ter,
+        "AUM (bi)": info_col("totalAssets") / 1e9,  # Na moeda do fundo
+        "Retorno 1M": trailing[("Acumulado", "1M")],
+        "Retorno YTD": trailing[("Acumulado", "YTD")],
+        "Retorno 1A": trailing[("Acumulado", "1A")],
+        "Retorno 3A (a.a.)": trailing[("Anualizado", "3A")],
+        "Retorno 5A (a.a.)": trailing[("Anualizado", "5A")],
+    }, index=pd.Index(etfs, name="ETF"))
+    return table.join(stats)
+
+
+def load_etf_comparison(tickers, window=COMPARISON_WINDOW):
+    """Baixa preços (um lote, desde a data fixa do registro) e cadastros (em paralelo) e monta a tabela de comparação na janela pedida."""
+    tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t.strip()))
+    benchmarks = {t: benchmark_for(t) for t in tickers}
+    prices = providers.fetch_market_data(tickers + sorted(set(benchmarks.values())), MARKET_HISTORY_START)
+    if not prices.empty: prices = prices.loc[providers.resolve_start(window):]
+    infos = providers.fetch_ticker_infos(tickers)
+    return etf_comparison_table(prices, infos, benchmarks)
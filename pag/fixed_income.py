@@ -0,0 +1,65 @@
+# pag/fixed_income.py
+"""Cálculos de títulos de renda fixa: fluxos, preço teórico (taxa única ou curva), YTM e duration."""
+
+import numpy as np
+
+
+def calculate_bond_cashflows(face_value, coupon_rate, years_to_maturity, freq):
+    periods = int(np.floor(years_to_maturity * freq))
+    coupon_payment = (coupon_rate / freq) * face_value
+    cashflows = [coupon_payment] * periods
+    if periods > 0: cashflows[-1] += face_value
+    return cashflows
+
+
+def calculate_theoretical_price(cashflows, discount_rate, freq):
+    pv_sum = 0
+    for t, cf in enumerate(cashflows, 1):
+        pv_sum += cf / ((1 + discount_rate / freq) ** t)
+    return pv_sum
+
+
+def cashflow_times(cashflows, freq):
+    """Prazo (anos) de cada fluxo de calculate_bond_cashflows: um período de cupom após o outro."""
+    return np.arange(1, len(cashflows) + 1) / freq
+
+
+def calculate_curve_price(cashflows, discount_factors):
+    """Preço com cada fluxo descontado pelo fator da curva no seu prazo (ver YieldCurve.discount_factors)."""
+    return float(np.dot(np.asarray(cashflows, dtype=float), discount_factors))
+
+
+def calculate_ytm(price, face_value, coupon_rate, years_to_maturity, freq):
+    """Calcula o Yield to Maturity (YTM) de um título."""
+    import numpy_financial as npf  # Importação tardia: só é necessária na calculadora de títulos
+    try:
+        periods = years_to_maturity * freq
+        coupon_payment = (coupon_rate / freq) * face_value
+        cash_flows = [-coupon_payment] * int(periods)
+        cash_flows[-1] -= face_value
+        cash_flows = np.insert(cash_flows, 0, price)
+        ytm_period = npf.irr(cash_flows)
+        return ytm_period * freq
+    except (ValueError, TypeError):
+        return None
+
+
+def calculate_macaulay_duration(price, face_value, coupon_rate, ytm, years_to_maturity, freq):
+    """Calcula a Macaulay Duration de um título."""
+    if ytm is None:
+        return None
+    periods = int(years_to_maturity * freq)
+    coupon_payment = (coupon_rate / freq) * face_value
+    ytm_period = ytm / freq
+    pv_cash_flows = []
+    for t in range(1, periods + 1):
+        cf = coupon_payment
+        if t == periods:
+            cf += face_value
+        pv_cf = cf / ((1 + ytm_period) ** t)
+        pv_cash_flows.append(pv_cf)
+    duration = 0
+    for t in range(len(pv_cash_flows)):
+        weight = pv_cash_flows[t] / price
+        duration += weight * (t + 1)
+    return duration / freq
@@ -0,0 +1,168 @@
+# pag/freshness.py
+"""
+Agenda de atualização das séries pelo calendário de divulgação (em vez de um TTL fixo).
+
+Cada série guardada no cache persistente ganha uma ficha (também no cache, sob
+a chave ("freshness", chave da série)) com a última observação, a frequência e
+a defasagem típica de divulgação:
+
+- Frequência: a dos metadados do provedor (FRED: frequency_short), ou a inferida
+  pelo espaçamento mediano das datas do histórico (periods_per_year);
+- Defasagem: dias entre a data de uma observação e o momento em que ela apareceu
+  no provedor. Vem dos metadados do FRED na primeira carga (last_updated -
+  observation_end) e é reaprendida a cada observação nova detectada a tempo
+  (mediana das últimas LAG_SAMPLES).
+
+Com a ficha, a próxima divulgação plausível é a data da próxima observação (um
+pregão, uma semana, um mês...) mais a defasagem típica. Antes dela a cópia do
+cache vale, por mais velha que seja; depois dela o provedor é consultado a cada
+RECHECK_SECONDS da frequência até o dado novo aparecer. Uma série mensal passa
+a ser consultada poucas vezes por mês (e não 24 vezes por dia) e uma diária é
+consultada de hora em hora só quando já há um pregão novo a publicar.
+MAX_STALE_SECONDS é a rede de segurança para revisões de dados já publicados.
+"""
+
+import numpy as np
+import pandas as pd
+
+from pag.cache import DATA_CACHE, MISS
+
+# max_age dos provedores que delega a decisão a esta agenda
+SCHEDULED = "scheduled"
+
+# TTL do st.cache_data das páginas sobre buscas agendadas: a checagem da agenda é
+# barata (mtime + ficha), então a memória do processo pode expirar cedo
+PAGE_CACHE_TTL = 300
+
+FREQUENCY_LABELS = {252: "Diária", 52: "Semanal", 12: "Mensal", 4: "Trimestral", 1: "Anual"}
+# Códigos de frequência do FRED -> observações por ano (as intermediárias arredondam para a mais frequente)
+FRED_FREQUENCIES = {"D": 252, "W": 52, "BW": 52, "M": 12, "Q": 4, "SA": 4, "A": 1}
+
+# Defasagem (dias) assumida antes de aprender a da série, e folga descontada da aprendida
+DEFAULT_LAG_DAYS = {252: 1, 52: 3, 12: 0, 4: 0, 1: 0}
+LAG_MARGIN_DAYS = {252: 0.5, 52: 1, 12: 2, 4: 3, 1: 5}
+LAG_SAMPLES = 12
+# Intervalo entre consultas ao provedor depois que a divulgação já é plausível
+RECHECK_SECONDS = {252: 3600, 52: 3 * 3600, 12: 6 * 3600, 4: 12 * 3600, 1: 24 * 3600}
+# Dias além da divulgação esperada a partir dos quais a série é marcada como atrasada
+LATE_DAYS = {252: 3, 52: 7, 12: 15, 4: 30, 1: 60}
+# Rede de segurança (revisões) e idade aceita para cópias gravadas antes de haver ficha
+MAX_STALE_SECONDS = 7 * 24 * 3600
+UNSCHEDULED_MAX_AGE = 6 * 3600
+
+
+# --- FREQUÊNCIA ---
+def periods_per_year(series):
+    """Observações por ano pelo espaçamento mediano das datas (diária, semanal, mensal, trimestral ou anual)."""
+    if len(series) < 3: return 12
+    days = np.median(np.diff(series.index.to_numpy()).astype("timedelta64[D]").astype(float))
+    for min_days, periods in ((300, 1), (80, 4), (25, 12), (6, 52)):
+        if days >= min_days: return periods
+    return 252
+
+def next_observation(last_obs, ppy):
+    """Data da observação seguinte a last_obs no calendário da frequência."""
+    last_obs = pd.Timestamp(last_obs)
+    if ppy == 252: return last_obs + pd.offsets.BDay(1)
+    if ppy == 52: return last_obs + pd.Timedelta(days=7)
+    return last_obs + pd.DateOffset(months=12 // ppy)
+
+
+# --- FICHA DA SÉRIE ---
+def _meta_key(key):
+    return ("freshness",) + tuple(key)
+
+def get_meta(key):
+    """Ficha da série (ou None se ela ainda não foi baixada com a agenda)."""
+    meta = DATA_CACHE.get(_meta_key(key))
+    return None if meta is MISS else meta
+
+def typical_lag(meta):
+    """Defasagem típica (dias) entre a data da observação e a divulgação."""
+    return float(np.median(meta["lags"])) if meta.get("lags") else DEFAULT_LAG_DAYS[meta["ppy"]]
+
+def next_release(meta):
+    """Momento a partir do qual uma observação nova é plausível."""
+    lag = max(typical_lag(meta) - LAG_MARGIN_DAYS[meta["ppy"]], 0)
+    return next_observation(meta["last_obs"], meta["ppy"]) + pd.Timedelta(days=lag)
+
+def seed_metadata(key, frequency=None, lag_days=None):
+    """Semeia a ficha com os metadados do provedor (frequência e defasagem da última divulgação)."""
+    meta = get_meta(key) or {"lags": []}
+    if frequency in FRED_FREQUENCIES: meta["source_ppy"] = FRED_FREQUENCIES[frequency]
+    if lag_days is not None and lag_days >= 0 and not meta["lags"]: meta["lags"] = [float(lag_days)]
+    DATA_CACHE.set(_meta_key(key), meta)
+
+def record_fetch(key, series, now=None):
+    """
+    Atualiza a ficha depois de uma busca no provedor. Uma observação nova detectada até
+    2 intervalos de consulta depois da anterior vira uma amostra da defasagem de divulgação.
+    """
+    series = series.dropna() if isinstance(series, pd.Series) else series.dropna(how="all")
+    if series.empty: return
+    now = pd.Timestamp.now() if now is None else pd.Timestamp(now)
+    meta = get_meta(key) or {"lags": []}
+    last_obs = series.index[-1]
+    ppy = meta.get("source_ppy") or periods_per_year(series)
+    previous, checked = meta.get("last_obs"), meta.get("checked")
+    if previous is not None and last_obs > pd.Timestamp(previous):
+        if checked is not None and (now - pd.Timestamp(checked)).total_seconds() <= 2 * RECHECK_SECONDS[ppy]:
+            meta["lags"] = (meta["lags"] + [(now - last_obs) / pd.Timedelta(days=1)])[-LAG_SAMPLES:]
+    if previous is None or last_obs != pd.Timestamp(previous): meta["released"] = str(now)
+    meta.update(last_obs=str(last_obs), ppy=ppy, checked=str(now))
+    DATA_CACHE.set(_meta_key(key), meta)
+
+
+# --- DECISÃO ---
+def refresh_due(key, now=None):
+    """True se vale consultar o provedor: sem cópia, sem ficha (e velha), velha demais ou com divulgação plausível."""
+    age = DATA_CACHE.age(key)
+    if age is None: return True
+    meta = get_meta(key)
+    if meta is None or "last_obs" not in meta: return age > UNSCHEDULED_MAX_AGE
+    if age > MAX_STALE_SECONDS: return True
+    now = pd.Timestamp.now() if now is None else pd.Timestamp(now)
+    if now < next_release(meta): return False
+    return age >= RECHECK_SECONDS[meta["ppy"]]
+
+
+# --- SITUAÇÃO (para a interface) ---
+STATUS_COLUMNS = ["Série", "Frequência", "Última Observação", "Consultada há (h)", "Defasagem Típica (dias)", "Próxima Divulgação", "Situação"]
+
+def series_status(key, now=None):
+    """Situação de uma série: frequência, última observação, idade da cópia e próxima divulgação esperada."""
+    meta, age = get_meta(key), DATA_CACHE.age(key)
+    if age is None: return {"Situação": "Não baixada"}
+    if meta is None or "last_obs" not in meta:
+        return {"Consultada há (h)": age / 3600, "Situação": "Sem agenda"}
+    now = pd.Timestamp.now() if now is None else pd.Timestamp(now)
+    release = next_release(meta)
+    if now < release: state = "Em dia"
+    elif now > release + pd.Timedelta(days=LATE_DAYS[meta["ppy"]]): state = "Atrasada"
+    else: state = "Divulgação esperada"
+    return {"Frequência": FREQUENCY_LABELS[meta["ppy"]], "Última Observação": pd.Timestamp(meta["last_obs"]), "Consultada há (h)": age / 3600,
+            "Defasagem Típica (dias)": typical_lag(meta), "Próxima Divulgação": release, "Situação": state}
+
+def status_table(series, now=None):
+    """DataFrame com STATUS_COLUMNS para um dicionário {rótulo: chave do cache}."""
+    rows = [{"Série": label, **series_status(key, now)} for label, key in series.items()]
+    return pd.DataFrame(rows, columns=STATUS_COLUMNS)
+
+def registered_series():
+    """{rótulo: chave do cache} de todas as séries do FRED e do SGS registradas em pag.registry."""
+    from pag import registry
+    from pag.providers import resolve_start
+    series, seen = {}, set()
+    for ind in registry.all_indicators():
+        source, code = ind["source"], ind["code"]
+        key = (source, code if source == "fred" else int(code), resolve_start(registry.MACRO_START))
+        if key in seen: continue
+        seen.add(key)
+        series[f"{ind['title']} ({'FRED' if source == 'fred' else 'SGS'} {code})"] = key
+    for name, code in registry.US_CURVE_TENORS.items():
+        series[f"Treasury {name} (FRED {code})"] = ("fred", code, resolve_start(registry.CURVE_HISTORY_START))
+    for name, code in registry.BR_CURVE_TENORS.items():
+        series[f"Curva pré {name} (SGS {code})"] = ("bcb_incremental", int(code), resolve_start(registry.BR_CURVE_HISTORY_START))
+    for name, code in registry.REAL_RATE_SERIES.items():
+        series[f"{name} (SGS {code})"] = ("bcb_incremental", int(code), resolve_start(registry.REAL_RATE_START))
+    return series
@@ -0,0 +1,73 @@
+# pag/fundamentals.py
+"""Análise fundamentalista de crédito a partir dos demonstrativos financeiros."""
+
+import numpy as np
+import pandas as pd
+
+
+def calculate_credit_metrics(income_stmt, balance_sheet, cash_flow, info):
+    """
+    Calcula métricas de crédito, alavancagem, cobertura e um score de crédito proprietário.
+    VERSÃO CORRIGIDA para buscar corretamente a estrutura da dívida.
+    """
+    metrics = {}
+    scores = {}
+    try:
+        # --- Coleta de Dados Base como Séries Históricas ---
+        ebit = income_stmt.loc['Operating Income']
+        depreciation = income_stmt.get('Depreciation And Amortization', pd.Series(0, index=income_stmt.columns))
+        ebitda = ebit + depreciation
+        
+        interest_expense = income_stmt.loc['Interest Expense Non Operating'].abs()
+        
+        total_liab = balance_sheet.loc['Total Liabilities Net Minority Interest']
+        cash_and_equiv = balance_sheet.loc['Cash And Cash Equivalents']
+        net_debt = total_liab - cash_and_equiv
+
+        total_debt = balance_sheet.loc['Total Debt']
+        equity = balance_sheet.loc['Stockholders Equity']
+        total_assets = balance_sheet.loc['Total Assets']
+        cfo = cash_flow.loc['Operating Cash Flow']
+        
+        # --- LÓGICA CORRIGIDA PARA BUSCAR DÍVIDA DE CURTO E LONGO PRAZO ---
+        # Verifica se a LINHA (index) existe antes de tentar acessá-la
+        if 'Current Debt And Capital Lease Obligation' in balance_sheet.index:
+            current_debt = balance_sheet.loc['Current Debt And Capital Lease Obligation']
+        else:
+            current_debt = pd.Series(0, index=balance_sheet.columns, name='Current Debt And Capital Lease Obligation')
+
+        if 'Long Term Debt And Capital Lease Obligation' in balance_sheet.index:
+            long_term_debt = balance_sheet.loc['Long Term Debt And Capital Lease Obligation']
+        else:
+            long_term_debt = pd.Series(0, index=balance_sheet.columns, name='Long Term Debt And Capital Lease Obligation')
+        
+        # --- Armazenamento e Cálculo das Métricas ---
+        metrics['Dívida Curto Prazo'] = current_debt
+        metrics['Dívida Longo Prazo'] = long_term_debt
+        metrics['Dívida Líquida / EBITDA'] = net_debt / ebitda
+        metrics['Dívida Total / PL'] = total_debt / equity
+        metrics['Dívida Total / Ativos'] = total_debt / total_assets
+        metrics['FCO / Dívida Total'] = cfo / total_debt
+        metrics['EBIT / Juros'] = ebit / interest_expense.replace(0, np.nan)
+        
+        # --- Lógica do Score de Crédito ---
+        last_debt_ebitda = metrics['Dívida Líquida / EBITDA'].iloc[-1]
+        if pd.isna(last_debt_ebitda): scores['Alavancagem'] = 10 # Penaliza se não for calculável
+        elif last_debt_ebitda < 1.5: scores['Alavancagem'] = 100
+        elif last_debt_ebitda < 3: scores['Alavancagem'] = 75
+        elif last_debt_ebitda < 5: scores['Alavancagem'] = 40
+        else: scores['Alavancagem'] = 10
+        
+        last_coverage = metrics['EBIT / Juros'].iloc[-1]
+        if pd.isna(last_coverage) or last_coverage < 1.5: scores['Cobertura'] = 10
+        elif last_coverage < 4: scores['Cobertura'] = 50
+        elif last_coverage < 7: scores['Cobertura'] = 80
+        else: scores['Cobertura'] = 100
+        
+        final_score = np.mean(list(scores.values()))
+        metrics['PAG Credit Score'] = final_score
+        
+        return metrics
+
+    except (KeyError, IndexError, TypeError):
+        return {}
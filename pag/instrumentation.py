@@ -0,0 +1,219 @@
+# pag/instrumentation.py
+"""
+Instrumentação leve das funções de dados (tempo, cache hit/miss, payload e chamadas a provedores).
+
+Uso nas páginas:
+
+    @instrument("fetch_fred_series", cache=st.cache_data(ttl=3600))
+    def fetch_fred_series(code, start_date): ...
+
+Quando a instrumentação está desligada (padrão), o decorador devolve apenas
+cache(fn) — a função original, sem nenhum wrapper —, então o custo é zero.
+Como o Streamlit reexecuta o script da página a cada rerun, a decisão é tomada
+a cada execução a partir de begin_rerun().
+
+Cada chamada instrumentada é registrada no coletor do rerun atual (por thread,
+já que cada sessão do Streamlit roda seu script em uma thread própria) e em um
+log JSONL rotativo em .pag_cache/logs/timings.jsonl.
+"""
+
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+from pag.config import cache_path
+
+# Liga a instrumentação para todas as sessões (ex: PAG_INSTRUMENT=1 streamlit run ...)
+ENV_ENABLED = os.environ.get("PAG_INSTRUMENT", "").lower() in ("1", "true", "yes")
+LOG_FILE = cache_path("logs", "timings.jsonl")
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 3
+
+_local = threading.local()
+_logger = None
+_logger_lock = threading.Lock()
+
+
+# --- ESTADO DO RERUN ---
+def begin_rerun(page, enabled=False):
+    """Inicia a coleta de um novo rerun da página. Deve ser chamado antes das funções serem definidas."""
+    _local.enabled = bool(enabled or ENV_ENABLED)
+    _local.page = page
+    _local.records = []
+    _local.stack = []
+    _local.provider_calls = Counter()
+    _local.started = time.perf_counter()
+
+def is_enabled():
+    return getattr(_local, "enabled", False)
+
+def get_records():
+    """Registros do rerun atual (lista de dicionários)."""
+    return list(getattr(_local, "records", []))
+
+def get_provider_calls():
+    return dict(getattr(_local, "provider_calls", {}))
+
+def rerun_elapsed():
+    started = getattr(_local, "started", None)
+    return time.perf_counter() - started if started else 0.0
+
+
+# --- CONTADORES ---
+def count_provider_call(provider, n=1):
+    """Conta uma chamada de rede a um provedor (fred, bcb, yfinance). Custo desprezível se desligado."""
+    if not getattr(_local, "enabled", False): return
+    _local.provider_calls[provider] += n
+    for frame in _local.stack: frame[provider] += n
+
+def payload_bytes(obj):
+    """Tamanho aproximado (bytes) do resultado: DataFrames/Séries pelo uso de memória, dicts recursivamente."""
+    if obj is None: return 0
+    memory_usage = getattr(obj, "memory_usage", None)
+    if callable(memory_usage):
+        try:
+            usage = memory_usage(index=True, deep=False)
+            return int(usage.sum()) if hasattr(usage, "sum") else int(usage)
+        except Exception:
+            pass
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(payload_bytes(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sys.getsizeof(obj) + sum(payload_bytes(v) for v in obj)
+    return sys.getsizeof(obj)
+
+
+# --- LOG JSONL ROTATIVO ---
+def _get_logger():
+    global _logger
+    if _logger is None:
+        with _logger_lock:
+            if _logger is None:
+                logger = logging.getLogger("pag.timings")
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+                handler = RotatingFileHandler(LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8")
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                logger.addHandler(handler)
+                _logger = logger
+    return _logger
+
+def _record(record):
+    _local.records.append(record)
+    try:
+        _get_logger().info(json.dumps(record, ensure_ascii=False, default=str))
+    except Exception:
+        pass
+
+
+# --- DECORADOR ---
+def instrument(name=None, cache=None, provider=None):
+    """
+    Instrumenta uma função de dados.
+    - cache: decorador de cache opcional (ex: st.cache_data(ttl=3600)). O corpo da função
+      é marcado internamente, então um cache miss é detectado quando o corpo executa.
+    - provider: provedor contado como uma chamada quando o corpo executa e a função não
+      registrou chamadas mais granulares (ex: funções que usam yf.Ticker diretamente).
+    """
+    def decorator(fn):
+        if not is_enabled():
+            return cache(fn) if cache else fn
+
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def body(*args, **kwargs):
+            frame = _local.stack[-1] if _local.stack else None
+            if frame is not None: frame["__miss__"] = 1
+            result = fn(*args, **kwargs)
+            if provider and frame is not None and not any(k for k in frame if k != "__miss__"):
+                count_provider_call(provider)
+            return result
+
+        inner = cache(body) if cache else body
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not getattr(_local, "enabled", False):
+                return inner(*args, **kwargs)
+            frame = Counter()
+            _local.stack.append(frame)
+            t0 = time.perf_counter()
+            try:
+                result = inner(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - t0
+                _local.stack.pop()
+            miss = frame.pop("__miss__", 0)
+            _record({
+                "ts": datetime.now().isoformat(timespec="seconds"),
+                "page": getattr(_local, "page", None),
+                "function": label,
+                "ms": round(elapsed * 1000, 2),
+                "cache": ("miss" if miss else "hit") if cache else "n/a",
+                "payload_bytes": payload_bytes(result),
+                "provider_calls": dict(frame),
+                "depth": len(_local.stack),
+            })
+            return result
+
+        return wrapper
+    return decorator
+
+
+class timed:
+    """Context manager para medir um bloco qualquer (ex: transformações pandas ou serialização de gráficos)."""
+
+    def __init__(self, name, category="bloco"):
+        self.name, self.category = name, category
+
+    def __enter__(self):
+        self.t0 = time.perf_counter() if is_enabled() else None
+        return self
+
+    def __exit__(self, *exc):
+        if self.t0 is not None:
+            _record({
+                "ts": datetime.now().isoformat(timespec="seconds"),
+                "page": getattr(_local, "page", None),
+                "function": f"[{self.category}] {self.name}",
+                "ms": round((time.perf_counter() - self.t0) * 1000, 2),
+                "cache": "n/a", "payload_bytes": None, "provider_calls": {},
+                "depth": len(getattr(_local, "stack", [])),
+            })
+        return False
+
+
+# --- PLOTLY ---
+_plotly_patched = False
+
+def install_plotly_timer():
+    """
+    Mede o tempo de st.plotly_chart (serialização da figura + envio) quando a instrumentação
+    está ligada. Idempotente; sem custo extra além de um teste de flag quando desligada.
+    """
+    global _plotly_patched
+    if _plotly_patched: return
+    import streamlit as st
+    from streamlit.delta_generator import DeltaGenerator
+
+    original = DeltaGenerator.plotly_chart
+
+    @functools.wraps(original)
+    def plotly_chart(self, figure_or_data, *args, **kwargs):
+        if not getattr(_local, "enabled", False):
+            return original(self, figure_or_data, *args, **kwargs)
+        title = getattr(getattr(getattr(figure_or_data, "layout", None), "title", None), "text", None) or "sem título"
+        with timed(title, category="plotly"):
+            return original(self, figure_or_data, *args, **kwargs)
+
+    DeltaGenerator.plotly_chart = plotly_chart
+    st.plotly_chart = st._main.plotly_chart  # Re-vincula o atalho st.plotly_chart ao método instrumentado
+    _plotly_patched = True
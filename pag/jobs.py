@@ -0,0 +1,198 @@
+# pag/jobs.py
+"""
+Execução de análises longas em segundo plano (backtest, betas de fatores,
+classificação de tickers e o "Analisar" do Research).
+
+As páginas enviam o job com submit() e recebem um ID. O trabalho roda em um
+pool de processos, fora da thread do script do Streamlit e usando vários
+núcleos. O estado de cada job fica em uma tabela SQLite (.pag_cache/jobs/):
+status, progresso, mensagem e o resultado em pickle. Assim o resultado pode
+ser lido pelo ID em qualquer sessão, mesmo que o usuário tenha saído da
+página enquanto o job rodava.
+
+Enviar de novo o mesmo job (mesmo tipo e parâmetros) reaproveita o que já está
+na fila ou rodando, ou o resultado concluído há menos de RESULT_MAX_AGE.
+
+Os parâmetros precisam ser serializáveis em JSON (listas, números, strings).
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+from pag.config import cache_path
+
+JOBS_DB = cache_path("jobs", "jobs.sqlite")
+JOB_WORKERS = int(os.environ.get("PAG_JOB_WORKERS", min(4, os.cpu_count() or 1)))
+# Resultado reaproveitado por um novo submit() idêntico (mesma janela do cache de dados)
+RESULT_MAX_AGE = int(os.environ.get("PAG_JOB_MAX_AGE", 6 * 3600))
+# Jobs mais antigos que isso são apagados da tabela
+JOB_RETENTION = 7 * 24 * 3600
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY, kind TEXT NOT NULL, params TEXT NOT NULL, params_key TEXT NOT NULL,
+        status TEXT NOT NULL, progress REAL NOT NULL DEFAULT 0, message TEXT NOT NULL DEFAULT '',
+        error TEXT, result BLOB, owner_pid INTEGER, created REAL NOT NULL, started REAL, finished REAL)""",
+    "CREATE INDEX IF NOT EXISTS jobs_lookup ON jobs (kind, params_key, created)",
+]
+_COLUMNS = ["id", "kind", "params", "status", "progress", "message", "error", "created", "started", "finished"]
+
+_pool = None
+_pool_lock = threading.Lock()
+_schema_ready = False
+
+
+# --- TIPOS DE JOB ---
+# Cada job recebe progress(fração, mensagem) e os parâmetros enviados em submit().
+def _prices(tickers, period):
+    # Busca desde a data fixa do registro (chave de cache estável) e recorta a janela do período na leitura
+    from pag.providers import fetch_market_data, resolve_start
+    from pag.registry import MARKET_HISTORY_START
+    prices = fetch_market_data(list(tickers), MARKET_HISTORY_START)
+    return prices.loc[resolve_start(f"-{period}"):].dropna() if not prices.empty else prices
+
+def _job_backtest(progress, tickers, weights, period="3y"):
+    from pag.portfolio import backtest_from_prices
+    progress(0.1, f"Buscando preços de {len(tickers)} ativo(s)...")
+    prices = _prices(tickers, period)
+    if prices.empty: return None
+    progress(0.6, "Simulando a carteira...")
+    return backtest_from_prices(prices, tickers, weights)
+
+def _job_factor_betas(progress, tickers, period="3y"):
+    from pag.portfolio import FACTOR_TICKERS, factor_betas_from_prices
+    progress(0.1, "Buscando preços dos ativos e dos fatores...")
+    prices = _prices(list(dict.fromkeys(list(tickers) + list(FACTOR_TICKERS.values()))), period)
+    progress(0.6, "Calculando os betas...")
+    return factor_betas_from_prices(prices, tickers, FACTOR_TICKERS)
+
+def _job_categorize(progress, tickers):
+    from pag.wealth import bulk_categorize_tickers
+    return bulk_categorize_tickers(tickers, progress)
+
+def _job_research(progress, ticker_symbol, peer_tickers):
+    from pag.research import analyze_company
+    return analyze_company(ticker_symbol, peer_tickers, progress)
+
+JOB_KINDS = {
+    "backtest": _job_backtest,
+    "factor_betas": _job_factor_betas,
+    "categorize_tickers": _job_categorize,
+    "research": _job_research,
+}
+
+
+# --- TABELA DE JOBS ---
+@contextmanager
+def _db():
+    global _schema_ready
+    conn = sqlite3.connect(JOBS_DB, timeout=30)
+    try:
+        with conn:
+            if not _schema_ready:
+                conn.execute("PRAGMA journal_mode=WAL")  # Leituras das páginas não bloqueiam os workers
+                for statement in _SCHEMA: conn.execute(statement)
+                _schema_ready = True
+            yield conn
+    finally:
+        conn.close()
+
+def _update(job_id, **fields):
+    with _db() as conn:
+        conn.execute(f"UPDATE jobs SET {', '.join(f'{k} = ?' for k in fields)} WHERE id = ?", (*fields.values(), job_id))
+
+def _pid_alive(pid):
+    try: os.kill(pid, 0)
+    except ProcessLookupError: return False
+    except (PermissionError, TypeError): return True
+    return True
+
+def _recover_interrupted():
+    """Marca como falhos os jobs pendentes de um servidor que já não existe (ex: reinício do Streamlit)."""
+    with _db() as conn:
+        rows = conn.execute("SELECT id, owner_pid FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)).fetchall()
+        for job_id, owner_pid in rows:
+            if owner_pid != os.getpid() and not _pid_alive(owner_pid):
+                conn.execute("UPDATE jobs SET status = ?, error = ?, finished = ? WHERE id = ?", (FAILED, "Interrompido: o servidor foi reiniciado.", time.time(), job_id))
+        conn.execute("DELETE FROM jobs WHERE created < ?", (time.time() - JOB_RETENTION,))
+
+
+# --- EXECUÇÃO ---
+def _execute(job_id, kind, params):
+    """Roda no processo do pool: executa o job e grava progresso, resultado ou erro na tabela."""
+    _update(job_id, status=RUNNING, started=time.time(), message="Iniciando...")
+    progress = lambda fraction, message="": _update(job_id, progress=float(min(max(fraction, 0), 1)), message=message)
+    try:
+        result = JOB_KINDS[kind](progress, **params)
+    except Exception as e:
+        _update(job_id, status=FAILED, error=f"{type(e).__name__}: {e}", finished=time.time())
+        return
+    _update(job_id, status=DONE, progress=1.0, message="Concluído.", result=pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL), finished=time.time())
+
+def _on_done(job_id, future):
+    # Falhas fora do job (ex: processo do pool encerrado) não passam pelo _execute
+    error = future.exception()
+    if error is not None:
+        _update(job_id, status=FAILED, error=f"{type(error).__name__}: {error}", finished=time.time())
+
+def _get_pool(reset=False):
+    global _pool
+    with _pool_lock:
+        if reset and _pool is not None:
+            _pool.shutdown(wait=False); _pool = None
+        if _pool is None:
+            _recover_interrupted()
+            # "spawn": os workers não herdam as threads do servidor do Streamlit
+            _pool = ProcessPoolExecutor(max_workers=JOB_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def submit(kind, **params):
+    """Enfileira um job (ou reaproveita um idêntico em andamento/recente) e devolve o ID."""
+    if kind not in JOB_KINDS: raise ValueError(f"Tipo de job desconhecido: {kind}")
+    params_json = json.dumps(params, sort_keys=True)
+    params_key = hashlib.sha1(f"{kind}:{params_json}".encode("utf-8")).hexdigest()
+    pool = _get_pool()
+    with _db() as conn:
+        row = conn.execute(
+            "SELECT id FROM jobs WHERE kind = ? AND params_key = ? AND (status IN (?, ?) OR (status = ? AND finished > ?)) ORDER BY created DESC LIMIT 1",
+            (kind, params_key, QUEUED, RUNNING, DONE, time.time() - RESULT_MAX_AGE)).fetchone()
+        if row: return row[0]
+        job_id = uuid.uuid4().hex[:12]
+        conn.execute("INSERT INTO jobs (id, kind, params, params_key, status, message, owner_pid, created) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                     (job_id, kind, params_json, params_key, QUEUED, "Na fila...", os.getpid(), time.time()))
+    try:
+        future = pool.submit(_execute, job_id, kind, json.loads(params_json))
+    except BrokenProcessPool:  # Um worker morreu (ex: falta de memória): recria o pool
+        future = _get_pool(reset=True).submit(_execute, job_id, kind, json.loads(params_json))
+    future.add_done_callback(lambda f: _on_done(job_id, f))
+    return job_id
+
+
+# --- CONSULTA ---
+def get_job(job_id):
+    """Estado do job (sem o resultado) como dicionário, ou None se o ID não existir."""
+    if not job_id: return None
+    with _db() as conn:
+        row = conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    if row is None: return None
+    job = dict(zip(_COLUMNS, row))
+    job["params"] = json.loads(job["params"])
+    return job
+
+def get_result(job_id):
+    """Resultado de um job concluído (None se não existir ou ainda não terminou)."""
+    with _db() as conn:
+        row = conn.execute("SELECT result FROM jobs WHERE id = ? AND status = ?", (job_id, DONE)).fetchone()
+    return pickle.loads(row[0]) if row and row[0] is not None else None
@@ -0,0 +1,127 @@
+# pag/performance.py
+"""
+Métricas de performance de painéis de preços (sem dependência do Streamlit).
+
+Todas as colunas são calculadas de uma vez, com operações vetorizadas sobre o
+painel inteiro, então a mesma tabela serve para 5 índices ou 500 ETFs. O
+resultado é numérico; a formatação fica para a exibição (PERFORMANCE_FORMATS).
+"""
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+
+# Janelas de retorno por âncora de calendário (e não por número de linhas).
+# "YTD" ancora no último fechamento do ano anterior; None = desde o início da série.
+TRAILING_PERIODS = {
+    "1M": pd.DateOffset(months=1), "3M": pd.DateOffset(months=3), "YTD": "YTD",
+    "1A": pd.DateOffset(years=1), "3A": pd.DateOffset(years=3), "5A": pd.DateOffset(years=5),
+    "Desde o Início": None,
+}
+
+# Formatação usada na exibição (ex: df.style.format(PERFORMANCE_FORMATS, na_rep="—"))
+PERFORMANCE_FORMATS = {
+    "Retorno YTD": "{:.2%}", "Retorno 1M": "{:.2%}", "Retorno 3M": "{:.2%}", "Retorno 12M": "{:.2%}",
+    "Retorno 3A (a.a.)": "{:.2%}", "Volatilidade Anual.": "{:.2%}", "Índice de Sharpe": "{:.2f}",
+    "Índice de Sortino": "{:.2f}", "Drawdown Máximo": "{:.2%}", "Índice de Calmar": "{:.2f}",
+}
+
+
+def _panel(prices_df):
+    """Painel ordenado e preenchido, com a posição do primeiro preço válido de cada coluna."""
+    prices = prices_df.sort_index().dropna(axis=1, how="all")
+    filled_df = prices.ffill()
+    first_pos = prices.notna().to_numpy().argmax(axis=0)
+    return prices, filled_df, filled_df.to_numpy(dtype=float), first_pos
+
+def _prices_at(index, filled, first_pos, anchor):
+    """Último preço de cada coluna em ou antes da data âncora (NaN se a série ainda não existia)."""
+    pos = index.searchsorted(anchor, side="right") - 1
+    if pos < 0: return np.full(filled.shape[1], np.nan)
+    return np.where(first_pos <= pos, filled[pos], np.nan)
+
+def _ratio(num, den):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(den > 0, num / den, np.nan)
+
+
+def trailing_returns(prices_df, periods=None):
+    """
+    Retornos de janela móvel de todas as colunas, ancorados no calendário a partir da última data
+    do painel (ex: 1A = último preço em ou antes da mesma data do ano anterior).
+    Devolve colunas ("Acumulado", período) e ("Anualizado", período); só janelas de pelo menos
+    um ano de calendário (365 dias) são anualizadas, e as de calendário (1A, 3A, 5A) pelo número
+    exato de anos (1A anualizado = 1A acumulado). Janelas maiores que o histórico da série ficam NaN.
+    """
+    periods = TRAILING_PERIODS if periods is None else periods
+    prices, _, filled, first_pos = _panel(prices_df)
+    if prices.empty: return pd.DataFrame(columns=pd.MultiIndex.from_product([["Acumulado", "Anualizado"], list(periods)]))
+
+    index = prices.index
+    last_date, last = index[-1], filled[-1]
+    first = filled[first_pos, np.arange(filled.shape[1])]
+    inception_days = np.asarray((last_date - index[first_pos]).days, dtype=float)
+    cumulative, annualized = {}, {}
+    for label, offset in periods.items():
+        if offset is None:
+            base, days = first, inception_days
+            years = days / 365.25
+        elif isinstance(offset, str):  # "YTD"
+            anchor = last_date.normalize().replace(month=1, day=1) - pd.Timedelta(days=1)
+            base = _prices_at(index, filled, first_pos, anchor)
+            # Série que começou no ano: YTD desde o primeiro preço
+            started_this_year = np.asarray(index[first_pos].year == last_date.year)
+            base = np.where(np.isnan(base) & started_this_year, first, base)
+            days = np.full(len(base), float((last_date - anchor).days))
+            years = days / 365.25
+        else:
+            anchor = last_date - offset
+            base, days = _prices_at(index, filled, first_pos, anchor), np.full(len(first), float((last_date - anchor).days))
+            kwds = getattr(offset, "kwds", {})
+            years = kwds.get("years", 0) + kwds.get("months", 0) / 12 or days / 365.25  # Outros offsets: pelos dias
+        cumulative[label] = last / base - 1
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Um ano sem 29/fev tem 365 dias: days / 365.25 < 1 deixaria o 1A sem anualizar
+            annualized[label] = np.where(days >= 365, (1 + cumulative[label]) ** (1 / years) - 1, np.nan)
+    columns = pd.Index(prices.columns, name="Ativo")
+    return pd.concat({"Acumulado": pd.DataFrame(cumulative, index=columns), "Anualizado": pd.DataFrame(annualized, index=columns)}, axis=1)
+
+
+def calculate_performance_metrics(prices_df, risk_free_rate=0.02):
+    """
+    Retornos (YTD, 1M, 3M, 12M e 3 anos anualizado), volatilidade anualizada, Sharpe,
+    Sortino, drawdown máximo e Calmar de todas as colunas de um painel de preços.
+    Sharpe e Sortino usam o retorno de 12M; volatilidade, drawdown e Calmar, o período todo.
+    """
+    prices, filled_df, filled, first_pos = _panel(prices_df)
+    if prices.empty: return pd.DataFrame(columns=list(PERFORMANCE_FORMATS)).rename_axis("Ativo")
+
+    index = prices.index
+    first, last = filled[first_pos, np.arange(filled.shape[1])], filled[-1]
+    last_date = index[-1]
+    trailing = trailing_returns(prices, {k: TRAILING_PERIODS[k] for k in ("YTD", "1M", "3M", "1A", "3A")})
+    table = {
+        "Retorno YTD": trailing[("Acumulado", "YTD")].to_numpy(),
+        "Retorno 1M": trailing[("Acumulado", "1M")].to_numpy(),
+        "Retorno 3M": trailing[("Acumulado", "3M")].to_numpy(),
+        "Retorno 12M": trailing[("Acumulado", "1A")].to_numpy(),
+        "Retorno 3A (a.a.)": trailing[("Anualizado", "3A")].to_numpy(),
+    }
+
+    # Retornos entre pregões válidos consecutivos de cada série (feriados locais não viram retorno zero)
+    returns = prices / filled_df.shift(1) - 1
+    volatility = returns.std().to_numpy() * np.sqrt(TRADING_DAYS)
+    downside = np.sqrt(returns.clip(upper=0).pow(2).mean().to_numpy()) * np.sqrt(TRADING_DAYS)
+    table["Volatilidade Anual."] = volatility
+    table["Índice de Sharpe"] = _ratio(table["Retorno 12M"] - risk_free_rate, volatility)
+    table["Índice de Sortino"] = _ratio(table["Retorno 12M"] - risk_free_rate, downside)
+
+    max_drawdown = (filled_df / filled_df.cummax() - 1).min().to_numpy()
+    years = np.asarray((last_date - index[first_pos]).days) / 365.25
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cagr = np.where(years > 0, (last / first) ** (1 / years) - 1, np.nan)
+    table["Drawdown Máximo"] = max_drawdown
+    table["Índice de Calmar"] = _ratio(cagr, -max_drawdown)
+
+    return pd.DataFrame(table, index=pd.Index(prices.columns, name="Ativo"))
@@ -0,0 +1,73 @@
+# pag/portfolio.py
+"""Cálculos de risco e retorno de carteiras (sem dependência do Streamlit)."""
+
+import numpy as np
+import pandas as pd
+
+from pag.drawdown import underwater
+
+# Fatores do teste de estresse (Wealth Management): nome -> ticker
+FACTOR_TICKERS = {"S&P 500": "^GSPC", "Ibovespa": "^BVSP", "Juros EUA (IEF)": "IEF", "Dólar": "BRL=X"}
+# Modelo de custo das métricas para pag.compute (calibrado com benchmarks/bench_compute.py):
+# retornos e médias por célula (pregões x ativos) e a covariância por par de ativos em cada pregão
+COV_SECONDS_PER_CELL = 24e-9
+COV_SECONDS_PER_PAIR = 1.4e-11
+
+
+def covariance_cost(prices):
+    """Custo estimado (s) das métricas de risco de um painel de preços (pregões x ativos)."""
+    rows, cols = prices.shape
+    return rows * cols * (COV_SECONDS_PER_CELL + cols * COV_SECONDS_PER_PAIR)
+
+
+def calculate_portfolio_metrics(prices, weights):
+    """Calcula as métricas de um portfólio com base nos pesos."""
+    if prices.empty:
+        return 0, 0, 0, 0
+    returns = prices.pct_change().dropna()
+    portfolio_return = np.sum(returns.mean() * weights) * 252
+    cov_matrix = returns.cov() * 252
+    portfolio_volatility = np.sqrt(np.dot(weights.T, np.dot(cov_matrix, weights)))
+    sharpe_ratio = portfolio_return / portfolio_volatility if portfolio_volatility != 0 else 0
+    z_score = 1.645 # Z-score para 95% de confiança
+    daily_var = portfolio_volatility / np.sqrt(252) * z_score
+    return portfolio_return, portfolio_volatility, sharpe_ratio, daily_var
+
+
+def calculate_portfolio_risk(prices, weights):
+    """Retorno, volatilidade, Sharpe anualizados e a contribuição de cada ativo ao risco."""
+    if prices.empty or len(prices) < 252: return 0, 0, 0, pd.Series(dtype='float64', index=prices.columns)
+    returns = prices.pct_change().dropna(); cov_matrix = returns.cov() * 252
+    p_return = np.sum(returns.mean() * weights) * 252
+    p_vol = np.sqrt(np.dot(weights.T, np.dot(cov_matrix, weights)))
+    p_sharpe = p_return / p_vol if p_vol > 0 else 0
+    marginal_contribution = weights * (cov_matrix @ weights) / p_vol
+    risk_contribution_pct = marginal_contribution / p_vol
+    return p_return, p_vol, p_sharpe, risk_contribution_pct
+
+
+def backtest_from_prices(prices, tickers, weights):
+    """Simulação histórica de uma carteira de pesos fixos (rebalanceamento diário) a partir dos preços."""
+    # Alinha as colunas à ordem dos tickers/pesos (o yfinance devolve as colunas em ordem alfabética)
+    prices = prices[[t for t in tickers if t in prices.columns]]
+    weights = np.array([w for t, w in zip(tickers, weights) if t in prices.columns], dtype=float)
+    weights = weights / weights.sum()
+    annualized_return, annualized_vol, sharpe_ratio, risk_contribution = calculate_portfolio_risk(prices, weights)
+    portfolio_daily_returns = (prices.pct_change().dropna() * weights).sum(axis=1)
+    cumulative_returns = (1 + portfolio_daily_returns).cumprod()
+    total_return = cumulative_returns.iloc[-1] - 1
+    drawdown = underwater(cumulative_returns)
+    return {"cumulative_returns": cumulative_returns, "total_return": total_return, "annualized_return": annualized_return, "annualized_vol": annualized_vol, "sharpe_ratio": sharpe_ratio, "risk_contribution": risk_contribution, "drawdown": drawdown, "max_drawdown": drawdown.min()}
+
+
+def factor_betas_from_prices(prices, portfolio_tickers, factor_tickers):
+    """Betas de cada ativo contra cada fator (regressão linear dos retornos diários)."""
+    returns = prices.pct_change().dropna()
+    betas = pd.DataFrame()
+    for asset in portfolio_tickers:
+        for factor_name, factor_ticker in factor_tickers.items():
+            if asset in returns.columns and factor_ticker in returns.columns:
+                # polyfit(x, y, grau) -> retorna [beta, alpha]
+                beta = np.polyfit(returns[factor_ticker], returns[asset], 1)[0]
+                betas.loc[asset, factor_name] = beta
+    return betas
@@ -0,0 +1,238 @@
+# pag/providers.py
+"""
+Acesso aos provedores de dados (FRED, BCB/SGS e Yahoo Finance) com cache persistente.
+
+Estas funções não dependem do Streamlit: são usadas tanto pelas páginas (por
+trás do st.cache_data) quanto pelo job de warm-up, e ambos leem e escrevem no
+mesmo cache em disco.
+
+As séries do FRED e do SGS são, por padrão, atualizadas pela agenda de
+divulgação de pag.freshness (max_age=SCHEDULED): o provedor só é consultado
+quando uma observação nova é plausível. Um max_age numérico mantém a regra
+por idade (0 força a busca).
+"""
+
+import os
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from pag import freshness
+from pag.cache import DATA_CACHE, MISS
+from pag.freshness import SCHEDULED
+from pag.instrumentation import count_provider_call
+from pag.config import ROOT_DIR
+
+# Idade máxima (segundos) de um dado do cache persistente aceito pelas páginas nas
+# buscas sem agenda de divulgação (Yahoo Finance, Focus). O job de warm-up força a
+# atualização em horário agendado; as páginas só buscam no provedor se o job não
+# tiver rodado dentro desta janela.
+CACHE_MAX_AGE = int(os.environ.get("PAG_CACHE_MAX_AGE", 6 * 3600))
+
+
+def _cached(key, max_age):
+    """Cópia do cache persistente ainda válida pela agenda (SCHEDULED) ou pela idade (MISS se for preciso buscar)."""
+    if max_age == SCHEDULED: return MISS if freshness.refresh_due(key) else DATA_CACHE.get(key)
+    return DATA_CACHE.get(key, max_age)
+
+
+# --- DATAS ---
+def resolve_start(start):
+    """
+    Normaliza a data inicial para 'AAAA-MM-DD'. Aceita datas, strings ou prazos relativos ('-5y', '-10d').
+    Os prazos relativos servem para recortar janelas na leitura: nas buscas, use datas fixas
+    (a data resolvida entra na chave do cache e mudaria todo dia).
+    """
+    if isinstance(start, str) and start.startswith("-"):
+        amount, unit = int(start[1:-1]), start[-1]
+        days = amount * 365 if unit == "y" else amount
+        return (date.today() - timedelta(days=days)).strftime("%Y-%m-%d")
+    if isinstance(start, (datetime, date)):
+        return start.strftime("%Y-%m-%d")
+    return pd.Timestamp(start).strftime("%Y-%m-%d")
+
+
+# --- FRED ---
+_fred_client = None
+
+def read_fred_api_key():
+    """Lê a chave do FRED da variável de ambiente ou do .streamlit/secrets.toml (uso fora do Streamlit)."""
+    api_key = os.environ.get("FRED_API_KEY")
+    if api_key: return api_key
+    secrets_file = os.path.join(ROOT_DIR, ".streamlit", "secrets.toml")
+    if os.path.exists(secrets_file):
+        import tomllib
+        with open(secrets_file, "rb") as f: return tomllib.load(f).get("FRED_API_KEY")
+    return None
+
+def set_fred_client(client):
+    """Registra o cliente do FRED já criado pela página (evita ler a chave duas vezes)."""
+    global _fred_client
+    _fred_client = client
+
+def get_fred_client():
+    global _fred_client
+    if _fred_client is None:
+        from fredapi import Fred
+        api_key = read_fred_api_key()
+        if not api_key: raise RuntimeError("Chave da API do FRED (FRED_API_KEY) não encontrada.")
+        _fred_client = Fred(api_key=api_key)
+    return _fred_client
+
+def _seed_fred_metadata(key, code):
+    # Primeira carga: frequência e defasagem da última divulgação pelos metadados da série
+    try:
+        count_provider_call("fred")
+        info = get_fred_client().get_series_info(code)
+        lag = (pd.Timestamp(info["last_updated"]).tz_localize(None) - pd.Timestamp(info["observation_end"])) / pd.Timedelta(days=1)
+        freshness.seed_metadata(key, info.get("frequency_short"), lag)
+    except Exception: pass
+
+def fetch_fred_series(code, start_date, max_age=SCHEDULED):
+    """Série do FRED a partir de start_date. max_age=0 força a busca no provedor."""
+    key = ("fred", code, resolve_start(start_date))
+    cached = _cached(key, max_age)
+    if cached is not MISS: return cached
+    if freshness.get_meta(key) is None: _seed_fred_metadata(key, code)
+    count_provider_call("fred")
+    series = get_fred_client().get_series(code, key[2])
+    DATA_CACHE.set(key, series)
+    freshness.record_fetch(key, series)
+    return series
+
+
+# --- BCB / SGS ---
+def fetch_bcb_series(codes, start_date, max_age=SCHEDULED):
+    """
+    DataFrame do SGS para um dicionário {nome: código}. max_age=0 força a busca no provedor.
+    O cache é por código SGS (e não pelo nome da coluna), então o mesmo código usado com
+    nomes diferentes em páginas diferentes é baixado uma única vez.
+    """
+    start = resolve_start(start_date)
+    columns = {}
+    for name, code in codes.items():
+        key = ("bcb", int(code), start)
+        series = _cached(key, max_age)
+        if series is MISS:
+            from bcb import sgs
+            count_provider_call("bcb")
+            df = sgs.get({name: code}, start=start)
+            if not isinstance(df, pd.DataFrame) or df.empty: continue
+            series = df.iloc[:, 0].rename(None)
+            DATA_CACHE.set(key, series)
+            freshness.record_fetch(key, series)
+        columns[name] = series
+    if not columns: return pd.DataFrame()
+    return pd.DataFrame(columns)
+
+
+# --- BCB / SGS: ATUALIZAÇÃO INCREMENTAL ---
+# O SGS limita as consultas de séries diárias a 10 anos: o histórico é baixado em janelas
+SGS_WINDOW_DAYS = 3650
+
+def fetch_bcb_incremental(code, start_date, max_age=SCHEDULED, overlap_days=45):
+    """
+    Série do SGS guardada inteira no cache persistente e atualizada de forma incremental:
+    depois da primeira carga, só o trecho a partir da última data guardada (menos overlap_days,
+    para pegar revisões) é baixado. start_date deve ser uma data fixa (ex: '2000-01-01').
+    """
+    key = ("bcb_incremental", int(code), resolve_start(start_date))
+    stored = _cached(key, max_age)
+    if stored is not MISS: return stored
+    stored = DATA_CACHE.get(key)
+    since = pd.Timestamp(resolve_start(start_date)) if stored is MISS or stored.empty else stored.index[-1] - timedelta(days=overlap_days)
+    from bcb import sgs
+    chunks = []
+    while since <= pd.Timestamp.today():
+        until = since + timedelta(days=SGS_WINDOW_DAYS)
+        count_provider_call("bcb")
+        df = sgs.get({"valor": int(code)}, start=since.strftime("%Y-%m-%d"), end=until.strftime("%Y-%m-%d"))
+        if isinstance(df, pd.DataFrame) and not df.empty: chunks.append(df.iloc[:, 0].rename(None))
+        since = until + timedelta(days=1)
+    if chunks:
+        fresh = pd.concat(chunks)
+        fresh = fresh[~fresh.index.duplicated(keep="last")]
+        stored = fresh if stored is MISS else pd.concat([stored[stored.index < fresh.index[0]], fresh])
+    elif stored is MISS:
+        return pd.Series(dtype=float)
+    DATA_CACHE.set(key, stored)  # Regrava mesmo sem novidades: a idade volta a zero
+    freshness.record_fetch(key, stored)
+    return stored
+
+
+# --- BCB / FOCUS ---
+def fetch_focus_ipca_12m(start_date, max_age=CACHE_MAX_AGE):
+    """
+    Mediana diária das expectativas de IPCA para os próximos 12 meses (Focus, série suavizada).
+    max_age=None aceita qualquer cópia guardada e não consulta o BCB se não houver (uso nas páginas).
+    """
+    key = ("focus", "ipca_12m", resolve_start(start_date))
+    cached = DATA_CACHE.get(key, max_age)
+    if cached is not MISS or max_age is None: return None if cached is MISS else cached
+    from bcb import Expectativas
+    count_provider_call("bcb")
+    endpoint = Expectativas().get_endpoint("ExpectativasMercadoInflacao12Meses")
+    df = (endpoint.query().filter(endpoint.Indicador == "IPCA", endpoint.Suavizada == "S", endpoint.baseCalculo == 0)
+          .filter(endpoint.Data >= key[2]).select(endpoint.Data, endpoint.Mediana).collect())
+    series = pd.Series(df["Mediana"].to_numpy(dtype=float), index=pd.to_datetime(df["Data"])).sort_index()
+    series = series[~series.index.duplicated(keep="last")]
+    DATA_CACHE.set(key, series)
+    return series
+
+
+# --- YAHOO FINANCE ---
+def fetch_market_data(tickers, start_date, max_age=CACHE_MAX_AGE):
+    """
+    Fechamentos diários para uma lista de tickers, com cache por ticker.
+    Apenas os tickers ausentes do cache são baixados, em uma única chamada em lote.
+    """
+    start = resolve_start(start_date)
+    columns, missing = {}, []
+    for ticker in tickers:
+        cached = DATA_CACHE.get(("yf_close", ticker, start), max_age)
+        if cached is MISS: missing.append(ticker)
+        else: columns[ticker] = cached
+
+    if missing:
+        import yfinance as yf
+        count_provider_call("yfinance")
+        data = yf.download(missing, start=start, progress=False)['Close']
+        if isinstance(data, pd.Series): data = data.to_frame(missing[0])
+        for ticker in missing:
+            if ticker in data.columns and not data[ticker].dropna().empty:
+                columns[ticker] = data[ticker].dropna()
+                DATA_CACHE.set(("yf_close", ticker, start), columns[ticker])
+
+    if not columns: return pd.DataFrame()
+    ordered = [t for t in tickers if t in columns]
+    return pd.DataFrame({t: columns[t] for t in ordered}).dropna(how='all')
+
+
+# --- YAHOO FINANCE: CADASTRO (info) ---
+# O cadastro (TER, AUM, gestora) muda pouco: vale por um dia no cache persistente
+INFO_MAX_AGE = int(os.environ.get("PAG_INFO_MAX_AGE", 24 * 3600))
+
+def _download_info(ticker):
+    import yfinance as yf
+    try: return yf.Ticker(ticker).info or {}
+    except Exception: return {}
+
+def fetch_ticker_infos(tickers, max_age=INFO_MAX_AGE, workers=8):
+    """
+    Dicionário {ticker: info} do yfinance, com cache persistente por ticker.
+    Os tickers ausentes do cache são buscados em paralelo (uma requisição HTTP por ticker).
+    """
+    infos, missing = {}, []
+    for ticker in dict.fromkeys(tickers):
+        cached = DATA_CACHE.get(("yf_info", ticker), max_age)
+        if cached is MISS: missing.append(ticker)
+        else: infos[ticker] = cached
+
+    if missing:
+        from concurrent.futures import ThreadPoolExecutor
+        count_provider_call("yfinance", len(missing))  # Contado aqui: o coletor de tempos é por thread
+        with ThreadPoolExecutor(max_workers=min(workers, len(missing))) as pool:
+            for ticker, info in zip(missing, pool.map(_download_info, missing)):
+                infos[ticker] = info
+                if info: DATA_CACHE.set(("yf_info", ticker), info)
+    return {t: infos[t] for t in tickers if t in infos}
@@ -0,0 +1,85 @@
+# pag/real_rates.py
+"""
+Juro real brasileiro (ex-post e ex-ante), o mesmo resultado para as páginas Macro e Renda Fixa.
+
+As séries de entrada ficam inteiras no cache persistente e são atualizadas de
+forma incremental (providers.fetch_bcb_incremental): Selic diária (SGS 11, %
+a.d.), Selic meta (SGS 432) e IPCA mensal (SGS 433). A capitalização é feita
+nos fatores, de forma vetorizada:
+
+- Selic do mês = produto dos fatores diários (soma dos log1p por mês);
+- Selic e IPCA de 12 meses = produto dos 12 fatores mensais (janela móvel dos log1p);
+- Ex-post: (1 + Selic 12m) / (1 + IPCA 12m) - 1;
+- Ex-ante: (1 + juro pré de 1 ano) / (1 + IPCA esperado para 12 meses) - 1, com
+  a mediana do Focus quando ela já estiver no cache local (o warm-up a baixa);
+  sem a curva pré, a Selic meta faz o papel da taxa nominal.
+
+O resultado também fica no cache persistente, com chave pela última data de
+cada entrada: só é recalculado quando alguma série ganha um dado novo.
+"""
+
+import numpy as np
+import pandas as pd
+
+from pag import curves, providers
+from pag.cache import DATA_CACHE, MISS
+from pag.registry import REAL_RATE_SERIES, REAL_RATE_START
+
+REAL_RATE_PLOT_COLUMNS = ["Juro Real Ex-Post (%)", "Juro Real Ex-Ante (%)"]
+REAL_RATE_COLUMNS = ["Selic 12m (%)", "IPCA 12m (%)", "Juro Real Ex-Post (%)", "Juro Nominal 1 Ano (%)", "IPCA Esperado 12m (%)", "Juro Real Ex-Ante (%)"]
+
+
+# --- CAPITALIZAÇÃO ---
+def monthly_from_daily(daily_pct):
+    """Taxa de cada mês (decimal) a partir de taxas diárias em % a.d. (produto dos fatores diários)."""
+    return np.expm1(np.log1p(daily_pct.dropna() / 100).resample("ME").sum())
+
+def compound(monthly, months=12):
+    """Taxa acumulada (decimal) em janelas móveis de `months` meses: produto dos fatores mensais."""
+    return np.expm1(np.log1p(monthly).rolling(months).sum())
+
+def fisher(nominal, inflation):
+    """Taxa real (decimal) pela equação de Fisher, com nominal e inflação em decimal."""
+    return (1 + nominal) / (1 + inflation) - 1
+
+
+# --- JURO REAL ---
+def _inputs(max_age):
+    series = {name: providers.fetch_bcb_incremental(code, REAL_RATE_START, max_age) for name, code in REAL_RATE_SERIES.items()}
+    series["Focus"] = providers.fetch_focus_ipca_12m(REAL_RATE_START, max_age=None)
+    try: series["Pré 1 Ano"] = curves.curve_panel("BR").get(1.0)
+    except Exception: series["Pré 1 Ano"] = None
+    return series
+
+def compute_real_rates(series):
+    """DataFrame mensal (fim de mês) com REAL_RATE_COLUMNS, em % a.a.; colunas ex-ante vazias sem o Focus."""
+    selic_12m = compound(monthly_from_daily(series["Selic diária"]))
+    ipca_12m = compound(series["IPCA"].dropna().resample("ME").last() / 100)
+    df = pd.DataFrame({"Selic 12m (%)": selic_12m, "IPCA 12m (%)": ipca_12m})
+    df["Juro Real Ex-Post (%)"] = fisher(df["Selic 12m (%)"], df["IPCA 12m (%)"])
+
+    nominal = series.get("Pré 1 Ano")
+    if nominal is None or nominal.dropna().empty: nominal = series["Selic meta"]
+    df["Juro Nominal 1 Ano (%)"] = nominal.dropna().resample("ME").last().reindex(df.index) / 100
+    focus = series.get("Focus")
+    df["IPCA Esperado 12m (%)"] = focus.resample("ME").last().reindex(df.index) / 100 if focus is not None and not focus.empty else np.nan
+    df["Juro Real Ex-Ante (%)"] = fisher(df["Juro Nominal 1 Ano (%)"], df["IPCA Esperado 12m (%)"])
+    return (df[REAL_RATE_COLUMNS] * 100).dropna(how="all")
+
+def real_rate_history(max_age=providers.SCHEDULED):
+    """Histórico mensal do juro real (ver compute_real_rates), recalculado só quando as entradas mudam."""
+    series = _inputs(max_age)
+    stamp = tuple((name, None if s is None or s.empty else (len(s), str(s.index[-1]), float(s.iloc[-1]))) for name, s in series.items())
+    key = ("real_rates", stamp)
+    cached = DATA_CACHE.get(key)
+    if cached is not MISS: return cached
+    if series["Selic diária"].empty or series["IPCA"].empty: return pd.DataFrame(columns=REAL_RATE_COLUMNS)
+    result = compute_real_rates(series)
+    DATA_CACHE.set(key, result)
+    return result
+
+
+def real_rate_series(history, start_date):
+    """Colunas de juro real com dados a partir de start_date (o ex-ante só aparece com o Focus no cache)."""
+    window = history.loc[providers.resolve_start(start_date):]
+    return window[[c for c in REAL_RATE_PLOT_COLUMNS if c in window.columns and window[c].notna().any()]].dropna(how="all")
@@ -0,0 +1,135 @@
+# pag/registry.py
+"""
+Registro central das séries, curvas e painéis de mercado usados pelas páginas
+Macro Hub e Renda Fixa.
+
+O job de warm-up percorre este registro para deixar o cache persistente
+aquecido. Ao adicionar um indicador novo em uma página, registre-o aqui também.
+"""
+
+# --- DATAS INICIAIS USADAS PELAS PÁGINAS ---
+# As datas iniciais são fixas: elas entram nas chaves do cache persistente e da agenda de
+# divulgação (pag.freshness), e uma data relativa ("-5y") mudaria a chave todo dia. Janelas
+# móveis são recortadas na leitura.
+MACRO_START = "2012-01-01"
+RENDA_FIXA_START = "2000-01-01"  # Mesmo histórico dos spreads do Analisador de Títulos (CREDIT_SPREAD_START)
+RENDA_FIXA_WINDOW = "-5y"        # Renda Fixa exibe a janela móvel de 5 anos
+CURVE_HISTORY_START = "2005-01-01"     # Curvas: histórico diário completo por prazo (pag/curves.py)
+BR_CURVE_HISTORY_START = "2015-01-01"  # Guardado de forma incremental (o SGS limita as consultas diárias a 10 anos)
+MARKET_HISTORY_START = MACRO_START  # Preços do Yahoo Finance (mesma data dos painéis de mercado, para dividir o cache por ticker)
+
+
+def _indicator(source, code, name, title, unit="Índice", is_pct_change=False, country=None):
+    return {"source": source, "code": code, "name": name, "title": title, "unit": unit, "is_pct_change": is_pct_change, "country": country}
+
+
+# --- INDICADORES DO BANCO CENTRAL DO BRASIL (SGS) ---
+BCB_INDICATORS = [
+    _indicator('bcb', 4393, 'ICC', "Confiança do Consumidor (FGV)", "Índice", country="Brasil"),
+    _indicator('bcb', 21864, 'PMS', "Volume de Serviços (PMS)", "Var. Anual %", country="Brasil"),
+    _indicator('bcb', 21859, 'PIM', "Produção Industrial (PIM-PF)", "Var. Anual %", country="Brasil"),
+    _indicator('bcb', 24364, 'IBC-Br', "IBC-Br (Prévia do PIB)", "Índice", country="Brasil"),
+    _indicator('bcb', 24369, 'Desemprego', "Taxa de Desemprego (PNADC)", "%", country="Brasil"),
+    _indicator('bcb', 28795, 'Renda Formal', "Renda Média Real (Trabalhador com Carteira)", "Var. Anual %", country="Brasil"),
+    _indicator('bcb', 28794, 'Renda Total', "Renda Média Real (Todos os Trabalhos - Setor Privado)", "Var. Anual %", country="Brasil"),
+    _indicator('bcb', 433, 'IPCA', "IPCA (Variação Mensal)", "%", country="Brasil"),
+    _indicator('bcb', 11427, 'Núcleos', "Média dos Núcleos do IPCA (Variação Mensal)", "%", country="Brasil"),
+    _indicator('bcb', 4449, 'Bens', "IPCA - Bens Industrializados (MoM)", "%", country="Brasil"),
+    _indicator('bcb', 4448, 'Serviços', "IPCA - Serviços (MoM)", "%", country="Brasil"),
+    _indicator('bcb', 189, 'IGPM', "IGP-M (Variação Mensal)", "%", country="Brasil"),
+    _indicator('bcb', 4390, 'Selic', "Taxa Selic Meta", "%", country="Brasil"),
+    _indicator('bcb', 4380, 'PIB', "PIB Acumulado 12 Meses", "%", country="Brasil"),
+    _indicator('bcb', 13621, 'Base Monetaria', "Base Monetária", "R$ Bilhões", country="Brasil"),
+    _indicator('bcb', 4513, 'Divida/PIB', "Dívida Líquida / PIB", "%", country="Brasil"),
+    _indicator('bcb', 27841, 'M2', "Agregado Monetário M2", "R$ Bilhões", country="Brasil"),
+]
+
+# Entradas do juro real (pag/real_rates.py): histórico completo, atualizado de forma incremental
+REAL_RATE_START = "2000-01-01"
+REAL_RATE_SERIES = {"Selic diária": 11, "Selic meta": 432, "IPCA": 433}
+
+# --- INDICADORES DO FRED ---
+FRED_INDICATORS = [
+    # Atividade
+    _indicator('fred', "AMTMNO", "AMTMNO", "Novas Ordens da Indústria (Manufatura)", "Var. Anual %", True, "EUA"),
+    _indicator('fred', "MANEMP", "MANEMP", "Emprego na Indústria (Manufatura)", "Var. Anual %", True, "EUA"),
+    _indicator('fred', "CES3000000003", "CES3000000003", "Salário Médio por Hora na Indústria", "Var. Anual %", True, "EUA"),
+    _indicator('fred', "USPBS", "USPBS", "Emprego em Serviços Profissionais", "Var. Anual %", True, "EUA"),
+    _indicator('fred', "INDPRO", "INDPRO", "Produção Industrial Total", "Var. Anual %", True, "EUA"),
+    _indicator('fred', "PCEC96", "PCEC96", "Consumo Pessoal Real (PCE)", "Var. Anual %", True, "EUA"),
+    _indicator('fred', "RSXFS", "RSXFS", "Vendas no Varejo (Ex-Alimentação)", "Var. Anual %", True, "EUA"),
+    _indicator('fred', "UMCSENT", "UMCSENT", "Sentimento do Consumidor (Univ. Michigan)", "Índice", False, "EUA"),
+    # Mercado de trabalho
+    _indicator('fred', "UNRATE", "UNRATE", "Taxa de Desemprego", "%", False, "EUA"),
+    _indicator('fred', "PAYEMS", "PAYEMS", "Criação de Vagas (Nonfarm Payrolls)", "Milhares", False, "EUA"),
+    _indicator('fred', "JTSJOL", "JTSJOL", "Vagas em Aberto (JOLTS)", "Milhares", False, "EUA"),
+    _indicator('fred', "CES0500000003", "CES0500000003", "Crescimento dos Salários (Average Hourly Earnings)", "Var. Anual %", True, "EUA"),
+    # Inflação
+    _indicator('fred', "CPIAUCSL", "CPIAUCSL", "CPI Cheio", "Var. Anual %", True, "EUA"),
+    _indicator('fred', "CPILFESL", "CPILFESL", "Core CPI (Núcleo)", "Var. Anual %", True, "EUA"),
+    _indicator('fred', "CUSR0000SAD", "CUSR0000SAD", "CPI - Bens Duráveis (Variação Mensal)", "Var. Mensal %", False, "EUA"),
+    _indicator('fred', "CUSR0000SASLE", "CUSR0000SASLE", "CPI - Serviços (Variação Mensal)", "Var. Mensal %", False, "EUA"),
+    _indicator('fred', "PCEPI", "PCEPI", "PCE Cheio", "Var. Anual %", True, "EUA"),
+    _indicator('fred', "PCEPILFE", "PCEPILFE", "Core PCE (Núcleo)", "Var. Anual %", True, "EUA"),
+    _indicator('fred', "PPIACO", "PPIACO", "PPI Cheio", "Var. Anual %", True, "EUA"),
+    _indicator('fred', "WPSFD4131", "WPSFD4131", "Core PPI (Núcleo)", "Var. Anual %", True, "EUA"),
+    _indicator('fred', "MICH", "MICH", "Expectativa de Inflação (Univ. Michigan - 1 Ano)", "%", False, "EUA"),
+    # Imobiliário
+    _indicator('fred', "MORTGAGE30US", "MORTGAGE30US", "Taxa de Financiamento Imobiliário 30 Anos", "%", False, "EUA"),
+    _indicator('fred', "PERMIT", "PERMIT", "Permissões de Construção (Permits)", "Milhares", True, "EUA"),
+    _indicator('fred', "HOUST", "HOUST", "Casas Iniciadas (Housing Starts)", "Milhares", True, "EUA"),
+    _indicator('fred', "HSN1F", "HSN1F", "Venda de Casas Novas", "Milhares", True, "EUA"),
+    _indicator('fred', "EXHOSLUSM495S", "EXHOSLUSM495S", "Venda de Casas Usadas", "Milhares", True, "EUA"),
+    _indicator('fred', "NHFSEPUCS", "NHFSEPUCS", "Estoque de Casas Novas à Venda", "Milhares", True, "EUA"),
+    _indicator('fred', "CSUSHPISA", "CSUSHPISA", "Índice de Preços de Imóveis (Case-Shiller)", "Índice", True, "EUA"),
+    # Juros e política monetária
+    _indicator('fred', "FEDFUNDS", "FEDFUNDS", "Fed Funds Rate (Taxa Básica)", "%", False, "EUA"),
+    _indicator('fred', "DFII10", "DFII10", "Juro Real de 10 Anos (TIPS)", "%", False, "EUA"),
+    _indicator('fred', "DGS10", "DGS10", "Treasury 10 Anos", "%", False, "EUA"),
+    _indicator('fred', "DGS2", "DGS2", "Treasury 2 Anos", "%", False, "EUA"),
+    _indicator('fred', "DGS3MO", "DGS3MO", "Treasury 3 Meses", "%", False, "EUA"),
+    _indicator('fred', "GDPC1", "GDPC1", "PIB Real dos EUA", "Var. Anual %", True, "EUA"),
+    _indicator('fred', "GFDEGDQ188S", "GFDEGDQ188S", "Dívida Pública / PIB", "%", False, "EUA"),
+    _indicator('fred', "WALCL", "WALCL", "Ativos Totais no Balanço do Fed", "$ Milhões", False, "EUA"),
+    _indicator('fred', "M1SL", "M1SL", "Agregado Monetário M1", "Var. Anual %", True, "EUA"),
+    _indicator('fred', "M2SL", "M2SL", "Agregado Monetário M2", "Var. Anual %", True, "EUA"),
+]
+
+# Séries do FRED usadas pela página de Renda Fixa (janela de 5 anos)
+RENDA_FIXA_FRED_SERIES = {
+    "Spread High Yield": "BAMLH0A0HYM2", "Spread Investment Grade": "BAMLC0A4CBBB",
+    "Breakeven 10 Anos": "T10YIE", "Breakeven 5 Anos": "T5YIE",
+    "TIPS 10 Anos": "DFII10", "Índice MOVE": "MOVE",
+}
+# Spreads de crédito do Analisador de Títulos (histórico longo)
+CREDIT_SPREAD_START = "2000-01-01"
+CREDIT_SPREAD_SERIES = {"BBB": "BAMLC0A4CBBB", "HY": "BAMLH0A0HYM2"}
+
+# --- COMPOSTOS DE DIFUSÃO E MOMENTO (pag/composites.py) ---
+# Juros, agregados monetários e dívida ficam de fora (são política, não atividade);
+# nos invertidos, alta do indicador = economia mais fraca
+COMPOSITE_EXCLUDE = {"Selic", "Base Monetaria", "M2", "Divida/PIB", "FEDFUNDS", "DFII10", "DGS10", "DGS2", "DGS3MO", "MORTGAGE30US", "GFDEGDQ188S", "WALCL", "M1SL", "M2SL"}
+COMPOSITE_INVERTED = {"Desemprego", "UNRATE", "NHFSEPUCS"}
+# Transformações próprias dos compostos: índices de preço entram pela variação mensal (como a
+# página os plota) e o estoque de empregos pela variação anual, em vez do nível com tendência
+COMPOSITE_STEPS = {"CUSR0000SAD": ("mom",), "CUSR0000SASLE": ("mom",), "PAYEMS": ("yoy",)}
+
+# --- CURVAS DE JUROS ---
+US_CURVE_TENORS = {'1 Mês':'DGS1MO','3 Meses':'DGS3MO','6 Meses':'DGS6MO','1 Ano':'DGS1','2 Anos':'DGS2','3 Anos':'DGS3','5 Anos':'DGS5','7 Anos':'DGS7','10 Anos':'DGS10','20 Anos':'DGS20','30 Anos':'DGS30'}
+BR_CURVE_TENORS = {"1 Ano": 12469, "2 Anos": 12470, "3 Anos": 12471, "5 Anos": 12473, "10 Anos": 12478}
+# Prazo de cada vértice em anos (usado no ajuste das curvas)
+CURVE_MATURITIES = {'1 Mês': 1/12, '3 Meses': 0.25, '6 Meses': 0.5, '1 Ano': 1, '2 Anos': 2, '3 Anos': 3, '5 Anos': 5, '7 Anos': 7, '10 Anos': 10, '20 Anos': 20, '30 Anos': 30}
+
+# --- PAINÉIS DE MERCADO (Mercados Globais) ---
+MARKET_PANELS = {
+    "Índices Globais": {"S&P 500": "^GSPC", "Ibovespa": "^BVSP", "Nasdaq": "^IXIC", "DAX (Alemanha)": "^GDAXI", "Nikkei (Japão)": "^N225"},
+    "Estilo": {"Growth (Crescimento)": "VUG", "Value (Valor)": "VTV"},
+    "Commodities": {"Petróleo WTI": "CL=F", "Ouro": "GC=F"},
+    "Câmbio": {"Dólar/Real": "BRL=X", "Euro/Dólar": "EURUSD=X"},
+    "Risco": {"VIX": "^VIX"},
+}
+
+
+def all_indicators():
+    """Todos os indicadores registrados (BCB + FRED)."""
+    return BCB_INDICATORS + FRED_INDICATORS
@@ -0,0 +1,90 @@
+# pag/research.py
+"""
+Coleta e scores do Research de Empresas (sem dependência do Streamlit).
+
+analyze_company() reúne tudo o que o botão "Analisar" precisa — cadastro e
+demonstrativos do ticker, premissas do DCF, múltiplos dos concorrentes e o
+score de momento — e roda como job em segundo plano (ver pag/jobs.py).
+"""
+
+import numpy as np
+import pandas as pd
+
+from pag import providers
+from pag.instrumentation import count_provider_call
+from pag.registry import MARKET_HISTORY_START
+
+COMPS_COLUMNS = ['Ativo', 'Empresa', 'P/L', 'P/VP', 'EV/EBITDA', 'Dividend Yield (%)', 'ROE (%)', 'Margem Bruta (%)']
+
+
+def fetch_financial_data(ticker_symbol):
+    """Cadastro e demonstrativos anuais (DRE, BP e fluxo de caixa) de um ticker, ou {"error": ...}."""
+    import yfinance as yf
+    try:
+        ticker_obj = yf.Ticker(ticker_symbol)
+        count_provider_call("yfinance")
+        # O '.info' é a chamada mais sensível, verificamos sua validade primeiro.
+        info = ticker_obj.info
+        if not info.get('longName'):
+            return {"error": f"Ticker '{ticker_symbol}' não encontrado ou sem dados."}
+        count_provider_call("yfinance", 3)
+        return {"info": info, "income_stmt": ticker_obj.income_stmt, "balance_sheet": ticker_obj.balance_sheet, "cash_flow": ticker_obj.cashflow}
+    except Exception as e:
+        return {"error": f"Erro ao buscar dados para {ticker_symbol}: {e}"}
+
+
+def dcf_inputs(financial_data):
+    """FCF, dívida líquida, ações em circulação e EBITDA a partir dos demonstrativos já baixados (None se faltar dado)."""
+    try:
+        info, cashflow_statement, balance_sheet = financial_data["info"], financial_data["cash_flow"], financial_data["balance_sheet"]
+        fcf = cashflow_statement.loc['Operating Cash Flow'].iloc[0] + cashflow_statement.loc['Capital Expenditure'].iloc[0]
+        net_debt = balance_sheet.loc['Total Liabilities Net Minority Interest'].iloc[0] - balance_sheet.loc['Cash And Cash Equivalents'].iloc[0]
+        return {'fcf': fcf, 'net_debt': net_debt, 'shares_outstanding': info['sharesOutstanding'], 'ebitda': info.get('ebitda')}
+    except Exception: return None
+
+
+def key_stats(infos):
+    """Tabela de múltiplos (Comps) a partir dos cadastros {ticker: info} dos concorrentes."""
+    rows = []
+    for info in infos.values():
+        if not info: continue
+        try:
+            rows.append({'Ativo': info.get('symbol'), 'Empresa': info.get('shortName'), 'P/L': info.get('trailingPE'), 'P/VP': info.get('priceToBook'), 'EV/EBITDA': info.get('enterpriseToEbitda'), 'Dividend Yield (%)': info.get('dividendYield', 0) * 100, 'ROE (%)': info.get('returnOnEquity', 0) * 100, 'Margem Bruta (%)': info.get('grossMargins', 0) * 100})
+        except Exception: continue
+    return pd.DataFrame(rows, columns=COMPS_COLUMNS)
+
+
+def momentum_score(ticker_symbol):
+    """Tendência (preço vs. média de 200 dias) e força relativa de 3/6/9 meses contra o índice local."""
+    scores = {}
+    benchmark = '^BVSP' if '.SA' in ticker_symbol else '^GSPC'
+    try:
+        data = providers.fetch_market_data([ticker_symbol, benchmark], MARKET_HISTORY_START)
+        if not data.empty: data = data.loc[providers.resolve_start("-1y"):]
+        if data.empty or ticker_symbol not in data.columns: return 0, {}
+        sma200 = data[ticker_symbol].rolling(window=200).mean()
+        scores['Tendência Longo Prazo (vs. MME200)'] = 100 if data[ticker_symbol].iloc[-1] > sma200.iloc[-1] else 0
+        returns = data.pct_change()
+        for period in [3, 6, 9]:
+            days = int(period * 21)
+            if len(data) > days:
+                asset_return = (1 + returns[ticker_symbol].tail(days)).prod() - 1
+                bench_return = (1 + returns[benchmark].tail(days)).prod() - 1
+                scores[f'Força Relativa {period}M'] = 100 if asset_return > bench_return else 0
+    except Exception: return 0, {}
+    if not scores: return 0, {}
+    return np.mean(list(scores.values())), scores
+
+
+def analyze_company(ticker_symbol, peer_tickers, progress=None):
+    """Todos os dados do "Analisar": demonstrativos, premissas do DCF, Comps e momento."""
+    progress = progress or (lambda fraction, message="": None)
+    progress(0.05, f"Buscando cadastro e demonstrativos de {ticker_symbol}...")
+    data = fetch_financial_data(ticker_symbol)
+    if data.get("error"): return data
+    data["dcf_data"] = dcf_inputs(data)
+    progress(0.5, f"Buscando múltiplos de {len(peer_tickers)} concorrente(s)...")
+    data["comps_df"] = key_stats(providers.fetch_ticker_infos(peer_tickers)) if peer_tickers else pd.DataFrame()
+    progress(0.8, "Calculando o score de momento...")
+    data["momentum"] = momentum_score(ticker_symbol)
+    return data
@@ -0,0 +1,150 @@
+# pag/snapshot.py
+"""
+Serviço de snapshot de mercado para o Dashboard Principal.
+
+Uma única thread em segundo plano atualiza as cotações da página inicial em
+intervalos fixos e publica o resultado em um objeto imutável. Todas as sessões
+leem a mesma referência (O(1)), de modo que N usuários logando ao mesmo tempo
+geram uma única chamada ao provedor de dados.
+
+O snapshot guardado em disco só é desserializado pela thread do serviço: o
+pickle traz um DataFrame (e, com ele, o pandas), e o formulário de login não
+deve pagar essa importação.
+"""
+
+import os
+import pickle
+import threading
+import time
+from datetime import datetime
+
+from pag.config import cache_path
+
+# --- PARÂMETROS DO SERVIÇO ---
+HOMEPAGE_TICKERS = {"S&P 500": "^GSPC", "Ibovespa": "^BVSP", "Dólar (USD/BRL)": "BRL=X", "VIX": "^VIX", "US 10Y Treasury": "^TNX"}
+REFRESH_SECONDS = 300    # Atualiza o snapshot a cada 5 minutos
+RETRY_SECONDS = 30       # Em caso de falha, tenta novamente mais cedo
+SNAPSHOT_FILE = cache_path("snapshot", "homepage.pkl")
+
+
+class MarketSnapshot:
+    """Fotografia imutável dos dados de mercado da página inicial."""
+
+    def __init__(self, quotes, history, updated_at):
+        self.quotes = quotes          # {nome: {"price": float, "change": float}}
+        self.history = history        # DataFrame de fechamentos diários (1 mês), colunas = tickers
+        self.updated_at = updated_at  # datetime da coleta
+
+    def age_seconds(self):
+        return (datetime.now() - self.updated_at).total_seconds()
+
+    def age_label(self):
+        """Texto amigável com a idade do snapshot (ex: 'há 3 min')."""
+        age = self.age_seconds()
+        if age < 60: return "há menos de 1 min"
+        if age < 3600: return f"há {int(age // 60)} min"
+        return f"há {age / 3600:.1f} h"
+
+
+def build_snapshot(close_df, tickers=HOMEPAGE_TICKERS):
+    """Monta um MarketSnapshot a partir de um DataFrame de fechamentos (colunas = tickers)."""
+    quotes = {}
+    for name, ticker in tickers.items():
+        if ticker in close_df.columns:
+            prices = close_df[ticker].dropna()
+            if len(prices) >= 2:
+                latest_price, previous_price = prices.iloc[-1], prices.iloc[-2]
+                quotes[name] = {"price": float(latest_price), "change": float(((latest_price / previous_price) - 1) * 100)}
+    return MarketSnapshot(quotes, close_df, datetime.now())
+
+
+def fetch_snapshot(tickers=HOMEPAGE_TICKERS):
+    """Faz UMA chamada ao provedor (1 mês de fechamentos) que alimenta as cotações e os gráficos."""
+    import yfinance as yf
+    data = yf.download(list(tickers.values()), period="1mo", progress=False)['Close']
+    if data.empty:
+        raise ValueError("O provedor não retornou dados para o snapshot de mercado.")
+    return build_snapshot(data, tickers)
+
+
+class MarketSnapshotService:
+    """Mantém o snapshot de mercado atualizado em uma thread daemon e o persiste em disco."""
+
+    def __init__(self, refresh_seconds=REFRESH_SECONDS, path=SNAPSHOT_FILE, fetcher=fetch_snapshot):
+        self.refresh_seconds = refresh_seconds
+        self.path = path
+        self.fetcher = fetcher
+        self.last_error = None
+        self.fetch_count = 0
+        self._snapshot = None  # Carregado do disco pela thread (ver _run)
+        self._ready = threading.Event()
+        self._start_lock = threading.Lock()
+        self._thread = None
+
+    # --- LEITURA (caminho quente, chamado por todas as sessões) ---
+    def get(self):
+        """Retorna o snapshot atual (ou None se ainda não houver nenhum). Leitura O(1), sem I/O."""
+        return self._snapshot
+
+    def has_cached(self):
+        """Indica se já há snapshot em memória ou em disco, sem desserializar o arquivo (não importa o pandas)."""
+        return self._snapshot is not None or os.path.exists(self.path)
+
+    def wait_ready(self, timeout=None):
+        """Bloqueia até o primeiro snapshot estar disponível. Retorna o snapshot (ou None no timeout)."""
+        self._ready.wait(timeout)
+        return self._snapshot
+
+    # --- ATUALIZAÇÃO ---
+    def start(self):
+        """Inicia a thread de atualização (idempotente)."""
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="pag-market-snapshot", daemon=True)
+                self._thread.start()
+        return self
+
+    def refresh(self):
+        """Busca um novo snapshot no provedor e o publica para todas as sessões."""
+        try:
+            snapshot = self.fetcher()
+            self.fetch_count += 1
+        except Exception as e:
+            self.last_error = str(e)
+            return False
+        self._snapshot = snapshot  # Troca atômica da referência
+        self.last_error = None
+        self._ready.set()
+        self._save_to_disk(snapshot)
+        return True
+
+    def _run(self):
+        while True:
+            # Outro processo (ex: o job de warm-up) pode ter gravado um snapshot mais recente
+            disk_snapshot = self._load_from_disk()
+            if disk_snapshot is not None and (self._snapshot is None or disk_snapshot.updated_at > self._snapshot.updated_at):
+                self._snapshot = disk_snapshot
+                self._ready.set()
+
+            current = self._snapshot
+            if current is None or current.age_seconds() >= self.refresh_seconds:
+                ok = self.refresh()
+                time.sleep(self.refresh_seconds if ok else RETRY_SECONDS)
+            else:
+                time.sleep(max(1, self.refresh_seconds - current.age_seconds()))
+
+    # --- PERSISTÊNCIA ---
+    def _load_from_disk(self):
+        if not os.path.exists(self.path): return None
+        try:
+            with open(self.path, "rb") as f: return pickle.load(f)
+        except Exception:
+            return None
+
+    def _save_to_disk(self, snapshot):
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "wb") as f: pickle.dump(snapshot, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
@@ -0,0 +1,197 @@
+# pag/store.py
+"""
+Banco SQLite das páginas: reuniões do COPOM/FOMC, visões das gestoras e a
+matriz de recomendações táticas.
+
+Substitui os arquivos copom_meetings.json, fomc_meetings.json,
+manager_views.json e recommendations.csv, que eram regravados inteiros a cada
+edição (com perda de atualizações quando dois analistas editavam ao mesmo
+tempo). Cada edição agora é uma transação sobre uma linha:
+
+- reuniões: uma linha por (banco, data); salvar a mesma data substitui a ata;
+- visões das gestoras e recomendações: só inserções (o histórico fica
+  guardado); a visão vigente é a última linha da gestora e a recomendação
+  vigente a última de cada (gestora, classe de ativo).
+
+Na primeira abertura do banco os arquivos JSON/CSV antigos que existirem na
+raiz do projeto são importados uma única vez (a migração fica registrada na
+tabela migrations) e permanecem no lugar como cópia de segurança. A migração
+também pode ser rodada à mão: python -m pag.store
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+from pag.config import ROOT_DIR, STORE_DB
+
+BANKS = ["copom", "fomc"]
+LEGACY_FILES = {
+    "copom": os.path.join(ROOT_DIR, "copom_meetings.json"),
+    "fomc": os.path.join(ROOT_DIR, "fomc_meetings.json"),
+    "manager_views": os.path.join(ROOT_DIR, "manager_views.json"),
+    "recommendations": os.path.join(ROOT_DIR, "recommendations.csv"),
+}
+LEGACY_MIGRATION = "legacy_json_csv"
+RECOMMENDATION_COLUMNS = ["Gestora", "Classe de Ativo", "Recomendação", "Data"]
+
+_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS meetings (
+        id INTEGER PRIMARY KEY, bank TEXT NOT NULL, meeting_date TEXT NOT NULL, decision TEXT NOT NULL DEFAULT '',
+        minutes_text TEXT NOT NULL DEFAULT '', pdf_path TEXT NOT NULL DEFAULT '', hawkish INTEGER, dovish INTEGER,
+        updated REAL NOT NULL, UNIQUE (bank, meeting_date))""",
+    """CREATE TABLE IF NOT EXISTS manager_views (
+        id INTEGER PRIMARY KEY, manager TEXT NOT NULL, summary TEXT NOT NULL DEFAULT '', report_file TEXT NOT NULL DEFAULT '',
+        last_updated TEXT, created REAL NOT NULL)""",
+    "CREATE INDEX IF NOT EXISTS manager_views_lookup ON manager_views (manager, id)",
+    """CREATE TABLE IF NOT EXISTS recommendations (
+        id INTEGER PRIMARY KEY, manager TEXT NOT NULL, asset_class TEXT NOT NULL, recommendation TEXT NOT NULL,
+        rec_date TEXT NOT NULL, created REAL NOT NULL)""",
+    "CREATE INDEX IF NOT EXISTS recommendations_lookup ON recommendations (manager, asset_class, rec_date)",
+    "CREATE INDEX IF NOT EXISTS recommendations_date ON recommendations (rec_date)",
+    "CREATE TABLE IF NOT EXISTS migrations (name TEXT PRIMARY KEY, applied REAL NOT NULL, details TEXT)",
+]
+
+_schema_ready = False
+
+
+# --- CONEXÃO ---
+@contextmanager
+def _db():
+    global _schema_ready
+    conn = sqlite3.connect(STORE_DB, timeout=30)
+    conn.row_factory = sqlite3.Row
+    try:
+        if not _schema_ready:
+            with conn:
+                conn.execute("PRAGMA journal_mode=WAL")  # Leituras das páginas não bloqueiam quem está salvando
+                for statement in _SCHEMA: conn.execute(statement)
+            _migrate_legacy(conn)
+            _schema_ready = True
+        with conn: yield conn
+    finally:
+        conn.close()
+
+
+# --- MIGRAÇÃO DOS ARQUIVOS JSON/CSV ---
+def _read_json(path, default):
+    try:
+        with open(path, encoding="utf-8") as f: return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return default
+
+def _migrate_legacy(conn):
+    """Importa os arquivos antigos uma única vez (a verificação e a importação ficam na mesma transação)."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if conn.execute("SELECT 1 FROM migrations WHERE name = ?", (LEGACY_MIGRATION,)).fetchone():
+            conn.rollback(); return
+        counts, now = {}, time.time()
+        for bank in BANKS:
+            meetings = _read_json(LEGACY_FILES[bank], [])
+            for m in meetings: _upsert_meeting(conn, bank, m, now)
+            counts[bank] = len(meetings)
+        views = _read_json(LEGACY_FILES["manager_views"], {})
+        for manager, view in views.items():
+            conn.execute("INSERT INTO manager_views (manager, summary, report_file, last_updated, created) VALUES (?, ?, ?, ?, ?)",
+                         (manager, view.get("summary", ""), view.get("report_file", ""), view.get("last_updated"), now))
+        counts["manager_views"] = len(views)
+        recs = pd.read_csv(LEGACY_FILES["recommendations"]) if os.path.exists(LEGACY_FILES["recommendations"]) and os.path.getsize(LEGACY_FILES["recommendations"]) else pd.DataFrame(columns=RECOMMENDATION_COLUMNS)
+        conn.executemany("INSERT INTO recommendations (manager, asset_class, recommendation, rec_date, created) VALUES (?, ?, ?, ?, ?)",
+                         [(r["Gestora"], r["Classe de Ativo"], r["Recomendação"], str(r["Data"]), now) for r in recs.to_dict("records")])
+        counts["recommendations"] = len(recs)
+        conn.execute("INSERT INTO migrations (name, applied, details) VALUES (?, ?, ?)", (LEGACY_MIGRATION, now, json.dumps(counts)))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+def migration_report():
+    """Quando e quanto foi importado dos arquivos antigos (None se a migração ainda não rodou)."""
+    with _db() as conn:
+        row = conn.execute("SELECT applied, details FROM migrations WHERE name = ?", (LEGACY_MIGRATION,)).fetchone()
+    return None if row is None else {"applied": row["applied"], **json.loads(row["details"] or "{}")}
+
+
+# --- REUNIÕES (COPOM / FOMC) ---
+def _upsert_meeting(conn, bank, meeting, now):
+    analysis = meeting.get("analysis") or {}
+    conn.execute("""INSERT INTO meetings (bank, meeting_date, decision, minutes_text, pdf_path, hawkish, dovish, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (bank, meeting_date) DO UPDATE SET decision = excluded.decision, minutes_text = excluded.minutes_text,
+                    pdf_path = excluded.pdf_path, hawkish = excluded.hawkish, dovish = excluded.dovish, updated = excluded.updated""",
+                 (bank, meeting["meeting_date"], meeting.get("decision", ""), meeting.get("minutes_text", ""), meeting.get("pdf_path", ""),
+                  analysis.get("hawkish"), analysis.get("dovish"), now))
+
+def list_meetings(bank):
+    """Reuniões do banco central em ordem de data, no formato dos antigos *_meetings.json."""
+    with _db() as conn:
+        rows = conn.execute("SELECT * FROM meetings WHERE bank = ? ORDER BY meeting_date", (bank,)).fetchall()
+    return [{"meeting_date": r["meeting_date"], "decision": r["decision"], "minutes_text": r["minutes_text"], "pdf_path": r["pdf_path"],
+             "analysis": {"hawkish": r["hawkish"], "dovish": r["dovish"]}} for r in rows]
+
+def save_meeting(bank, meeting):
+    """Grava (ou substitui, na mesma data) uma reunião: só a linha dela é escrita."""
+    with _db() as conn: _upsert_meeting(conn, bank, meeting, time.time())
+
+def delete_meeting(bank, meeting_date):
+    with _db() as conn: conn.execute("DELETE FROM meetings WHERE bank = ? AND meeting_date = ?", (bank, meeting_date))
+
+
+# --- VISÕES DAS GESTORAS ---
+def manager_views():
+    """Visão vigente de cada gestora: {gestora: {"summary", "report_file", "last_updated"}}."""
+    with _db() as conn:
+        rows = conn.execute("""SELECT v.* FROM manager_views v JOIN (SELECT manager, MAX(id) AS id FROM manager_views GROUP BY manager) last
+                               ON v.id = last.id""").fetchall()
+    return {r["manager"]: {"summary": r["summary"], "report_file": r["report_file"], "last_updated": r["last_updated"]} for r in rows}
+
+def save_manager_view(manager, summary, report_file=None, last_updated=None):
+    """Acrescenta uma versão da visão da gestora; sem report_file, mantém o relatório da versão anterior."""
+    last_updated = last_updated or time.strftime("%Y-%m-%d")
+    with _db() as conn:
+        conn.execute("""INSERT INTO manager_views (manager, summary, report_file, last_updated, created)
+                        VALUES (?, ?, COALESCE(?, (SELECT report_file FROM manager_views WHERE manager = ? ORDER BY id DESC LIMIT 1), ''), ?, ?)""",
+                     (manager, summary, report_file, manager, last_updated, time.time()))
+
+def manager_view_history(manager):
+    """Todas as versões da visão de uma gestora, da mais recente para a mais antiga."""
+    with _db() as conn:
+        rows = conn.execute("SELECT summary, report_file, last_updated FROM manager_views WHERE manager = ? ORDER BY id DESC", (manager,)).fetchall()
+    return [dict(r) for r in rows]
+
+
+# --- RECOMENDAÇÕES TÁTICAS ---
+def recommendations(latest_only=False):
+    """
+    Recomendações (RECOMMENDATION_COLUMNS); latest_only=True deixa só a vigente de cada (gestora, classe de ativo):
+    a de Data mais recente (no empate, a última incluída), e não a última digitada.
+    """
+    query = "SELECT manager, asset_class, recommendation, rec_date FROM recommendations AS r"
+    if latest_only:
+        query += (" WHERE id = (SELECT id FROM recommendations WHERE manager = r.manager AND asset_class = r.asset_class"
+                  " ORDER BY rec_date DESC, id DESC LIMIT 1)")
+    with _db() as conn:
+        rows = conn.execute(query + " ORDER BY rec_date, id").fetchall()
+    return pd.DataFrame([tuple(r) for r in rows], columns=RECOMMENDATION_COLUMNS)
+
+def add_recommendation(manager, asset_class, recommendation, rec_date=None):
+    """Acrescenta uma recomendação (a anterior da mesma gestora e classe fica no histórico)."""
+    with _db() as conn:
+        conn.execute("INSERT INTO recommendations (manager, asset_class, recommendation, rec_date, created) VALUES (?, ?, ?, ?, ?)",
+                     (manager, asset_class, recommendation, rec_date or time.strftime("%Y-%m-%d"), time.time()))
+
+
+def main():
+    report = migration_report()  # Abrir o banco já roda a migração pendente
+    print(f"Banco: {STORE_DB}")
+    print("Migração dos arquivos JSON/CSV: " + (", ".join(f"{k}: {v}" for k, v in report.items() if k != "applied") if report else "não executada"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
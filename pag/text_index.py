@@ -0,0 +1,308 @@
+# pag/text_index.py
+"""
+Índice de texto das atas de bancos centrais (COPOM e FOMC) e placar de léxicos.
+
+Cada texto é tokenizado uma única vez: os tokens (minúsculos e sem acentos, de
+modo que "inflação" e "inflacao" coincidem), a posição de cada token no texto
+original e a lista invertida posicional do documento ficam no cache persistente,
+com chave pelo hash do texto. Um texto novo ou editado é o único reprocessado.
+
+- Placar: os termos de um léxico (palavras ou expressões, ex: "acima da meta")
+  viram um autômato de Aho-Corasick sobre tokens, e todas as ocorrências de todos
+  os termos saem em uma única passada pelos tokens. Como a comparação é por
+  token, "cut" não conta dentro de "executed" (o text.count antigo contava). As
+  flexões entram como formas explícitas ("cuts", "fracos") ou como prefixo com
+  "*" ("hik*" = hike, hikes, hiked, hiking; "lucr*" = lucro, lucros, lucrativo),
+  que o text.count pegava por acaso e a comparação exata por token perderia.
+- Índice do acervo: as listas invertidas dos documentos são unidas em
+  token -> {documento: posições}; a busca de expressões cruza as posições dos
+  tokens consecutivos (np.intersect1d), começando pelo token mais raro.
+- Tom ao longo do tempo: o placar de cada ata do acervo em uma tabela por data.
+"""
+
+import hashlib
+import re
+import threading
+import unicodedata
+from collections import OrderedDict, defaultdict, deque
+
+import numpy as np
+import pandas as pd
+
+from pag.cache import DATA_CACHE, MISS
+
+# Léxicos padrão por idioma: rótulo -> termos (palavras ou expressões)
+# (termos terminados em "*" valem como prefixo: "hik*" conta hike, hikes, hiked e hiking)
+DISCOURSE_LEXICONS = {
+    "en": {
+        "hawkish": ["strong", "stronger", "tighten*", "inflation*", "rais*", "hik*", "robust", "above target"],
+        "dovish": ["easing", "ease", "eased", "eases", "cut", "cuts", "cutting", "recession*", "unemployment", "weak*", "below target", "supportive"],
+    },
+    "pt": {
+        "hawkish": ["forte", "fortes", "apert*", "inflação", "inflações", "inflacion*", "aument*", "robust*", "acima da meta"],
+        "dovish": ["afrouxa*", "corte", "cortes", "cortar", "cortou", "cortando", "recessão", "recessões", "recessiv*", "desemprego",
+                   "fraco", "fraca", "fracos", "fracas", "abaixo da meta", "suporte"],
+    },
+}
+# Léxico das manchetes de notícias (página de Research)
+NEWS_LEXICON = {
+    "positivo": ["cresc*", "lucr*", "aument*", "supera*", "superou", "expans*", "forte", "fortes", "otimis*", "sucesso", "melhor*", "compra",
+                 "grow*", "profit*", "increas*", "beat", "beats", "expan*", "strong*", "optimis*", "success*", "improv*", "buy", "upgrad*"],
+    "negativo": ["queda", "quedas", "prejuízo*", "redução", "reduções", "reduz*", "abaixo", "contração", "contrações", "fraco", "fraca", "fracos", "fracas",
+                 "pessimis*", "falha*", "pior*", "venda", "vendas",
+                 "fall", "falls", "fell", "falling", "loss", "losses", "reduction*", "below", "contraction*", "weak*", "fail*",
+                 "worsen*", "sell", "sells", "selling", "downgrad*"],
+}
+
+SNIPPET_TOKENS = 12  # Tokens de contexto de cada lado nos trechos da busca
+INDEX_MEMO_SIZE = 8
+
+_TOKEN_RE = re.compile(r"\w+")
+_folded = {}
+_matchers = {}
+_indexes = OrderedDict()
+_lock = threading.Lock()
+
+
+# --- TOKENIZAÇÃO ---
+def fold(token):
+    """Token em minúsculas e sem acentos (memoizado: o vocabulário é pequeno)."""
+    folded = _folded.get(token)
+    if folded is None:
+        folded = unicodedata.normalize("NFKD", token.lower()).encode("ascii", "ignore").decode() or token.lower()
+        _folded[token] = folded
+    return folded
+
+def tokenize(text):
+    """Tokens normalizados de um texto."""
+    return [fold(m.group()) for m in _TOKEN_RE.finditer(text or "")]
+
+def text_hash(text):
+    return hashlib.sha1((text or "").encode("utf-8")).hexdigest()
+
+def document(text):
+    """
+    Tokens, posições (início, fim) de cada token no texto original e lista invertida
+    posicional {token: posições} de um texto; calculado uma vez por texto (cache pelo hash).
+    """
+    key = ("text_document", text_hash(text))
+    doc = DATA_CACHE.get(key)
+    if doc is not MISS: return doc
+    matches = list(_TOKEN_RE.finditer(text or ""))
+    tokens = [fold(m.group()) for m in matches]
+    positions = defaultdict(list)
+    for i, token in enumerate(tokens): positions[token].append(i)
+    doc = {"tokens": tokens, "spans": np.array([m.span() for m in matches], dtype=np.int64).reshape(-1, 2),
+           "postings": {token: np.array(p, dtype=np.int32) for token, p in positions.items()}}
+    DATA_CACHE.set(key, doc)
+    return doc
+
+
+# --- AHO-CORASICK SOBRE TOKENS ---
+def _term_words(term):
+    # Palavras normalizadas de um termo; "*" no fim de uma palavra a torna prefixo ("hik*")
+    words = []
+    for word in (term or "").split():
+        tokens = tokenize(word)
+        if tokens and word.endswith("*"): tokens[-1] += "*"
+        words += tokens
+    return words
+
+class TermMatcher:
+    """
+    Autômato de Aho-Corasick cujo alfabeto são tokens: conta todos os termos em uma passada.
+    Cada token vira o símbolo do maior prefixo do léxico com que começa (ou ele mesmo), nos
+    termos e no texto: assim "hik*" casa com "hikes" sem multiplicar as transições.
+    """
+
+    def __init__(self, terms):
+        words = [_term_words(term) for term in terms]
+        self.prefixes = sorted({w[:-1] for ws in words for w in ws if w.endswith("*")}, key=len, reverse=True)
+        self._symbols = {}
+        self.terms = [t for t in dict.fromkeys(self.key(term) for term in terms) if t]
+        self.goto, self.fail, self.out = [{}], [0], [[]]
+        for i, tokens in enumerate(self.terms):
+            state = 0
+            for token in tokens:
+                nxt = self.goto[state].get(token)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][token] = nxt
+                    self.goto.append({}); self.fail.append(0); self.out.append([])
+                state = nxt
+            self.out[state].append(i)
+        # Links de falha em largura: o maior sufixo próprio que também é prefixo de algum termo
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and token not in self.goto[f]: f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(token, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def symbol(self, token):
+        """Símbolo do token: o maior prefixo do léxico com que ele começa (com "*") ou o próprio token."""
+        found = self._symbols.get(token)
+        if found is None:
+            found = next((p + "*" for p in self.prefixes if token.startswith(p)), token)
+            self._symbols[token] = found
+        return found
+
+    def key(self, term):
+        """Sequência de símbolos de um termo do léxico."""
+        return tuple(self.symbol(w.rstrip("*")) for w in _term_words(term))
+
+    def counts(self, tokens):
+        """Ocorrências de cada termo (na ordem de self.terms) em uma lista de tokens."""
+        counts = np.zeros(len(self.terms), dtype=np.int64)
+        goto, fail, out, state = self.goto, self.fail, self.out, 0
+        symbol = self.symbol
+        for token in tokens:
+            token = symbol(token)
+            while state and token not in goto[state]: state = fail[state]
+            state = goto[state].get(token, 0)
+            for i in out[state]: counts[i] += 1
+        return counts
+
+
+class LexiconScorer:
+    """Placar de um léxico {rótulo: termos}: um único autômato para todos os rótulos."""
+
+    def __init__(self, lexicon):
+        self.labels = list(lexicon)
+        self.matcher = TermMatcher([term for terms in lexicon.values() for term in terms])
+        index = {tokens: i for i, tokens in enumerate(self.matcher.terms)}
+        # Matriz termos x rótulos (um termo pode estar em mais de um rótulo)
+        self.membership = np.zeros((len(self.matcher.terms), len(self.labels)), dtype=np.int64)
+        for j, label in enumerate(self.labels):
+            for term in lexicon[label]:
+                tokens = self.matcher.key(term)
+                if tokens: self.membership[index[tokens], j] = 1
+
+    def term_counts(self, tokens):
+        return self.matcher.counts(tokens)
+
+    def score(self, tokens, distinct=False):
+        """{rótulo: ocorrências}; distinct=True conta cada termo uma vez (presença, para manchetes)."""
+        counts = self.term_counts(tokens)
+        if distinct: counts = (counts > 0).astype(np.int64)
+        return dict(zip(self.labels, (counts @ self.membership).tolist()))
+
+def lexicon_key(lexicon):
+    return tuple((label, tuple(terms)) for label, terms in lexicon.items())
+
+def scorer(lexicon):
+    """LexiconScorer memoizado pelo conteúdo do léxico."""
+    key = lexicon_key(lexicon)
+    with _lock:
+        found = _matchers.get(key)
+        if found is None: found = _matchers[key] = LexiconScorer(lexicon)
+    return found
+
+def score_text(text, lexicon):
+    """Placar {rótulo: ocorrências} de um texto avulso."""
+    return scorer(lexicon).score(tokenize(text))
+
+
+# --- ÍNDICE DO ACERVO ---
+class TextIndex:
+    """Índice invertido posicional sobre um acervo {id: texto} (ex: data da reunião -> ata)."""
+
+    def __init__(self, texts):
+        self.ids = list(texts)
+        self.texts = [texts[i] or "" for i in self.ids]
+        self.hashes = [text_hash(text) for text in self.texts]
+        self.docs = [document(text) for text in self.texts]
+        self._scores = {}
+        self.postings = defaultdict(dict)
+        for n, doc in enumerate(self.docs):
+            for token, positions in doc["postings"].items(): self.postings[token][n] = positions
+
+    def phrase_positions(self, query):
+        """{nº do documento: posições iniciais} das ocorrências da expressão (tokens consecutivos)."""
+        tokens = tokenize(query)
+        if not tokens or any(t not in self.postings for t in tokens): return {}
+        # Candidatos: documentos com todos os tokens, partindo do mais raro
+        rarest = sorted(set(tokens), key=lambda t: len(self.postings[t]))
+        candidates = set(self.postings[rarest[0]])
+        for token in rarest[1:]: candidates.intersection_update(self.postings[token])
+        hits = {}
+        for n in candidates:
+            starts = self.postings[tokens[0]][n]
+            for k, token in enumerate(tokens[1:], 1):
+                starts = np.intersect1d(starts, self.postings[token][n] - k, assume_unique=True)
+                if not len(starts): break
+            if len(starts): hits[n] = starts
+        return hits
+
+    def snippet(self, n, start, length, context=SNIPPET_TOKENS):
+        """Trecho do texto original em volta de uma ocorrência (tokens start..start+length)."""
+        spans = self.docs[n]["spans"]
+        first, last = max(start - context, 0), min(start + length - 1 + context, len(spans) - 1)
+        text = self.texts[n][spans[first][0]:spans[last][1]]
+        return ("… " if first > 0 else "") + " ".join(text.split()) + (" …" if last < len(spans) - 1 else "")
+
+    def search(self, query):
+        """Documentos com a expressão: ocorrências, ocorrências por mil tokens e o trecho da primeira ocorrência."""
+        hits, length = self.phrase_positions(query), len(tokenize(query))
+        rows = [{"Documento": self.ids[n], "Ocorrências": len(starts), "Por Mil Tokens": len(starts) * 1000 / len(self.docs[n]["tokens"]),
+                 "Trecho": self.snippet(n, int(starts[0]), length)} for n, starts in hits.items()]
+        return pd.DataFrame(rows, columns=["Documento", "Ocorrências", "Por Mil Tokens", "Trecho"]).sort_values("Documento", ascending=False, ignore_index=True)
+
+    def scores(self, lexicon):
+        """
+        Placar de todos os documentos (documentos x rótulos) e o total de tokens de cada um.
+        O placar de cada documento fica no cache persistente por (hash do texto, léxico).
+        """
+        key = lexicon_key(lexicon)
+        if key not in self._scores:
+            lexicon_scorer, rows = scorer(lexicon), []
+            for digest, doc in zip(self.hashes, self.docs):
+                cache_key = ("text_scores", digest, key)
+                row = DATA_CACHE.get(cache_key)
+                if row is MISS:
+                    row = lexicon_scorer.score(doc["tokens"])
+                    DATA_CACHE.set(cache_key, row)
+                rows.append(row)
+            table = pd.DataFrame(rows, index=pd.Index(self.ids, name="Documento"), columns=lexicon_scorer.labels)
+            table["Tokens"] = [len(doc["tokens"]) for doc in self.docs]
+            self._scores[key] = table
+        return self._scores[key].copy()
+
+def corpus_index(texts):
+    """TextIndex do acervo, reaproveitado em memória enquanto nenhum texto muda (os documentos vêm do cache)."""
+    key = tuple((i, text_hash(t)) for i, t in texts.items())
+    with _lock:
+        index = _indexes.get(key)
+        if index is not None: _indexes.move_to_end(key)
+    if index is None:
+        index = TextIndex(texts)
+        with _lock:
+            _indexes[key] = index
+            while len(_indexes) > INDEX_MEMO_SIZE: _indexes.popitem(last=False)
+    return index
+
+
+# --- ATAS ---
+def meeting_texts(meetings):
+    """{data da reunião: texto da ata} de uma lista de reuniões (formato de store.list_meetings)."""
+    return {m["meeting_date"]: m.get("minutes_text", "") for m in sorted(meetings, key=lambda m: m["meeting_date"])}
+
+def tone_history(meetings, lang="pt", lexicon=None):
+    """
+    Placar hawkish/dovish, tom líquido ((hawkish - dovish) / total, entre -1 e +1) e intensidade
+    (termos por mil tokens) de cada reunião, por data.
+    """
+    lexicon = lexicon or DISCOURSE_LEXICONS[lang]
+    texts = meeting_texts(meetings)
+    if not texts: return pd.DataFrame(columns=["Hawkish", "Dovish", "Tom Líquido", "Termos por Mil Tokens", "Tokens"])
+    table = corpus_index(texts).scores(lexicon)
+    hawkish, dovish = table["hawkish"], table["dovish"]
+    total = hawkish + dovish
+    history = pd.DataFrame({"Hawkish": hawkish, "Dovish": dovish, "Tom Líquido": ((hawkish - dovish) / total.where(total > 0)).fillna(0.0),
+                            "Termos por Mil Tokens": total * 1000 / table["Tokens"].where(table["Tokens"] > 0), "Tokens": table["Tokens"]})
+    history.index = pd.to_datetime(history.index)
+    history.index.name = "Reunião"
+    return history
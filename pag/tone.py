@@ -0,0 +1,147 @@
+# pag/tone.py
+"""
+Histórico do tom das atas do COPOM e do FOMC e o que mudou de uma reunião para a seguinte.
+
+Para cada reunião: placar hawkish/dovish e tom líquido (pag.text_index) e a
+comparação frase a frase com a ata anterior (difflib sobre as frases
+normalizadas): frases novas, removidas e alteradas (pares com similaridade de
+pelo menos CHANGED_MIN_RATIO), a similaridade do texto (em tokens: as frases
+iguais contam inteiras e as alteradas pela similaridade do par) e o saldo
+hawkish das mudanças (termos hawkish - dovish do que entrou menos os do que saiu).
+
+O placar de cada ata fica no cache persistente pelo hash do texto e a
+comparação pelos hashes do par de atas: uma ata nova ou editada só reprocessa
+ela mesma e a comparação com as vizinhas.
+
+O tom pode ser sobreposto à trajetória do juro básico (Selic meta ou teto
+da meta dos Fed Funds) lida do cache de séries.
+"""
+
+import difflib
+import re
+
+import pandas as pd
+
+from pag import providers, text_index
+from pag.cache import DATA_CACHE, MISS
+from pag.registry import MACRO_START, REAL_RATE_START
+
+CHANGED_MIN_RATIO = 0.5  # Similaridade mínima (tokens) para um par de frases contar como "alterada"
+MIN_SENTENCE_TOKENS = 3
+RATE_HORIZON_DAYS = 60   # Janela da variação do juro depois da reunião
+
+# Juro básico de cada banco central: (fonte, código, data inicial, rótulo)
+POLICY_RATES = {
+    "copom": ("bcb", 432, REAL_RATE_START, "Selic Meta (%)"),
+    "fomc": ("fred", "DFEDTARU", MACRO_START, "Fed Funds Meta, Teto (%)"),  # Limite superior do intervalo-meta
+}
+
+TONE_COLUMNS = ["Hawkish", "Dovish", "Tom Líquido", "Δ Tom Líquido", "Similaridade (%)", "Frases Novas", "Frases Removidas", "Frases Alteradas", "Saldo Hawkish das Mudanças"]
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?;:])\s+(?=[A-ZÀ-Ý0-9\"“(•-])|\n\s*\n|\n(?=\s*[•\-–]|\s*\d+[.)]\s)")
+
+
+# --- FRASES ---
+def sentences(text):
+    """Frases da ata (quebra em pontuação seguida de maiúscula, parágrafos e itens de lista), com espaços normalizados."""
+    parts = (" ".join(p.split()) for p in _SENTENCE_RE.split(text or ""))
+    return [p for p in parts if len(text_index.tokenize(p)) >= MIN_SENTENCE_TOKENS]
+
+def _similarity(a, b):
+    return difflib.SequenceMatcher(None, a.split(), b.split(), autojunk=False).ratio()
+
+def sentence_diff(previous, current):
+    """
+    Diferença frase a frase entre duas atas: {"added", "removed", "changed" [(antes, depois)],
+    "unchanged", "similarity"}; a comparação é pelas frases normalizadas (minúsculas, sem acentos).
+    A similaridade é a fração dos tokens das duas atas em comum, como em SequenceMatcher.ratio():
+    uma frase que só ganhou uma palavra ainda conta quase inteira.
+    Fica no cache persistente pelos hashes das duas atas.
+    """
+    key = ("sentence_diff", "tokens", text_index.text_hash(previous), text_index.text_hash(current))
+    diff = DATA_CACHE.get(key)
+    if diff is not MISS: return diff
+    old, new = sentences(previous), sentences(current)
+    old_norm, new_norm = [" ".join(text_index.tokenize(s)) for s in old], [" ".join(text_index.tokenize(s)) for s in new]
+    matcher = difflib.SequenceMatcher(None, old_norm, new_norm, autojunk=False)
+    size = lambda s: len(s.split())
+    diff = {"added": [], "removed": [], "changed": [], "unchanged": 0, "similarity": 1.0}
+    matched = 0.0  # Tokens em comum, contados nas duas atas (2 x tokens iguais)
+    for op, i1, i2, j1, j2 in matcher.get_opcodes():
+        if op == "equal":
+            diff["unchanged"] += i2 - i1
+            matched += 2 * sum(size(s) for s in old_norm[i1:i2])
+        elif op == "delete": diff["removed"] += old[i1:i2]
+        elif op == "insert": diff["added"] += new[j1:j2]
+        else:
+            # Blocos substituídos: pares na ordem; os parecidos são alterações, o resto entra/sai
+            for k in range(max(i2 - i1, j2 - j1)):
+                i, j = i1 + k, j1 + k
+                ratio = _similarity(old_norm[i], new_norm[j]) if i < i2 and j < j2 else 0.0
+                if ratio >= CHANGED_MIN_RATIO:
+                    diff["changed"].append((old[i], new[j]))
+                    matched += ratio * (size(old_norm[i]) + size(new_norm[j]))
+                else:
+                    if i < i2: diff["removed"].append(old[i])
+                    if j < j2: diff["added"].append(new[j])
+    total = sum(map(size, old_norm)) + sum(map(size, new_norm))
+    if total: diff["similarity"] = matched / total
+    DATA_CACHE.set(key, diff)
+    return diff
+
+def change_balance(diff, lexicon):
+    """Saldo hawkish (hawkish - dovish) do que entrou menos o do que saiu da ata."""
+    scorer = text_index.scorer(lexicon)
+    def balance(parts):
+        if not parts: return 0
+        scores = scorer.score(text_index.tokenize(" \n ".join(parts)))
+        return scores["hawkish"] - scores["dovish"]
+    incoming = diff["added"] + [after for _, after in diff["changed"]]
+    outgoing = diff["removed"] + [before for before, _ in diff["changed"]]
+    return balance(incoming) - balance(outgoing)
+
+
+# --- HISTÓRICO ---
+def tone_table(meetings, lang="pt", lexicon=None):
+    """Placar, tom líquido e mudanças em relação à reunião anterior (TONE_COLUMNS), uma linha por reunião."""
+    lexicon = lexicon or text_index.DISCOURSE_LEXICONS[lang]
+    history = text_index.tone_history(meetings, lang, lexicon)
+    if history.empty: return pd.DataFrame(columns=TONE_COLUMNS)
+    texts = list(text_index.meeting_texts(meetings).values())
+    rows = [{}]
+    for previous, current in zip(texts[:-1], texts[1:]):
+        diff = sentence_diff(previous, current)
+        rows.append({"Similaridade (%)": diff["similarity"] * 100, "Frases Novas": len(diff["added"]), "Frases Removidas": len(diff["removed"]),
+                     "Frases Alteradas": len(diff["changed"]), "Saldo Hawkish das Mudanças": change_balance(diff, lexicon)})
+    table = history[["Hawkish", "Dovish", "Tom Líquido"]].join(pd.DataFrame(rows, index=history.index))
+    table["Δ Tom Líquido"] = table["Tom Líquido"].diff()
+    return table[TONE_COLUMNS]
+
+def meeting_changes(meetings, meeting_date):
+    """Diferença frase a frase entre a ata da data pedida e a anterior (None se for a primeira)."""
+    texts = text_index.meeting_texts(meetings)
+    dates = list(texts)
+    position = dates.index(meeting_date)
+    if position == 0: return None
+    return {"previous": dates[position - 1], **sentence_diff(texts[dates[position - 1]], texts[meeting_date])}
+
+
+# --- JURO BÁSICO ---
+def policy_rate(bank):
+    """Trajetória do juro básico do banco central ('copom' ou 'fomc') a partir do cache de séries."""
+    source, code, start, label = POLICY_RATES[bank]
+    series = providers.fetch_bcb_incremental(code, start) if source == "bcb" else providers.fetch_fred_series(code, start)
+    return series.dropna().rename(label)
+
+def with_policy_rate(table, rate, horizon_days=RATE_HORIZON_DAYS):
+    """Acrescenta o juro na data de cada reunião e a variação (p.p.) nos horizon_days seguintes."""
+    rate = rate.sort_index()
+    dates = table.index
+    at_meeting = rate.reindex(dates, method="ffill").to_numpy()
+    after = rate.reindex(dates + pd.Timedelta(days=horizon_days), method="ffill").to_numpy()
+    table = table.copy()
+    table[rate.name] = at_meeting
+    table[f"Variação em {horizon_days} dias (p.p.)"] = after - at_meeting
+    # Reuniões recentes: a janela ainda não terminou
+    table.loc[dates + pd.Timedelta(days=horizon_days) > rate.index[-1], f"Variação em {horizon_days} dias (p.p.)"] = float("nan")
+    return table
@@ -0,0 +1,91 @@
+# pag/tracking.py
+"""
+Risco ativo de ETFs contra seus benchmarks: tracking error, information ratio,
+up/down capture, beta e correlação (totais e em janelas móveis).
+
+As estatísticas móveis usam somas acumuladas: RollingMoments acumula uma vez
+Σx, Σy, Σx², Σy² e Σxy, e qualquer janela sai de diferenças dessas somas em
+O(T), sem recalcular cada janela. Mover o slider da janela não refaz nenhuma
+passada sobre os dados além dessa subtração. Funciona com uma série ou com um
+painel inteiro (uma coluna por ETF).
+"""
+
+import numpy as np
+import pandas as pd
+
+from pag.performance import TRADING_DAYS
+
+TRACKING_FORMATS = {
+    "Volatilidade Anual.": "{:.2%}", "Tracking Error": "{:.2%}", "Information Ratio": "{:.2f}",
+    "Beta": "{:.2f}", "Correlação": "{:.2f}", "Up Capture": "{:.0%}", "Down Capture": "{:.0%}",
+}
+
+
+def _as_frame(values):
+    return values.to_frame() if isinstance(values, pd.Series) else values
+
+
+class RollingMoments:
+    """Somas acumuladas dos retornos do ativo (x) e do benchmark (y), só nas datas em que ambos existem."""
+
+    def __init__(self, returns, benchmark_returns):
+        x, y = _as_frame(returns), _as_frame(benchmark_returns)
+        if y.shape[1] == 1 and x.shape[1] > 1:  # Um único benchmark para todas as colunas
+            y = pd.concat([y.iloc[:, 0]] * x.shape[1], axis=1)
+        x, y = x.align(y.set_axis(x.columns, axis=1), join="inner", axis=0)
+        valid = x.notna() & y.notna()
+        x, y = x.where(valid), y.where(valid)
+        self.index, self.columns = x.index, x.columns
+        # Centraliza pela média do período para reduzir o cancelamento numérico nas variâncias
+        xv, yv = (x - x.mean()).fillna(0).to_numpy(), (y - y.mean()).fillna(0).to_numpy()
+        zero = np.zeros((1, xv.shape[1]))
+        self._sums = {name: np.vstack([zero, np.cumsum(arr, axis=0)]) for name, arr in
+                      {"n": valid.to_numpy(dtype=float), "x": xv, "y": yv, "xx": xv * xv, "yy": yv * yv, "xy": xv * yv}.items()}
+
+    def _window_sums(self, window):
+        return {name: cs[window:] - cs[:-window] for name, cs in self._sums.items()}
+
+    def window(self, window):
+        """Estatísticas da janela móvel de `window` pregões, alinhadas à última data de cada janela."""
+        if window > len(self.index): return {}
+        s = self._window_sums(window)
+        n = s["n"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mx, my = s["x"] / n, s["y"] / n
+            cov = (s["xy"] - n * mx * my) / (n - 1)
+            var_x = (s["xx"] - n * mx * mx) / (n - 1)
+            var_y = (s["yy"] - n * my * my) / (n - 1)
+            var_active = var_x + var_y - 2 * cov
+            enough = n >= max(2, window // 2)  # Janelas com poucos dados em comum ficam vazias
+            frame = lambda arr: pd.DataFrame(np.where(enough, arr, np.nan), index=self.index[window - 1:], columns=self.columns)
+            return {
+                "Tracking Error": frame(np.sqrt(np.clip(var_active, 0, None) * TRADING_DAYS)),
+                "Beta": frame(cov / var_y),
+                "Correlação": frame(cov / np.sqrt(var_x * var_y)),
+            }
+
+
+def tracking_summary(returns, benchmark_returns):
+    """
+    Estatísticas do período todo, uma linha por ETF: volatilidade, tracking error, information
+    ratio (retorno ativo anualizado / TE), beta, correlação e up/down capture.
+    """
+    r, b = _as_frame(returns), _as_frame(benchmark_returns)
+    if b.shape[1] == 1 and r.shape[1] > 1: b = pd.concat([b.iloc[:, 0]] * r.shape[1], axis=1)
+    b = b.set_axis(r.columns, axis=1)
+    valid = r.notna() & b.notna()
+    r, b = r.where(valid), b.where(valid)
+    active = r - b
+    covariance = ((r - r.mean()) * (b - b.mean())).mean()
+    variance = ((b - b.mean()) ** 2).mean()
+    tracking_error = active.std() * np.sqrt(TRADING_DAYS)
+    up, down = b > 0, b < 0
+    return pd.DataFrame({
+        "Volatilidade Anual.": r.std() * np.sqrt(TRADING_DAYS),
+        "Tracking Error": tracking_error,
+        "Information Ratio": active.mean() * TRADING_DAYS / tracking_error.where(tracking_error > 0),
+        "Beta": covariance / variance.where(variance > 0),
+        "Correlação": r.corrwith(b),
+        "Up Capture": r.where(up).mean() / b.where(up).mean(),
+        "Down Capture": r.where(down).mean() / b.where(down).mean(),
+    })
@@ -0,0 +1,162 @@
+# pag/transforms.py
+"""
+Séries derivadas dos indicadores (variação anual, mensal, MM3 anualizada,
+z-score, média móvel) declaradas como nós sobre as séries base.
+
+Um nó é (fonte, código, data inicial, passos): os passos são nomes de
+TRANSFORMS aplicados em sequência (ex: ("yoy", "zscore") = z-score da
+variação anual). O resultado de cada nó (e de cada prefixo da cadeia) é
+memoizado pela chave (nó, última data e hash do conteúdo da série base): uma
+transformação é calculada uma vez e reaproveitada por todas as páginas,
+sessões e processos, e só é recalculada quando a série base muda (dado novo
+ou revisão de um valor já publicado, como as do IBC-Br, PIM e PMS).
+Cada nó guarda só a última versão em disco: a anterior é apagada ao gravar
+a nova.
+
+A memoização tem dois níveis: um LRU em memória (mesmo processo do
+Streamlit) e o cache persistente em disco (outros processos e reinícios).
+Como a série base é identificada pelo código, o mesmo código usado em dois
+gráficos (ex: na página Macro e nos compostos) é buscado e transformado uma vez só.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from pag import charts, providers
+from pag.cache import DATA_CACHE, MISS
+from pag.freshness import periods_per_year
+
+MEMO_SIZE = 512
+
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+# --- TRANSFORMAÇÕES ---
+def _yoy(series, ppy):
+    return series.pct_change(ppy) * 100
+
+def _mom(series, ppy):
+    return series.pct_change(max(ppy // 12, 1)) * 100
+
+def _saar_3mma(series, ppy):
+    # Média de 3 meses contra a dos 3 meses anteriores, anualizada
+    window = max(ppy // 4, 1)
+    average = series.rolling(window).mean()
+    return ((average / average.shift(window)) ** (ppy / window) - 1) * 100
+
+def _zscore(series, ppy):
+    # Desvio em relação à média móvel de 5 anos, em desvios-padrão
+    rolling = series.rolling(5 * ppy, min_periods=2 * ppy)
+    return (series - rolling.mean()) / rolling.std()
+
+def _rolling_mean(series, ppy):
+    return series.rolling(ppy).mean()
+
+def _yoy_diff(series, ppy):
+    return series.diff(ppy)
+
+# nome -> (rótulo do eixo, função(série, observações por ano)); o rótulo de "mom" segue a frequência (ver label)
+TRANSFORMS = {
+    "yoy": ("Var. Anual %", _yoy),
+    "mom": ("Var. Mensal %", _mom),
+    "saar_3mma": ("MM3 Anualizada %", _saar_3mma),
+    "zscore": ("Z-score (5 anos)", _zscore),
+    "rolling_mean": ("Média Móvel 12m", _rolling_mean),
+    "yoy_diff": ("Var. Anual (p.p.)", _yoy_diff),
+}
+
+
+# --- SÉRIES BASE ---
+def base_series(source, code, start_date, max_age=providers.SCHEDULED):
+    """Série base de um nó: FRED pelo código ou SGS pelo código numérico (o nome da coluna não importa)."""
+    if source == "fred": series = providers.fetch_fred_series(code, start_date, max_age)
+    else:
+        df = providers.fetch_bcb_series({str(code): code}, start_date, max_age)
+        series = df.iloc[:, 0] if not df.empty else pd.Series(dtype=float)
+    return series.dropna().rename(None)
+
+
+# --- MEMOIZAÇÃO ---
+def _memo_get(key):
+    with _memo_lock:
+        value = _memo.get(key, MISS)
+        if value is not MISS: _memo.move_to_end(key)
+    if value is MISS:
+        value = DATA_CACHE.get(key)
+        if value is not MISS: _memo_put(key, value)
+    return value
+
+def _memo_put(key, value):
+    with _memo_lock:
+        _memo[key] = value
+        while len(_memo) > MEMO_SIZE: _memo.popitem(last=False)
+
+def derive(source, code, steps=(), start_date="2012-01-01", max_age=providers.SCHEDULED):
+    """Série do nó (fonte, código, passos), calculada uma vez por versão (conteúdo) da série base."""
+    for step in steps:
+        if step not in TRANSFORMS: raise ValueError(f"Transformação desconhecida: {step}")
+    base = base_series(source, code, start_date, max_age)
+    if base.empty or not steps: return base
+    version = (str(base.index[-1]), charts.data_hash(base))  # Revisões sem linha nova também mudam a versão
+    node = ("transform", source, str(code), providers.resolve_start(start_date))
+    ppy = periods_per_year(base)
+
+    # Reaproveita o maior prefixo já calculado da cadeia e calcula (e guarda) só os passos restantes
+    done, series = 0, base
+    for i in range(len(steps), 0, -1):
+        cached = _memo_get(node + (tuple(steps[:i]),) + version)
+        if cached is not MISS:
+            done, series = i, cached
+            break
+    for i in range(done, len(steps)):
+        series = TRANSFORMS[steps[i]][1](series, ppy).replace([np.inf, -np.inf], np.nan).dropna()
+        prefix = node + (tuple(steps[:i + 1]),)
+        _memo_put(prefix + version, series)
+        DATA_CACHE.set(prefix + version, series)
+        _drop_superseded(prefix, version)
+    return series
+
+def _drop_superseded(prefix, version):
+    # Guarda a versão atual do nó e apaga a anterior (senão cada dado novo deixaria uma cópia no disco)
+    pointer = ("transform_version",) + prefix
+    previous = DATA_CACHE.get(pointer)
+    if previous is not MISS and previous != version:
+        DATA_CACHE.delete(prefix + previous)
+        with _memo_lock: _memo.pop(prefix + previous, None)
+    DATA_CACHE.set(pointer, version)
+
+
+# --- RÓTULOS ---
+_PERIOD_NAMES = {1: "Anual", 4: "Trimestral"}
+
+def period_name(ppy):
+    """Nome do período de uma observação ("Mensal" para séries mensais ou mais frequentes, cuja variação curta é de 1 mês)."""
+    return _PERIOD_NAMES.get(ppy, "Mensal")
+
+def label(steps, default="Índice", ppy=12):
+    """Rótulo do eixo para a última transformação da cadeia; a variação curta segue a frequência da série (ppy)."""
+    if not steps: return default
+    if steps[-1] == "mom": return f"Var. {period_name(ppy)} %"
+    return TRANSFORMS[steps[-1]][0]
+
+
+# --- RESUMO (métricas ao lado do gráfico) ---
+def indicator_stats(series, is_rate=False):
+    """
+    Último valor e variações curta e anual (p.p. para taxas, % para índices), no calendário da série.
+    A variação curta é de 1 mês, ou de 1 trimestre em séries trimestrais ("period" traz o nome);
+    em séries anuais só há a anual.
+    """
+    ppy = periods_per_year(series)
+    latest = series.iloc[-1]
+    stats = {"latest": latest, "mom": None, "yoy": None, "period": period_name(ppy)}
+    for name, lag in (("mom", max(ppy // 12, 1)), ("yoy", ppy)):
+        if name == "mom" and lag == ppy: continue
+        if len(series) > lag:
+            previous = series.iloc[-1 - lag]
+            stats[name] = latest - previous if is_rate else ((latest / previous) - 1) * 100
+    return stats
@@ -0,0 +1,142 @@
+# pag/ui.py
+"""Componentes de interface compartilhados entre as páginas (Streamlit)."""
+
+import streamlit as st
+
+from pag import instrumentation
+
+# Perfis com acesso às ferramentas administrativas (painel de tempos)
+ADMIN_ROLES = {"Analista"}
+
+
+def is_admin():
+    return st.session_state.get("role") in ADMIN_ROLES
+
+
+def begin_page_instrumentation(page_name):
+    """Inicia a coleta de tempos do rerun. Chamar no topo da página, antes de definir as funções."""
+    enabled = is_admin() and st.session_state.get("pag_instrumentation", False)
+    instrumentation.begin_rerun(page_name, enabled)
+    if instrumentation.is_enabled(): instrumentation.install_plotly_timer()
+
+
+def render_timing_panel():
+    """Painel recolhível (somente admin) com os tempos das funções de dados do rerun atual."""
+    if not is_admin(): return
+    with st.sidebar.expander("⏱️ Painel de Tempos (admin)"):
+        st.toggle("Ativar instrumentação", key="pag_instrumentation", help="Mede tempo, cache, payload e chamadas a provedores a cada rerun. Vale a partir do próximo rerun.")
+        if not instrumentation.is_enabled():
+            st.caption("Instrumentação desligada (custo zero).")
+            return
+
+        records = instrumentation.get_records()
+        calls = instrumentation.get_provider_calls()
+        st.metric("Tempo do rerun (até aqui)", f"{instrumentation.rerun_elapsed() * 1000:,.0f} ms")
+        st.caption("Chamadas a provedores: " + (", ".join(f"{k}: {v}" for k, v in calls.items()) if calls else "nenhuma (tudo em cache)"))
+        if not records:
+            st.caption("Nenhuma função instrumentada foi executada neste rerun.")
+            return
+
+        import pandas as pd
+        df = pd.DataFrame(records)
+        df["Função"] = df.apply(lambda r: "  " * int(r["depth"]) + r["function"], axis=1)
+        df["Payload (KB)"] = df["payload_bytes"].apply(lambda b: b / 1024 if b is not None else None)
+        df["Provedores"] = df["provider_calls"].apply(lambda c: ", ".join(f"{k}:{v}" for k, v in c.items()))
+        table = df[["Função", "ms", "cache", "Payload (KB)", "Provedores"]].rename(columns={"ms": "Tempo (ms)", "cache": "Cache"})
+        st.dataframe(table.style.format({"Tempo (ms)": "{:,.1f}", "Payload (KB)": "{:,.1f}"}, na_rep="-"), use_container_width=True, hide_index=True)
+        hits = (df["cache"] == "hit").sum(); misses = (df["cache"] == "miss").sum()
+        st.caption(f"Cache: {hits} hits / {misses} misses • Log: {instrumentation.LOG_FILE}")
+
+
+# --- AGENDA DE ATUALIZAÇÃO DAS SÉRIES (ver pag/freshness.py) ---
+FRESHNESS_COLORS = {"Em dia": "#2E8B57", "Divulgação esperada": "#F39C12", "Atrasada": "#C70039"}
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _freshness_table():
+    from pag import freshness
+    return freshness.status_table(freshness.registered_series())
+
+def render_freshness_panel():
+    """Situação de cada série registrada pela agenda de divulgação (última observação, próxima divulgação e atraso) e o último warm-up."""
+    with st.expander("🗓️ Atualização das Séries (calendário de divulgação)"):
+        table = _freshness_table()
+        st.caption("Cada série só é consultada no provedor quando uma observação nova é plausível: depois da data da próxima observação mais a defasagem típica de divulgação da série.")
+        counts = table["Situação"].value_counts()
+        st.caption(" • ".join(f"{state}: {n}" for state, n in counts.items()))
+        styled = table.style.format({"Última Observação": "{:%d/%m/%Y}", "Próxima Divulgação": "{:%d/%m/%Y %H:%M}", "Consultada há (h)": "{:,.1f}", "Defasagem Típica (dias)": "{:,.1f}"}, na_rep="-")
+        styled = styled.map(lambda v: f"color: {FRESHNESS_COLORS[v]}" if v in FRESHNESS_COLORS else "", subset=["Situação"])
+        st.dataframe(styled, use_container_width=True, hide_index=True)
+        render_warmup_report()
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _warmup_report():
+    from pag import warmup
+    return warmup.load_last_report()
+
+def render_warmup_report():
+    """Resumo da última execução do job de warm-up (python -m pag.warmup) e os itens que falharam."""
+    report = _warmup_report()
+    if report is None:
+        st.caption("Warm-up: nenhuma execução registrada (python -m pag.warmup).")
+        return
+    from datetime import datetime
+    started = datetime.fromisoformat(report["started_at"])
+    st.caption(f"Último warm-up: {started:%d/%m/%Y %H:%M} ({'forçado, ' if report['forced'] else ''}{report['total_seconds']:,.1f}s) • {report['ok']} ok • {report['failed']} com falha")
+    failures = [{"Grupo": r["group"], "Item": r["name"], "Erro": r.get("error", "")} for r in report["items"] if not r["ok"]]
+    if failures: st.dataframe(failures, use_container_width=True, hide_index=True)
+
+
+def render_drawdown_analysis(wealth, label="Carteira", top_n=5):
+    """Métricas de drawdown, curva underwater e maiores episódios de uma série de patrimônio ou preços."""
+    import pandas as pd
+    from pag import charts
+    from pag.drawdown import EPISODE_FORMATS, drawdown_episodes, drawdown_summary, underwater
+
+    wealth = wealth.dropna()
+    if wealth.empty: return
+    summary = drawdown_summary(wealth).iloc[0]
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Drawdown Máximo", f"{summary['Drawdown Máximo']:.2%}", help=f"Do pico em {summary['Pico']:%d/%m/%Y} ao vale em {summary['Vale']:%d/%m/%Y}.")
+    recovery_days = summary["Tempo de Recuperação (dias)"]
+    c2.metric("Tempo de Recuperação", f"{recovery_days:.0f} dias" if pd.notna(recovery_days) else "Não recuperado")
+    c3.metric("Drawdown Atual", f"{summary['Drawdown Atual']:.2%}")
+
+    fig = charts.area_chart(underwater(wealth), title=f"Curva Underwater - {label}")
+    fig.update_layout(yaxis_title="Queda desde o pico", yaxis_tickformat=".0%", xaxis_title="Data", showlegend=False)
+    st.plotly_chart(fig, use_container_width=True)
+    with st.expander(f"Maiores Drawdowns ({top_n})"):
+        episodes = drawdown_episodes(wealth, top_n)
+        st.dataframe(episodes.style.format(EPISODE_FORMATS, na_rep="Em curso"), use_container_width=True, hide_index=True)
+
+
+# --- JOBS EM SEGUNDO PLANO (ver pag/jobs.py) ---
+def remember_job(name, job_id):
+    """Guarda o ID do job na sessão e na URL (?name=ID), para recuperar o resultado em outra sessão."""
+    st.session_state[name] = job_id
+    st.query_params[name] = job_id
+
+def recall_job(name):
+    return st.session_state.get(name) or st.query_params.get(name)
+
+@st.fragment(run_every=1.0)
+def _job_progress(job_id, label):
+    from pag import jobs
+    job = jobs.get_job(job_id)
+    # Ao terminar, reexecuta a página inteira para renderizar o resultado
+    if job is None or job["status"] in (jobs.DONE, jobs.FAILED): st.rerun()
+    st.progress(job["progress"], text=f"{label} {job['message']}")
+
+def wait_for_job(job_id, label="Processando..."):
+    """
+    Resultado do job se já terminou. Enquanto roda, mostra a barra de progresso (consultada
+    a cada segundo, sem bloquear a sessão) e devolve None.
+    """
+    from pag import jobs
+    job = jobs.get_job(job_id)
+    if job is None: return None
+    if job["status"] == jobs.FAILED:
+        st.error(f"{label} Falhou: {job['error']}")
+        return None
+    if job["status"] == jobs.DONE: return jobs.get_result(job_id)
+    _job_progress(job_id, label)
+    return None
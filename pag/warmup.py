@@ -0,0 +1,194 @@
+# pag/warmup.py
+"""
+Job de warm-up do cache persistente (Macro Hub e Renda Fixa).
+
+Roda fora do Streamlit, de forma agendada, e atualiza todas as séries, curvas
+e painéis registrados em pag.registry. Assim, o primeiro usuário que abre as
+páginas lê dados já aquecidos em vez de esperar ~70 downloads.
+
+Depois das buscas, o grupo "derived" monta o que as páginas calculam sobre as
+séries e também fica no cache persistente: variações dos indicadores
+(pag.transforms), painéis e curvas NSS ajustadas (pag.curves), painéis dos
+compostos (pag.composites) e o juro real (pag.real_rates). Cada um só é
+recalculado se as séries de entrada mudaram.
+
+As séries do FRED e do SGS seguem a agenda de divulgação (pag.freshness): a
+cada execução só são baixadas as que podem ter uma observação nova. --force
+baixa todas de novo (ex: depois de revisões em massa).
+
+Uso:
+    python -m pag.warmup [--workers 8] [--only fred bcb curves markets snapshot derived] [--force]
+
+Agendamento sugerido (cron, dias úteis, antes da abertura e a cada hora):
+    30 8-18 * * 1-5  cd /caminho/da/plataforma && python -m pag.warmup
+
+Os tempos de cada item são gravados em .pag_cache/warmup/last_run.json e
+acumulados em .pag_cache/warmup/history.jsonl para diagnóstico.
+"""
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from pag import providers, registry
+from pag.config import cache_path
+
+LAST_RUN_FILE = cache_path("warmup", "last_run.json")
+HISTORY_FILE = cache_path("warmup", "history.jsonl")
+GROUPS = ["fred", "bcb", "curves", "markets", "snapshot", "derived"]
+# Grupos que dependem das séries já baixadas: rodam depois das buscas
+DERIVED_GROUPS = {"derived"}
+
+
+# --- TAREFAS ---
+def _payload_rows(result):
+    try: return int(len(result))
+    except TypeError: return None
+
+def _fred_task(code, start, max_age):
+    return lambda: providers.fetch_fred_series(code, start, max_age=max_age)
+
+def _bcb_task(codes, start, max_age):
+    return lambda: providers.fetch_bcb_series(codes, start, max_age=max_age)
+
+def _incremental_task(code, start, max_age):
+    return lambda: providers.fetch_bcb_incremental(code, start, max_age=max_age)
+
+def _market_task(tickers, start):
+    return lambda: providers.fetch_market_data(tickers, start, max_age=0)
+
+def _snapshot_task():
+    from pag.snapshot import MarketSnapshotService
+    def run():
+        service = MarketSnapshotService()
+        if not service.refresh(): raise RuntimeError(service.last_error)
+        return service.get().history
+    return run
+
+def _derive_task(source, code, steps):
+    from pag import transforms
+    return lambda: transforms.derive(source, code, steps, registry.MACRO_START)
+
+def _curve_task(market, method):
+    from pag import curves
+    return lambda: curves.load_curve(market, method)
+
+def _composite_task(country):
+    from pag import composites
+    return lambda: composites.indicator_panel(country)
+
+def _real_rate_task():
+    from pag import real_rates
+    return real_rates.real_rate_history
+
+def build_tasks(groups=GROUPS, force=False):
+    """Lista de (grupo, nome, função) cobrindo tudo o que está registrado (séries pela agenda, salvo force)."""
+    tasks = []
+    series_age = 0 if force else providers.SCHEDULED
+    if "fred" in groups:
+        seen = set()
+        for ind in registry.FRED_INDICATORS:
+            if ind["code"] in seen: continue
+            seen.add(ind["code"])
+            tasks.append(("fred", f"FRED {ind['code']}", _fred_task(ind["code"], registry.MACRO_START, series_age)))
+        history = {(code, registry.RENDA_FIXA_START) for code in registry.RENDA_FIXA_FRED_SERIES.values()}
+        history |= {(code, registry.CREDIT_SPREAD_START) for code in registry.CREDIT_SPREAD_SERIES.values()}
+        for code, start in sorted(history):
+            tasks.append(("fred", f"FRED {code} (desde {start[:4]})", _fred_task(code, start, series_age)))
+    if "bcb" in groups:
+        seen = set()
+        for ind in registry.BCB_INDICATORS:
+            if ind["code"] in seen: continue
+            seen.add(ind["code"])
+            tasks.append(("bcb", f"SGS {ind['code']}", _bcb_task({ind["name"]: ind["code"]}, registry.MACRO_START, series_age)))
+        for name, code in registry.REAL_RATE_SERIES.items():
+            tasks.append(("bcb", f"SGS {code} ({name}, incremental)", _incremental_task(code, registry.REAL_RATE_START, series_age)))
+        tasks.append(("bcb", "Focus IPCA 12 meses", lambda: providers.fetch_focus_ipca_12m(registry.REAL_RATE_START, max_age=0)))
+    if "curves" in groups:
+        for name, code in registry.US_CURVE_TENORS.items():
+            tasks.append(("curves", f"Curva EUA {name}", _fred_task(code, registry.CURVE_HISTORY_START, series_age)))
+        for name, code in registry.BR_CURVE_TENORS.items():
+            tasks.append(("curves", f"Curva BR {name}", _incremental_task(code, registry.BR_CURVE_HISTORY_START, series_age)))
+    if "markets" in groups:
+        for panel, tickers in registry.MARKET_PANELS.items():
+            tasks.append(("markets", f"Painel {panel}", _market_task(list(tickers.values()), registry.MACRO_START)))
+    if "snapshot" in groups:
+        tasks.append(("snapshot", "Snapshot da página inicial", _snapshot_task()))
+    if "derived" in groups:
+        # Mesmas transformações das páginas: variação anual dos is_pct_change e as dos compostos
+        nodes = {(ind["source"], str(ind["code"]), ("yoy",)) for ind in registry.all_indicators() if ind["is_pct_change"]}
+        nodes |= {(ind["source"], str(ind["code"]), registry.COMPOSITE_STEPS[ind["name"]]) for ind in registry.all_indicators() if ind["name"] in registry.COMPOSITE_STEPS}
+        for source, code, steps in sorted(nodes):
+            tasks.append(("derived", f"{code} {'+'.join(steps)}", _derive_task(source, code, steps)))
+        for market in ("US", "BR"):
+            tasks.append(("derived", f"Curva {market} (NSS)", _curve_task(market, "nss")))
+        for country in ("Brasil", "EUA"):
+            tasks.append(("derived", f"Compostos {country}", _composite_task(country)))
+        tasks.append(("derived", "Juro real", _real_rate_task()))
+    return tasks
+
+
+def _run_task(task):
+    group, name, fn = task
+    t0 = time.perf_counter()
+    record = {"group": group, "name": name}
+    try:
+        result = fn()
+        record.update(ok=True, rows=_payload_rows(result))
+    except Exception as e:
+        record.update(ok=False, error=f"{type(e).__name__}: {e}")
+    record["seconds"] = round(time.perf_counter() - t0, 3)
+    return record
+
+
+def run_warmup(groups=GROUPS, workers=8, force=False):
+    """Executa o warm-up e retorna o relatório (também gravado em disco)."""
+    started_at = datetime.now()
+    t0 = time.perf_counter()
+    tasks = build_tasks(groups, force)
+    # Downloads são I/O: threads permitem buscar várias séries em paralelo; os derivados
+    # esperam as buscas terminarem para montar sobre as séries já atualizadas
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        records = list(pool.map(_run_task, [t for t in tasks if t[0] not in DERIVED_GROUPS]))
+        records += list(pool.map(_run_task, [t for t in tasks if t[0] in DERIVED_GROUPS]))
+    report = {
+        "started_at": started_at.isoformat(timespec="seconds"),
+        "forced": force,
+        "total_seconds": round(time.perf_counter() - t0, 3),
+        "ok": sum(r["ok"] for r in records),
+        "failed": sum(not r["ok"] for r in records),
+        "items": sorted(records, key=lambda r: r["seconds"], reverse=True),
+    }
+    with open(LAST_RUN_FILE, "w", encoding="utf-8") as f: json.dump(report, f, ensure_ascii=False, indent=2)
+    with open(HISTORY_FILE, "a", encoding="utf-8") as f: f.write(json.dumps(report, ensure_ascii=False) + "\n")
+    return report
+
+
+def load_last_report():
+    """Último relatório de warm-up (ou None), exibido no painel de atualização das séries (pag.ui)."""
+    try:
+        with open(LAST_RUN_FILE, encoding="utf-8") as f: return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aquece o cache persistente das páginas Macro e Renda Fixa.")
+    parser.add_argument("--workers", type=int, default=8, help="Downloads em paralelo")
+    parser.add_argument("--only", nargs="+", choices=GROUPS, default=GROUPS, help="Grupos a aquecer")
+    parser.add_argument("--force", action="store_true", help="Baixa todas as séries, ignorando a agenda de divulgação")
+    args = parser.parse_args(argv)
+
+    report = run_warmup(args.only, args.workers, args.force)
+    print(f"Warm-up concluído em {report['total_seconds']:.1f}s: {report['ok']} ok, {report['failed']} com falha.")
+    for r in report["items"][:15]:
+        status = "ok" if r["ok"] else f"FALHA ({r['error']})"
+        print(f"  {r['seconds']:7.2f}s  {r['name']}  {status}")
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+# pag/wealth.py
+"""Carteiras modelo da alocação estratégica (Wealth Management), seus gráficos e a classificação de ativos."""
+
+# --- DADOS: ALOCAÇÃO ESTRATÉGICA ---
+MODEL_PORTFOLIOS = {
+    "Conservador": {"Caixa": 20, "Renda Fixa Brasil": 50, "Renda Fixa Internacional": 15, "Ações Brasil": 5, "Ações Internacional": 5, "Fundos Imobiliários": 5, "Alternativos": 0},
+    "Moderado": {"Caixa": 10, "Renda Fixa Brasil": 40, "Renda Fixa Internacional": 15, "Ações Brasil": 15, "Ações Internacional": 15, "Fundos Imobiliários": 5, "Alternativos": 0},
+    "Balanceado": {"Caixa": 5, "Renda Fixa Brasil": 30, "Renda Fixa Internacional": 20, "Ações Brasil": 20, "Ações Internacional": 20, "Fundos Imobiliários": 5, "Alternativos": 0},
+    "Crescimento": {"Caixa": 5, "Renda Fixa Brasil": 20, "Renda Fixa Internacional": 15, "Ações Brasil": 25, "Ações Internacional": 25, "Fundos Imobiliários": 5, "Alternativos": 5},
+    "Agressivo": {"Caixa": 2, "Renda Fixa Brasil": 10, "Renda Fixa Internacional": 10, "Ações Brasil": 34, "Ações Internacional": 34, "Fundos Imobiliários": 5, "Alternativos": 5}
+}
+
+
+def create_allocation_chart(portfolio_name, data):
+    """Gráfico de pizza da alocação de uma carteira modelo. Use via charts.cached_figure nas páginas."""
+    import pandas as pd
+    import plotly.express as px
+    df = pd.DataFrame(list(data.items()), columns=['Classe de Ativo', 'Alocação (%)'])
+    fig = px.pie(df, values='Alocação (%)', names='Classe de Ativo', title=f"<b>{portfolio_name}</b>", hole=.3, color_discrete_sequence=px.colors.sequential.GnBu_r)
+    fig.update_traces(textposition='inside', textinfo='percent+label', insidetextfont=dict(size=14)); fig.update_layout(showlegend=False, title_font_size=20, title_x=0.5, margin=dict(l=20,r=20,t=40,b=20)); return fig
+
+
+# --- CLASSIFICAÇÃO DE ATIVOS ---
+def get_asset_class(info, ticker_symbol):
+    category = (info.get('quoteType') or '').upper(); long_name = (info.get('longName') or '').upper()
+    if category == 'EQUITY': return "Ações Brasil" if '.SA' in ticker_symbol.upper() else "Ações Internacional"
+    if category == 'ETF':
+        if any(term in long_name for term in ['FIXA', 'BOND', 'TREASURY']): return "Renda Fixa Internacional" if '.SA' not in ticker_symbol.upper() else "Renda Fixa Brasil"
+        if any(term in long_name for term in ['FII', 'IMOBILIÁRIO', 'REAL ESTATE']): return "Fundos Imobiliários"
+        if any(term in long_name for term in ['GOLD', 'OURO', 'COMMODITIES']): return "Alternativos"
+        if any(term in long_name for term in ['IBOVESPA', 'SMALL', 'BRAZIL']): return "Ações Brasil"
+        return "Ações Internacional"
+    return "Alternativos"
+
+def bulk_categorize_tickers(tickers_list, progress=None):
+    """Classe de ativo de cada ticker pelo cadastro do yfinance ("Não Classificado" se não houver dados)."""
+    from pag.providers import fetch_ticker_infos
+    if progress: progress(0.1, f"Buscando o cadastro de {len(tickers_list)} ticker(s)...")
+    infos = fetch_ticker_infos(tickers_list)
+    categories = {}
+    for ticker in tickers_list:
+        info = infos.get(ticker) or {}
+        categories[ticker] = get_asset_class(info, ticker) if 'quoteType' in info else "Não Classificado"
+    return categories
@@ -2,238 +2,247 @@
 
 import streamlit as st
 import pandas as pd
-from fredapi import Fred
-from bcb import sgs
 import plotly.express as px
-from datetime import datetime
-import yfinance as yf
+from datetime import datetime, timedelta
 import numpy as np
 import re
 import os
-import json
+from pag import charts, composites, curves, performance, providers, real_rates, store, text_index, tone, transforms
+from pag.freshness import PAGE_CACHE_TTL, periods_per_year
+from pag.registry import MARKET_PANELS
+from pag.instrumentation import instrument
+from pag.ui import begin_page_instrumentation, render_freshness_panel, render_timing_panel
 
 # --- Configuração da Página ---
 st.set_page_config(page_title="PAG | Macro Hub", page_icon="🌍", layout="wide")
+begin_page_instrumentation("Macro")
 
-# --- NOME DOS ARQUIVOS DE DADOS ---
-RECOMMENDATIONS_FILE = "recommendations.csv"
-MANAGER_VIEWS_FILE = "manager_views.json"
-FOMC_MEETINGS_FILE = "fomc_meetings.json"
+# --- DIRETÓRIOS DOS RELATÓRIOS (reuniões, visões e recomendações ficam no banco de pag/store.py) ---
 REPORTS_DIR = "reports"
 REPORTS_DIR_FOMC = "reports_fomc"
-COPOM_MEETINGS_FILE = "copom_meetings.json"
 REPORTS_DIR_COPOM = "reports_copom"
+MAX_LISTED_SENTENCES = 30  # Frases listadas por tipo de mudança entre atas
 
 # --- Verifica se o usuário está logado ---
 if not st.session_state.get("authentication_status"):
     st.info("Por favor, faça o login para acessar esta página."); st.stop()
 
 # --- CARREGAMENTO INICIAL DOS DADOS ---
-def load_data(file_path):
-    # Função para carregar dados de JSON ou CSV
-    if os.path.exists(file_path):
-        try:
-            if file_path.endswith('.csv'): return pd.read_csv(file_path)
-            elif file_path.endswith('.json'):
-                with open(file_path, 'r', encoding='utf-8') as f: return json.load(f)
-        except (pd.errors.EmptyDataError, json.JSONDecodeError):
-            return [] if file_path.endswith('.json') else pd.DataFrame()
-    return [] if file_path.endswith('.json') else pd.DataFrame()
-
-def save_data(data, file_path):
-    # Função para salvar dados em JSON ou CSV
-    if isinstance(data, pd.DataFrame): data.to_csv(file_path, index=False)
-    elif isinstance(data, list):
-        with open(file_path, 'w', encoding='utf-8') as f: json.dump(data, f, ensure_ascii=False, indent=4)
-
-recommendations_df = load_data(RECOMMENDATIONS_FILE)
-manager_views = load_data(MANAGER_VIEWS_FILE)
-
-if 'recs_df' not in st.session_state: st.session_state.recs_df = load_data(RECOMMENDATIONS_FILE)
-if 'fomc_meetings' not in st.session_state: st.session_state.fomc_meetings = load_data(FOMC_MEETINGS_FILE)
-if 'manager_views' not in st.session_state: st.session_state.manager_views = load_data(MANAGER_VIEWS_FILE)
-if 'copom_meetings' not in st.session_state: st.session_state.copom_meetings = load_data(COPOM_MEETINGS_FILE)
+# Lidos do banco a cada rerun: cada edição grava só a própria linha, então uma sessão
+# nunca sobrescreve o que outro analista salvou nesse meio tempo
+recommendations_df = store.recommendations(latest_only=True)
+manager_views = store.manager_views()
+meetings_by_bank = {bank: store.list_meetings(bank) for bank in store.BANKS}
 
 # --- INICIALIZAÇÃO DAS APIS ---
 @st.cache_resource
 def get_fred_api():
+    # Importação tardia: fredapi só é carregado quando a API é de fato usada
+    from fredapi import Fred
     try:
         api_key = st.secrets.get("FRED_API_KEY")
         if not api_key: st.error("Chave da API do FRED não configurada."); st.stop()
-        return Fred(api_key=api_key)
+        client = Fred(api_key=api_key)
+        providers.set_fred_client(client)
+        return client
     except Exception as e:
         st.error(f"Falha ao inicializar API do FRED: {e}"); st.stop()
 fred = get_fred_api()
 
 # --- FUNÇÕES AUXILIARES ---
-@st.cache_data(ttl=3600)
+# As buscas passam pelo cache persistente compartilhado (aquecido pelo job `python -m pag.warmup`),
+# atualizado pela agenda de divulgação de cada série: o TTL curto só limita a memória do processo
+@instrument(cache=st.cache_data(ttl=PAGE_CACHE_TTL))
 def fetch_fred_series(code, start_date):
-    try: return fred.get_series(code, start_date)
+    try: return providers.fetch_fred_series(code, start_date)
     except: return pd.Series(dtype='float64')
 
-@st.cache_data(ttl=3600)
+@instrument(cache=st.cache_data(ttl=PAGE_CACHE_TTL))
 def fetch_bcb_series(codes, start_date):
-    try:
-        df = sgs.get(codes, start=start_date)
-        return df if isinstance(df, pd.DataFrame) and not df.empty else pd.DataFrame()
+    try: return providers.fetch_bcb_series(codes, start_date)
     except: return pd.DataFrame()
 
 # --- FUNÇÕES AUXILIARES (VERSÃO CORRIGIDA E MELHORADA) ---
 
 # ... (mantenha as funções fetch_fred_series e fetch_bcb_series como estão) ...
 
-def plot_indicator_with_analysis(source, code, title, explanation, unit="Índice", hline=None, is_pct_change=False, start_date="2012-01-01"):
+@instrument(cache=st.cache_data(ttl=PAGE_CACHE_TTL))
+def get_indicator_series(source, code, steps, start_date):
+    """Série base ou derivada (pag.transforms): cada transformação é calculada uma vez por dado novo, em todas as sessões."""
+    try: return transforms.derive(source, code, steps, start_date)
+    except Exception: return pd.Series(dtype='float64')
+
+def plot_indicator_with_analysis(source, code, title, explanation, unit="Índice", hline=None, is_pct_change=False, start_date="2012-01-01", transform=None):
     """
     Função unificada para buscar, processar e plotar um indicador econômico.
     - source: 'fred' ou 'bcb'
-    - code: O código do indicador na API.
-    - is_pct_change: Se True, calcula a variação anual (YoY).
+    - code: O código do indicador na API (para o BCB, também {nome: código}).
+    - is_pct_change: Se True, plota a variação anual (YoY).
+    - transform: cadeia de transformações de pag.transforms (ex: ("saar_3mma",) ou ("yoy", "zscore")).
     """
-    data_series = pd.Series(dtype='float64') # Inicializa uma série vazia
-
-    # 1. Buscar os dados da fonte correta
-    if source == 'fred':
-        data_series = fetch_fred_series(code, start_date)
-    elif source == 'bcb':
-        # Para o BCB, o código pode ser um dicionário
-        if isinstance(code, dict):
-             df = fetch_bcb_series(code, start_date)
-             if not df.empty:
-                 data_series = df.iloc[:, 0] # Pega a primeira coluna do dataframe
-        else: # Ou uma string/código único
-             df = fetch_bcb_series({title: code}, start_date)
-             if not df.empty:
-                 data_series = df.iloc[:, 0]
-
-    if data_series is None or data_series.empty:
+    # 1. Série base ou derivada, identificada pelo código (o nome do dicionário é só o rótulo)
+    if source == 'bcb' and isinstance(code, dict): code = next(iter(code.values()))
+    steps = tuple(transform or (("yoy",) if is_pct_change else ()))
+    data_to_plot = get_indicator_series(source, code, steps, start_date)
+
+    if data_to_plot is None or data_to_plot.empty:
         st.warning(f"Não foi possível carregar os dados para {title} ({code}).")
         return
 
-    # 2. Processar os dados (cálculo de variação, se necessário)
-    data_to_plot = data_series.copy()
-    if is_pct_change:
-        data_to_plot = data_to_plot.pct_change(12).dropna() * 100
-
-    latest_value = data_to_plot.iloc[-1]
-    prev_month_value = data_to_plot.iloc[-2] if len(data_to_plot) > 1 else None
-    prev_year_value = data_to_plot.iloc[-13] if len(data_to_plot) > 12 else None
+    # Sem unidade explícita, o rótulo vem da transformação (a variação curta segue a frequência da série)
+    if transform and unit == "Índice": unit = transforms.label(steps, unit, periods_per_year(data_to_plot))
+    is_rate = (unit == "%")
+    stats = transforms.indicator_stats(data_to_plot, is_rate)
 
-    # 3. Plotar o gráfico e as métricas
+    # 2. Plotar o gráfico e as métricas
     col1, col2 = st.columns([3, 1])
     with col1:
-        fig = px.area(data_to_plot, title=title)
-        fig.update_layout(showlegend=False, yaxis_title=unit, xaxis_title="Data", yaxis_tickformat=",.2f")
-        if hline is not None:
-            fig.add_hline(y=hline, line_dash="dash", line_color="red", annotation_text=f"Nível {hline}")
+        fig = charts.indicator_figure(data_to_plot, title, unit, hline)
         st.plotly_chart(fig, use_container_width=True)
     with col2:
         st.markdown(f"**Análise do Indicador**")
         st.caption(explanation)
-        st.metric(label=f"Último Valor ({unit})", value=f"{latest_value:,.2f}")
+        st.metric(label=f"Último Valor ({unit})", value=f"{stats['latest']:,.2f}")
 
-        is_rate = (unit == "%")
         delta_unit = " p.p." if is_rate else "%"
 
-        if prev_month_value is not None:
-            change_mom = latest_value - prev_month_value if is_rate else ((latest_value / prev_month_value) - 1) * 100
-            st.metric(label=f"Variação Mensal", value=f"{change_mom:,.2f}{delta_unit}", delta=f"{change_mom:,.2f}")
+        if stats["mom"] is not None:
+            st.metric(label=f"Variação {stats['period']}", value=f"{stats['mom']:,.2f}{delta_unit}", delta=f"{stats['mom']:,.2f}")
 
-        if prev_year_value is not None:
-            change_yoy = latest_value - prev_year_value if is_rate else ((latest_value / prev_year_value) - 1) * 100
-            st.metric(label=f"Variação Anual", value=f"{change_yoy:,.2f}{delta_unit}", delta=f"{change_yoy:,.2f}")
+        if stats["yoy"] is not None:
+            st.metric(label=f"Variação Anual", value=f"{stats['yoy']:,.2f}{delta_unit}", delta=f"{stats['yoy']:,.2f}")
 
 # --- ADICIONE ESTAS FUNÇÕES FALTANTES NA SEÇÃO DE FUNÇÕES AUXILIARES ---
 
-@st.cache_data(ttl=3600)
+@instrument(cache=st.cache_data(ttl=PAGE_CACHE_TTL))
+def get_yield_curve(market):
+    """Curvas NSS ajustadas (pag.curves) de todo o histórico diário do mercado; None sem dados."""
+    return curves.load_curve(market)
+
+@instrument(cache=st.cache_data(ttl=PAGE_CACHE_TTL))
 def get_us_yield_curve_data():
-    codes = {
-        "3 Meses": "DGS3MO", "2 Anos": "DGS2", "5 Anos": "DGS5",
-        "10 Anos": "DGS10", "30 Anos": "DGS30"
-    }
-    yield_data = []
-    # Pega os dados dos últimos 10 dias para garantir que temos o valor mais recente
-    start = datetime.now() - pd.Timedelta(days=10)
-    for name, code in codes.items():
-        series = fetch_fred_series(code, start)
-        if not series.empty:
-            yield_data.append({'Prazo': name, 'Taxa (%)': series.iloc[-1]})
-    df = pd.DataFrame(yield_data)
-    if not df.empty:
-        df['Prazo'] = pd.Categorical(df['Prazo'], categories=codes.keys(), ordered=True)
-        return df.sort_values('Prazo')
-    return pd.DataFrame()
-
-@st.cache_data(ttl=3600)
+    # Recorte do painel completo de vértices (o mesmo usado pela Renda Fixa)
+    return curves.latest_table(get_curve_panel("US"), ["3 Meses", "2 Anos", "5 Anos", "10 Anos", "30 Anos"])
+
+@instrument(cache=st.cache_data(ttl=PAGE_CACHE_TTL))
+def get_curve_panel(market):
+    """Painel datas x prazos do mercado (uma leitura do cache persistente)."""
+    return curves.curve_panel(market)
+
+@instrument(cache=st.cache_data(ttl=PAGE_CACHE_TTL))
+def get_curve_shape(market):
+    """Nível, inclinação e curvatura diárias da curva observada do mercado."""
+    return curves.shape_metrics(get_curve_panel(market), market)
+
+@instrument(cache=st.cache_data(ttl=3600))
 def fetch_market_data(tickers):
     """
     Busca dados de fechamento de mercado para uma lista de tickers.
     """
     try:
-        # CORREÇÃO: Alterado de 'Adj Close' para 'Close' para maior robustez.
-        # A coluna 'Close' é mais universal entre diferentes tipos de ativos (índices, commodities, etc.)
-        data = yf.download(tickers, start=start_date)['Close']
-        
-        # Se baixar só um ticker, o yfinance não retorna um DF, mas uma Série.
-        # Esta parte do código converte para DataFrame para manter a consistência.
-        if isinstance(data, pd.Series):
-            data = data.to_frame(tickers[0])
-            
-        return data.dropna(how='all') # Usar how='all' para não dropar linhas se um dos ativos não tiver dado no dia
+        # Usa a coluna 'Close' (mais universal entre índices, commodities, etc.), com cache por ticker.
+        # Tickers já baixados por outro painel/sessão não são baixados de novo.
+        return providers.fetch_market_data(tickers, start_date)
         
     except Exception as e:
         st.error(f"Falha ao buscar dados de mercado com yfinance: {e}")
         return pd.DataFrame()
 
-# ADICIONE ESTA FUNÇÃO JUNTO COM AS OUTRAS FUNÇÕES AUXILIARES
+@instrument()
 def calculate_performance_metrics(prices_df):
-    """Calcula métricas de performance para um DataFrame de preços."""
-    metrics = []
-    # Usaremos o juro de 3 meses do tesouro americano como taxa livre de risco
+    """Métricas de performance (ver pag/performance.py) com o Treasury de 3 meses como taxa livre de risco."""
     risk_free_rate_series = fetch_fred_series("DGS3MO", start_date)
     risk_free_rate = (risk_free_rate_series.iloc[-1] / 100) if not risk_free_rate_series.empty else 0.02
+    return performance.calculate_performance_metrics(prices_df, risk_free_rate)
 
-    for col in prices_df.columns:
-        prices = prices_df[col].dropna()
-        if prices.empty:
-            continue
-            
-        # Retorno no ano (YTD)
-        ytd_prices = prices[prices.index.year == datetime.now().year]
-        ytd_return = (ytd_prices.iloc[-1] / ytd_prices.iloc[0] - 1) if not ytd_prices.empty else 0
+def analyze_central_bank_discourse(text, lang='en'):
+    """Placar hawkish/dovish com o léxico padrão do idioma (pag.text_index: uma passada pelos tokens do texto)."""
+    scores = text_index.score_text(text, text_index.DISCOURSE_LEXICONS[lang])
+    return scores["hawkish"], scores["dovish"]
 
-        # Retorno em 12 meses
-        return_12m = (prices.iloc[-1] / prices.iloc[-252] - 1) if len(prices) > 252 else 0
-        
-        # Volatilidade Anualizada
-        returns = prices.pct_change()
-        volatility = returns.std() * np.sqrt(252)
-        
-        # Índice de Sharpe
-        sharpe_ratio = (return_12m - risk_free_rate) / volatility if volatility > 0 else 0
-        
-        metrics.append({
-            "Ativo": col,
-            "Retorno YTD": f"{ytd_return:.2%}",
-            "Retorno 12M": f"{return_12m:.2%}",
-            "Volatilidade Anual.": f"{volatility:.2%}",
-            "Índice de Sharpe": f"{sharpe_ratio:.2f}"
-        })
-        
-    return pd.DataFrame(metrics).set_index("Ativo")
+def discourse_lexicon(bank, lang):
+    """Léxico em uso para o banco central ('copom' ou 'fomc'): o padrão do idioma ou o editado nesta sessão."""
+    return st.session_state.get(f"lexicon_{bank}") or text_index.DISCOURSE_LEXICONS[lang]
 
-def analyze_central_bank_discourse(text, lang='en'):
-    """Análise simples de sentimento baseada em palavras-chave."""
-    text = text.lower()
-    if lang == 'en':
-        hawkish_words = ['strong', 'tightening', 'inflation', 'raise', 'hike', 'robust', 'above target']
-        dovish_words = ['easing', 'cut', 'recession', 'unemployment', 'weak', 'below target', 'supportive']
-    else: # Português
-        hawkish_words = ['forte', 'aperto', 'inflação', 'aumentar', 'robusto', 'acima da meta']
-        dovish_words = ['afrouxamento', 'corte', 'recessão', 'desemprego', 'fraco', 'abaixo da meta', 'suporte']
-
-    hawkish_score = sum(text.count(word) for word in hawkish_words)
-    dovish_score = sum(text.count(word) for word in dovish_words)
-    return hawkish_score, dovish_score
+# As atas e o léxico entram como argumentos: fazem parte da chave do st.cache_data
+@instrument(cache=st.cache_data(ttl=PAGE_CACHE_TTL))
+def get_tone_history(meetings, lang, lexicon):
+    """Placar e tom líquido de todas as atas registradas do banco central, com o léxico em uso."""
+    return text_index.tone_history(meetings, lang, lexicon)
+
+@instrument(cache=st.cache_data(ttl=PAGE_CACHE_TTL))
+def get_tone_table(bank, meetings, lang, lexicon):
+    """Placar, tom e mudanças frase a frase de todas as atas (pag.tone), com o juro básico de cada reunião."""
+    table = tone.tone_table(meetings, lang, lexicon)
+    try: rate = tone.policy_rate(bank)
+    except Exception: rate = pd.Series(dtype=float)
+    if table.empty or rate.empty: return table, rate
+    return tone.with_policy_rate(table, rate), rate
+
+def render_sentence_changes(bank, meetings, dates):
+    """O que entrou, saiu e mudou na ata escolhida em relação à anterior."""
+    selected = st.selectbox("Reunião (comparada com a anterior)", dates[::-1], key=f"diff_date_{bank}")
+    changes = tone.meeting_changes(meetings, selected)
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Similaridade", f"{changes['similarity']:.0%}", help=f"Comparada com a ata de {changes['previous']}.")
+    c2.metric("Frases Novas", len(changes["added"])); c3.metric("Frases Removidas", len(changes["removed"])); c4.metric("Frases Alteradas", len(changes["changed"]))
+    for title, items in (("➕ Novas", changes["added"]), ("➖ Removidas", changes["removed"])):
+        if items:
+            st.markdown(f"**{title}**")
+            st.markdown("\n".join(f"- {s}" for s in items[:MAX_LISTED_SENTENCES]))
+    if changes["changed"]:
+        st.markdown("**✏️ Alteradas**")
+        for before, after in changes["changed"][:MAX_LISTED_SENTENCES]:
+            st.caption(f"Antes: {before}"); st.markdown(f"Depois: {after}")
+    if max(len(changes["added"]), len(changes["removed"]), len(changes["changed"])) > MAX_LISTED_SENTENCES:
+        st.caption(f"Listas limitadas às {MAX_LISTED_SENTENCES} primeiras frases.")
+
+def render_discourse_explorer(bank, lang):
+    """Tom de todas as atas ao longo do tempo contra o juro básico, mudanças entre atas, busca de expressões e léxico."""
+    meetings = meetings_by_bank[bank]
+    if not meetings: return
+    label = bank.upper()
+    with st.expander(f"🔎 Histórico do Tom, Mudanças e Busca nas Atas do {label}"):
+        tab_tone, tab_diff, tab_search, tab_lexicon = st.tabs(["Tom x Juro Básico", "Mudanças entre Atas", "Busca", "Léxico"])
+        table, rate = get_tone_table(bank, meetings, lang, discourse_lexicon(bank, lang))
+        with tab_tone:
+            if not rate.empty:
+                path = rate.loc[table.index[0] - pd.DateOffset(years=1):].resample("W").last().ffill().rename(rate.name)
+                fig = charts.tone_policy_figure(table["Tom Líquido"], path, f"Tom Líquido das Atas do {label} x {rate.name.replace(' (%)', '')}")
+            else:
+                fig = charts.line_chart(table[["Tom Líquido"]], title=f"Tom Líquido das Atas do {label} (+1 = só termos hawkish, -1 = só dovish)")
+                fig.update_layout(showlegend=False); fig.add_hline(y=0, line_dash="dash", line_color="gray")
+            st.plotly_chart(fig, use_container_width=True, key=f"tone_{bank}")
+            st.caption("Tom líquido = (hawkish - dovish) / (hawkish + dovish). O saldo hawkish das mudanças compara os termos das frases que entraram com os das que saíram em relação à ata anterior.")
+            st.dataframe(table.sort_index(ascending=False).style.format("{:,.2f}", na_rep="—").format("{:,.0f}", subset=["Hawkish", "Dovish", "Frases Novas", "Frases Removidas", "Frases Alteradas", "Saldo Hawkish das Mudanças"], na_rep="—"),
+                         use_container_width=True)
+        with tab_diff:
+            dates = list(text_index.meeting_texts(meetings))
+            if len(dates) < 2: st.info("É preciso ao menos duas atas para comparar.")
+            else: render_sentence_changes(bank, meetings, dates[1:])
+
+        with tab_search:
+            query = st.text_input("Buscar expressão em todas as atas", key=f"search_{bank}", placeholder="ex: acima da meta" if lang == "pt" else "ex: further tightening")
+            if query:
+                results = text_index.corpus_index(text_index.meeting_texts(meetings)).search(query)
+                if results.empty: st.info(f"Nenhuma ata do {label} contém \"{query}\".")
+                else:
+                    st.caption(f"{len(results)} atas, {results['Ocorrências'].sum()} ocorrências (trecho da primeira ocorrência de cada ata).")
+                    st.dataframe(results.rename(columns={"Documento": "Reunião"}).style.format({"Por Mil Tokens": "{:.2f}"}), use_container_width=True, hide_index=True)
+
+        with tab_lexicon:
+            st.markdown("**Léxico do placar** (um termo ou expressão por linha; maiúsculas e acentos são ignorados; `*` no fim vale como prefixo, ex: `hik*`)")
+            lexicon = discourse_lexicon(bank, lang)
+            c1, c2 = st.columns(2)
+            hawkish = c1.text_area("Termos hawkish", "\n".join(lexicon["hawkish"]), key=f"lexicon_hawkish_{bank}")
+            dovish = c2.text_area("Termos dovish", "\n".join(lexicon["dovish"]), key=f"lexicon_dovish_{bank}")
+            b1, b2 = st.columns(2)
+            if b1.button("Aplicar léxico", key=f"apply_lexicon_{bank}"):
+                st.session_state[f"lexicon_{bank}"] = {"hawkish": [t.strip() for t in hawkish.splitlines() if t.strip()], "dovish": [t.strip() for t in dovish.splitlines() if t.strip()]}
+                st.rerun()
+            if b2.button("Restaurar padrão", key=f"reset_lexicon_{bank}"):
+                for key in (f"lexicon_{bank}", f"lexicon_hawkish_{bank}", f"lexicon_dovish_{bank}"): st.session_state.pop(key, None)
+                st.rerun()
 
 def style_recommendation(val):
     """Aplica cores às recomendações na tabela."""
@@ -245,31 +254,102 @@ def style_recommendation(val):
         return 'background-color: #F39C12; color: white' # Amarelo/Laranja
     return ''
 
-@st.cache_data(ttl=3600)
+@instrument(cache=st.cache_data(ttl=PAGE_CACHE_TTL))
 def get_brazilian_yield_curve():
-    codes = {"1 Ano": 12469, "2 Anos": 12470, "3 Anos": 12471, "5 Anos": 12473, "10 Anos": 12478}
-    yield_data = []
-    for name, code in codes.items():
-        try:
-            val = fetch_bcb_series({name: code}, start_date=datetime.now() - pd.Timedelta(days=10))
-            if not val.empty: yield_data.append({'Prazo': name, 'Taxa (%)': val.iloc[-1, 0]})
-        except: continue
-    df = pd.DataFrame(yield_data)
-    if not df.empty:
-        df['Prazo'] = pd.Categorical(df['Prazo'], categories=codes.keys(), ordered=True)
-        return df.sort_values('Prazo')
-    return df
-
-@st.cache_data(ttl=3600)
+    return curves.latest_table(get_curve_panel("BR"))
+
+@instrument(cache=st.cache_data(ttl=PAGE_CACHE_TTL))
 def get_brazilian_real_interest_rate(start_date):
-    try:
-        selic = fetch_bcb_series({'selic': 432}, start_date)
-        ipca = fetch_bcb_series({'ipca': 13522}, start_date)
-        if selic.empty or ipca.empty: return pd.DataFrame()
-        df = selic.resample('M').mean().join(ipca.resample('M').last()).dropna()
-        df['Juro Real (aa)'] = (((1 + df['selic']/100) / (1 + df['ipca']/100)) - 1) * 100
-        return df[['Juro Real (aa)']]
-    except: return pd.DataFrame()
+    """Juro real ex-post/ex-ante mensal (pag.real_rates: o mesmo resultado usado pela Renda Fixa)."""
+    try: return real_rates.real_rate_series(real_rates.real_rate_history(), start_date)
+    except Exception: return pd.DataFrame()
+
+@instrument(cache=st.cache_data(ttl=PAGE_CACHE_TTL))
+def get_composite_summary(country, start_date):
+    """Difusão, momento e composto do país (pag.composites) e as contribuições de cada indicador no último mês."""
+    try: return composites.country_summary(country, start_date)
+    except Exception: return pd.DataFrame(), pd.DataFrame()
+
+def render_composite_summary(country, start_date):
+    """Visão agregada de todos os indicadores registrados do país, antes dos gráficos individuais."""
+    st.subheader(f"Resumo dos Indicadores: Difusão e Momento ({country})")
+    st.caption("Cada indicador é padronizado por um z-score móvel de 5 anos (com o sinal invertido quando alta significa economia mais fraca, como o desemprego). A difusão é a % dos indicadores cujo z-score subiu nos últimos 3 meses; o momento é a variação média.")
+    indices, table = get_composite_summary(country, start_date)
+    if indices.empty:
+        st.warning("Não foi possível montar os índices agregados."); return
+    last, prev = indices.iloc[-1], indices.iloc[-2] if len(indices) > 1 else indices.iloc[-1]
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Difusão", f"{last['Difusão (%)']:.0f}%", f"{last['Difusão (%)'] - prev['Difusão (%)']:+.0f} p.p.")
+    c2.metric("Momento (z, 3 meses)", f"{last['Momento']:+.2f}", f"{last['Momento'] - prev['Momento']:+.2f}")
+    c3.metric("Composto (z)", f"{last['Composto']:+.2f}", f"{last['Composto'] - prev['Composto']:+.2f}")
+    st.caption(f"Mês de referência: {indices.index[-1]:%m/%Y} ({last['Cobertura (%)']:.0f}% dos indicadores com dado).")
+    col1, col2 = st.columns(2)
+    with col1:
+        fig = charts.area_chart(indices["Difusão (%)"], width_px=charts.CHART_WIDTH_PX // 2, title="Índice de Difusão (% dos indicadores melhorando)")
+        fig.update_layout(showlegend=False, yaxis_title="%"); fig.add_hline(y=50, line_dash="dash", line_color="gray")
+        st.plotly_chart(fig, use_container_width=True, key=f"diffusion_{country}")
+    with col2:
+        fig = charts.line_chart(indices[["Composto", "Momento"]], width_px=charts.CHART_WIDTH_PX // 2, title="Composto e Momento (z-score)")
+        fig.update_layout(yaxis_title="z", legend_title=""); fig.add_hline(y=0, line_dash="dash", line_color="gray")
+        st.plotly_chart(fig, use_container_width=True, key=f"momentum_{country}")
+    with st.expander("Ver a contribuição de cada indicador no mês de referência"):
+        st.dataframe(table.style.format("{:+.2f}", na_rep="—").background_gradient(cmap="RdYlGn", axis=0), use_container_width=True)
+
+# --- FRAGMENTOS (widgets que reexecutam só a própria seção) ---
+@st.fragment
+def render_global_indices(index_panel, index_metrics):
+    """Multiselect de índices globais: mudar a seleção reexecuta só este bloco, recortando dados já calculados."""
+    # --- SEÇÃO 1: GRÁFICO DE PERFORMANCE ---
+    sel = st.multiselect("Selecione os índices:", options=list(index_panel.columns), default=[name for name in ("S&P 500", "Ibovespa") if name in index_panel.columns])
+    if not sel: return
+    data = index_panel[sel].dropna(how="all")
+
+    st.markdown("##### Performance Normalizada (Base 100)")
+    st.plotly_chart(charts.line_chart((data / data.dropna().iloc[0]) * 100, title="Performance Relativa dos Índices"), use_container_width=True)
+
+    # --- SEÇÃO 2: TABELA DE MÉTRICAS DE PERFORMANCE ---
+    # As métricas são por coluna: recortar a tabela do painel completo dá o mesmo resultado
+    st.markdown("##### Métricas de Performance e Risco")
+    st.dataframe(index_metrics.reindex(sel).style.format(performance.PERFORMANCE_FORMATS, na_rep="—"), use_container_width=True)
+    st.divider()
+
+    # --- SEÇÃO 3: ANÁLISE DE RISCO (VOLATILIDADE MÓVEL) ---
+    st.markdown("##### Volatilidade Móvel (60 dias)")
+    st.caption("A volatilidade móvel mostra a evolução do risco (desvio-padrão dos retornos) ao longo do tempo.")
+    rolling_vol = data.pct_change().rolling(window=60).std() * np.sqrt(252)
+    st.plotly_chart(charts.line_chart(rolling_vol, title="Volatilidade Anualizada Móvel (60d)"), use_container_width=True)
+    st.divider()
+
+@st.fragment
+def render_curve_history(market, panel, metrics):
+    """Curva atual vs. uma data, superfície histórica, inclinação/curvatura e inversões: os controles reexecutam só este bloco."""
+    first, last = panel.index[0].date(), panel.index[-1].date()
+    compare_date = st.date_input("Comparar a curva atual com a de:", value=max(first, last - timedelta(days=365)), min_value=first, max_value=last, key=f"curve_date_{market}")
+    snapshots = [curves.curve_snapshot(panel, date) for date in (last, compare_date)]
+    snapshots = pd.DataFrame({f"{s.name:%Y-%m-%d}": s for s in snapshots if s is not None})
+    fig = px.line(snapshots, markers=True, title="Curva Observada em Duas Datas")
+    fig.update_layout(xaxis_title="Prazo (anos)", yaxis_title="Taxa (%)", legend_title="Data")
+    st.plotly_chart(fig, use_container_width=True, key=f"curve_snapshots_{market}")
+
+    view = st.radio("Histórico da curva:", ["Inclinação e curvatura", "Superfície 3D"], horizontal=True, key=f"curve_view_{market}")
+    if view == "Superfície 3D":
+        st.plotly_chart(charts.surface_figure(curves.curve_surface(panel), "Curva de Juros ao Longo do Tempo (semanal)"), use_container_width=True, key=f"curve_surface_{market}")
+    elif metrics.columns.drop("Nível").empty:
+        st.info("Sem vértices suficientes para calcular a inclinação e a curvatura da curva.")
+    else:
+        fig = charts.line_chart(metrics.drop(columns="Nível"), title="Inclinação e Curvatura (p.p.)")
+        fig.add_hline(y=0, line_dash="dash", line_color="red")
+        st.plotly_chart(fig, use_container_width=True, key=f"curve_shape_{market}")
+
+    flags = curves.inversion_flags(metrics, market)
+    if flags.columns.empty: return
+    for column, name in zip(st.columns(len(flags.columns)), flags.columns):
+        series = flags[name].dropna()
+        if series.empty: continue
+        episodes = curves.inversion_episodes(series)
+        column.metric(f"Spread {name}", f"{metrics[name].dropna().iloc[-1]:.2f} p.p.", "Invertida" if series.iloc[-1] else "Positiva", delta_color="inverse" if series.iloc[-1] else "normal")
+        last_episode = f"último episódio: {episodes['Início'].iloc[-1]:%m/%Y} a {episodes['Fim'].iloc[-1]:%m/%Y}" if not episodes.empty else "sem inversões no histórico"
+        column.caption(f"Invertida em {series.mean() * 100:.0f}% dos pregões desde {series.index[0]:%Y}; {last_episode}.")
 
 # --- UI DA APLICAÇÃO ---
 st.title("Macro Hub")
@@ -281,7 +361,10 @@ tab_br, tab_us, tab_global = st.tabs(["Brasil", "Estados Unidos", "Mercados Glob
 # --- ABA BRASIL (VERSÃO CORRIGIDA E PADRONIZADA) ---
 with tab_br:
     st.header("Principais Indicadores do Brasil")
-    subtab_br_activity, subtab_br_jobs, subtab_br_inflation, subtab_br_yield, subtab_br_bc = st.tabs(["Atividade", "Mercado de Trabalho", "Inflação", "Curva de Juros", "Visão do BCB"])
+    subtab_br_summary, subtab_br_activity, subtab_br_jobs, subtab_br_inflation, subtab_br_yield, subtab_br_bc = st.tabs(["Resumo", "Atividade", "Mercado de Trabalho", "Inflação", "Curva de Juros", "Visão do BCB"])
+
+    with subtab_br_summary:
+        render_composite_summary("Brasil", start_date)
     
     with subtab_br_activity:
         st.subheader("Indicadores de Atividade Econômica e Confiança")
@@ -319,9 +402,9 @@ with tab_br:
         st.divider()
 
         # 5. IBC-Br
-        # Código SGS BCB: 24369
+        # Código SGS BCB: 24364 (dessazonalizado)
         plot_indicator_with_analysis(
-            'bcb', {'IBC-Br': 24369},
+            'bcb', {'IBC-Br': 24364},
             "IBC-Br (Prévia do PIB)",
             "Índice de Atividade Econômica do BCB, considerado uma 'prévia' mensal do Produto Interno Bruto (PIB).",
             "Índice"
@@ -443,15 +526,19 @@ with tab_br:
         with c2: 
             real_interest_br_df = get_brazilian_real_interest_rate(start_date)
             if not real_interest_br_df.empty:
-                fig = px.area(real_interest_br_df, title="Taxa de Juro Real (Ex-Post)")
+                fig = charts.line_chart(real_interest_br_df, width_px=charts.CHART_WIDTH_PX // 2, title="Taxa de Juro Real (Ex-Post e Ex-Ante)")
                 fig.add_hline(y=0, line_dash="dash", line_color="red"); st.plotly_chart(fig, use_container_width=True)
         st.divider()
         st.markdown("##### Spread da Curva de Juros (5 Anos - 2 Anos)")
-        spread_data_br = fetch_bcb_series({"Juro 5 Anos": 12473, "Juro 2 Anos": 12470}, start_date)
-        if not spread_data_br.empty and all(col in spread_data_br.columns for col in ["Juro 5 Anos", "Juro 2 Anos"]):
-            spread_br = (spread_data_br["Juro 5 Anos"] - spread_data_br["Juro 2 Anos"]).dropna()
-            fig_spread = px.area(spread_br, title="Spread 5 Anos - 2 Anos (Pré)")
+        curve_shape_br = get_curve_shape("BR")
+        if "5A - 2A" in curve_shape_br.columns:
+            spread_br = curve_shape_br["5A - 2A"].loc[start_date:].dropna()
+            fig_spread = charts.area_chart(spread_br, title="Spread 5 Anos - 2 Anos (Pré)")
             fig_spread.add_hline(y=0, line_dash="dash", line_color="gray"); st.plotly_chart(fig_spread, use_container_width=True)
+        st.divider()
+        st.markdown("##### Histórico da Curva de Juros Pré-Fixada")
+        curve_panel_br = get_curve_panel("BR")
+        if not curve_panel_br.empty: render_curve_history("BR", curve_panel_br, curve_shape_br)
 
     # SUBSTITUA TODO O CONTEÚDO DESTA ABA
     with subtab_br_bc:
@@ -480,7 +567,7 @@ with tab_br:
         # --- ACOMPANHAMENTO DO COPOM (ADAPTADO DO FOMC) ---
         st.subheader("Acompanhamento Histórico do Discurso do COPOM")
         
-        meetings = st.session_state.get('copom_meetings', []) # Usar .get para segurança
+        meetings = meetings_by_bank['copom']
         if not meetings:
             st.info("Nenhum registro de reunião do COPOM foi adicionado ainda.")
         else:
@@ -493,9 +580,9 @@ with tab_br:
             if selected_meeting:
                 st.metric("Decisão da Taxa Selic", selected_meeting.get("decision", "N/A"))
                 
-                # Análise Hawkish/Dovish
-                h_score = selected_meeting.get("analysis", {}).get("hawkish", 0)
-                d_score = selected_meeting.get("analysis", {}).get("dovish", 0)
+                # Análise Hawkish/Dovish (placar do índice das atas, com o léxico em uso)
+                meeting_tone = get_tone_history(meetings_by_bank['copom'], 'pt', discourse_lexicon('copom', 'pt')).loc[pd.Timestamp(selected_date)]
+                h_score, d_score = int(meeting_tone["Hawkish"]), int(meeting_tone["Dovish"])
                 final_tone = "Hawkish 🦅" if h_score > d_score else "Dovish 🕊️" if d_score > h_score else "Neutro 😐"
                 
                 c1, c2, c3 = st.columns(3)
@@ -510,6 +597,7 @@ with tab_br:
                 
                 with st.expander("Ver texto completo da ata"):
                     st.text(selected_meeting.get("minutes_text", "Texto não disponível."))
+            render_discourse_explorer('copom', 'pt')
 
         # --- MODO EDITOR (ADAPTADO PARA O COPOM) ---
         if st.session_state.get("role") == "Analista":
@@ -539,23 +627,21 @@ with tab_br:
                                 with open(file_path, "wb") as f: f.write(m_pdf.getbuffer())
                                 new_meeting["pdf_path"] = file_path
                             
-                            st.session_state.copom_meetings.append(new_meeting)
-                            save_data(st.session_state.copom_meetings, COPOM_MEETINGS_FILE)
+                            store.save_meeting('copom', new_meeting)
                             st.success("Nova reunião do COPOM salva com sucesso!"); st.rerun()
                         else:
                             st.error("Data, Decisão e Texto da Ata são campos obrigatórios.")
     
             with editor_tab2:
                 st.markdown("##### Excluir um Registro de Reunião")
-                if not st.session_state.get('copom_meetings', []):
+                if not meetings_by_bank['copom']:
                     st.info("Nenhuma reunião para gerenciar.")
                 else:
-                    sorted_meetings_delete = sorted(st.session_state.copom_meetings, key=lambda x: x['meeting_date'], reverse=True)
+                    sorted_meetings_delete = sorted(meetings_by_bank['copom'], key=lambda x: x['meeting_date'], reverse=True)
                     for i, meeting in enumerate(sorted_meetings_delete):
                         st.markdown(f"**Reunião de {meeting['meeting_date']}**")
                         if st.button("Excluir este registro", key=f"delete_copom_{meeting['meeting_date']}"):
-                            st.session_state.copom_meetings = [m for m in st.session_state.copom_meetings if m['meeting_date'] != meeting['meeting_date']]
-                            save_data(st.session_state.copom_meetings, COPOM_MEETINGS_FILE)
+                            store.delete_meeting('copom', meeting['meeting_date'])
                             st.success("Registro excluído!"); st.rerun()
                         st.divider()
     
@@ -563,7 +649,10 @@ with tab_br:
 with tab_us:
     st.header("Principais Indicadores dos Estados Unidos")
         
-    subtab_us_activity, subtab_us_jobs, subtab_us_inflation, subtab_us_real_estate, subtab_us_yield, subtab_us_fed = st.tabs(["Atividade", "Mercado de Trabalho", "Inflação", "Imobiliário", "Curva de Juros", "Visão do Fed"])
+    subtab_us_summary, subtab_us_activity, subtab_us_jobs, subtab_us_inflation, subtab_us_real_estate, subtab_us_yield, subtab_us_fed = st.tabs(["Resumo", "Atividade", "Mercado de Trabalho", "Inflação", "Imobiliário", "Curva de Juros", "Visão do Fed"])
+
+    with subtab_us_summary:
+        render_composite_summary("EUA", start_date)
         
     with subtab_us_activity:
         st.subheader("Indicadores de Atividade Econômica")
@@ -631,17 +720,17 @@ with tab_us:
         col_cpi3, col_cpi4 = st.columns(2)
         with col_cpi3:
             # CPI de Bens Duráveis (MoM)
-            cpi_durables = fetch_fred_series("CUSR0000SAD", start_date).pct_change(1).dropna() * 100
+            cpi_durables = get_indicator_series('fred', "CUSR0000SAD", ("mom",), start_date)
             if not cpi_durables.empty:
-                fig = px.area(cpi_durables, title="CPI - Bens Duráveis (Variação Mensal)")
+                fig = charts.area_chart(cpi_durables, width_px=charts.CHART_WIDTH_PX // 2, title="CPI - Bens Duráveis (Variação Mensal)")
                 fig.update_layout(showlegend=False, yaxis_title="Var. Mensal %")
                 fig.add_hline(y=0, line_dash="dash", line_color="gray")
                 st.plotly_chart(fig, use_container_width=True, key="cpi_durables")
         with col_cpi4:
             # CPI de Serviços (MoM)
-            cpi_services = fetch_fred_series("CUSR0000SASLE", start_date).pct_change(1).dropna() * 100
+            cpi_services = get_indicator_series('fred', "CUSR0000SASLE", ("mom",), start_date)
             if not cpi_services.empty:
-                fig = px.area(cpi_services, title="CPI - Serviços (Variação Mensal)")
+                fig = charts.area_chart(cpi_services, width_px=charts.CHART_WIDTH_PX // 2, title="CPI - Serviços (Variação Mensal)")
                 fig.update_layout(showlegend=False, yaxis_title="Var. Mensal %")
                 fig.add_hline(y=0, line_dash="dash", line_color="gray")
                 st.plotly_chart(fig, use_container_width=True, key="cpi_services")
@@ -783,22 +872,20 @@ with tab_us:
     
         st.markdown("##### Spreads da Curva de Juros (Indicadores de Recessão)")
         col3, col4 = st.columns(2)
-        with col3:
-            j10a = fetch_fred_series("DGS10", start_date)
-            j2a = fetch_fred_series("DGS2", start_date)
-            if not j10a.empty and not j2a.empty:
-                spread = (j10a - j2a).dropna()
-                fig = px.area(spread, title="Spread 10 Anos - 2 Anos")
-                fig.add_hline(y=0, line_dash="dash", line_color="red")
-                st.plotly_chart(fig, use_container_width=True, key="spread_10y_2y")
-        with col4:
-            j2a_s = fetch_fred_series("DGS2", start_date)
-            j3m = fetch_fred_series("DGS3MO", start_date)
-            if not j2a_s.empty and not j3m.empty:
-                spread = (j2a_s - j3m).dropna()
-                fig = px.area(spread, title="Spread 2 Anos - 3 Meses")
-                fig.add_hline(y=0, line_dash="dash", line_color="red")
-                st.plotly_chart(fig, use_container_width=True, key="spread_2y_3m")
+        # Spreads sobre as curvas ajustadas (NSS) de cada data: prazos constantes, sem depender de um vértice faltante no dia
+        us_curve = get_yield_curve("US")
+        if us_curve is not None:
+            for column, (long, short, title, key) in zip((col3, col4), [(10, 2, "Spread 10 Anos - 2 Anos", "spread_10y_2y"), (2, 0.25, "Spread 2 Anos - 3 Meses", "spread_2y_3m")]):
+                with column:
+                    spread = us_curve.spread(long, short).loc[start_date:]
+                    fig = charts.area_chart(spread, width_px=charts.CHART_WIDTH_PX // 2, title=title)
+                    fig.add_hline(y=0, line_dash="dash", line_color="red")
+                    st.plotly_chart(fig, use_container_width=True, key=key)
+        st.divider()
+
+        st.markdown("##### Histórico da Curva de Juros")
+        curve_panel_us = get_curve_panel("US")
+        if not curve_panel_us.empty: render_curve_history("US", curve_panel_us, get_curve_shape("US"))
 
     with subtab_us_fed:
         st.subheader("Painel de Política Monetária - Federal Reserve (Fed)")
@@ -831,7 +918,7 @@ with tab_us:
         balance_sheet = fetch_fred_series("WALCL", start_date)
         if not balance_sheet.empty:
             # A divisão por 1M é para exibir em Trilhões, por isso o gráfico é manual
-            fig_bal = px.area(balance_sheet / 1000000, title="Ativos Totais no Balanço do Fed")
+            fig_bal = charts.area_chart(balance_sheet / 1000000, title="Ativos Totais no Balanço do Fed")
             fig_bal.update_layout(showlegend=False, yaxis_title="$ Trilhões")
             st.plotly_chart(fig_bal, use_container_width=True, key="fed_balance_sheet")
         else:
@@ -862,7 +949,7 @@ with tab_us:
         st.divider()
         st.subheader("Acompanhamento Histórico do Discurso do FOMC")
         
-        meetings = st.session_state.get('fomc_meetings', [])
+        meetings = meetings_by_bank['fomc']
         if not meetings:
             st.info("Nenhum registro de reunião do FOMC foi adicionado ainda.")
         else:
@@ -875,8 +962,8 @@ with tab_us:
             
             if selected_meeting:
                 st.metric("Decisão de Juros Tomada", selected_meeting.get("decision", "N/A"))
-                h_score = selected_meeting.get("analysis", {}).get("hawkish", 0)
-                d_score = selected_meeting.get("analysis", {}).get("dovish", 0)
+                meeting_tone = get_tone_history(meetings_by_bank['fomc'], 'en', discourse_lexicon('fomc', 'en')).loc[pd.Timestamp(selected_date)]
+                h_score, d_score = int(meeting_tone["Hawkish"]), int(meeting_tone["Dovish"])
                 final_tone = "Hawkish 🦅" if h_score > d_score else "Dovish 🕊️" if d_score > h_score else "Neutro 😐"
                 
                 c1_fomc, c2_fomc, c3_fomc = st.columns(3)
@@ -890,6 +977,7 @@ with tab_us:
                 
                 with st.expander("Ver texto completo da ata"):
                     st.text(selected_meeting.get("minutes_text", "Texto não disponível."))
+            render_discourse_explorer('fomc', 'en')
     
         # --- MODO EDITOR (MANTIDO) ---
         if st.session_state.get("role") == "Analista":
@@ -918,23 +1006,21 @@ with tab_us:
                                 with open(file_path, "wb") as f: f.write(m_pdf.getbuffer())
                                 new_meeting["pdf_path"] = file_path
                             
-                            st.session_state.fomc_meetings.append(new_meeting)
-                            save_data(st.session_state.fomc_meetings, FOMC_MEETINGS_FILE)
+                            store.save_meeting('fomc', new_meeting)
                             st.success("Nova reunião salva com sucesso!"); st.rerun()
                         else:
                             st.error("Data, Decisão e Texto da Ata são campos obrigatórios.")
     
             with editor_tab2:
                 st.markdown("##### Excluir um Registro de Reunião")
-                if not st.session_state.get('fomc_meetings', []):
+                if not meetings_by_bank['fomc']:
                     st.info("Nenhuma reunião para gerenciar.")
                 else:
-                    sorted_meetings_delete = sorted(st.session_state.fomc_meetings, key=lambda x: x['meeting_date'], reverse=True)
+                    sorted_meetings_delete = sorted(meetings_by_bank['fomc'], key=lambda x: x['meeting_date'], reverse=True)
                     for i, meeting in enumerate(sorted_meetings_delete):
                         st.markdown(f"**Reunião de {meeting['meeting_date']}**")
                         if st.button("Excluir este registro", key=f"delete_fomc_{meeting['meeting_date']}"):
-                            st.session_state.fomc_meetings = [m for m in st.session_state.fomc_meetings if m['meeting_date'] != meeting['meeting_date']]
-                            save_data(st.session_state.fomc_meetings, FOMC_MEETINGS_FILE)
+                            store.delete_meeting('fomc', meeting['meeting_date'])
                             st.success("Registro excluído!"); st.rerun()
                         st.divider()
 
@@ -945,56 +1031,34 @@ with tab_global:
     subtab_equity, subtab_commodities, subtab_risk, subtab_big_players = st.tabs(["Ações", "Commodities", "Risco", "Visão dos Big Players"])
     with subtab_equity:
         st.subheader("Análise de Performance de Índices Globais")
-        tickers = {"S&P 500": "^GSPC", "Ibovespa": "^BVSP", "Nasdaq": "^IXIC", "DAX (Alemanha)": "^GDAXI", "Nikkei (Japão)": "^N225"}
-        
-        # --- SEÇÃO 1: GRÁFICO DE PERFORMANCE ---
-        sel = st.multiselect("Selecione os índices:", options=list(tickers.keys()), default=["S&P 500", "Ibovespa"])
-        
-        if sel:
-            selected_tickers_map = {name: code for name, code in tickers.items() if name in sel}
-            data = fetch_market_data(list(selected_tickers_map.values()))
-            
-            if not data.empty:
-                # Renomeia as colunas de volta para os nomes amigáveis
-                data.rename(columns={code: name for name, code in selected_tickers_map.items()}, inplace=True)
-                
-                st.markdown("##### Performance Normalizada (Base 100)")
-                st.plotly_chart(px.line((data / data.dropna().iloc[0]) * 100, title="Performance Relativa dos Índices"), use_container_width=True)
-                
-                # --- SEÇÃO 2: TABELA DE MÉTRICAS DE PERFORMANCE ---
-                st.markdown("##### Métricas de Performance e Risco")
-                st.dataframe(calculate_performance_metrics(data), use_container_width=True)
-                st.divider()
-    
-                # --- SEÇÃO 3: ANÁLISE DE RISCO (VOLATILIDADE MÓVEL) ---
-                st.markdown("##### Volatilidade Móvel (60 dias)")
-                st.caption("A volatilidade móvel mostra a evolução do risco (desvio-padrão dos retornos) ao longo do tempo.")
-                rolling_vol = data.pct_change().rolling(window=60).std() * np.sqrt(252)
-                st.plotly_chart(px.line(rolling_vol, title="Volatilidade Anualizada Móvel (60d)"), use_container_width=True)
-                st.divider()
+        tickers = MARKET_PANELS["Índices Globais"]
+        # Painel e métricas de todos os índices calculados uma vez; o multiselect só recorta as colunas
+        index_panel = fetch_market_data(list(tickers.values())).rename(columns={code: name for name, code in tickers.items()})
+        if not index_panel.empty:
+            render_global_indices(index_panel, calculate_performance_metrics(index_panel))
     
         # A SEÇÃO DE VALUATION FOI REMOVIDA
         
         # --- SEÇÃO DE ANÁLISE DE ESTILO/FATOR ---
         st.markdown("##### Análise de Estilo: Growth vs. Value")
-        factor_tickers = {"Growth (Crescimento)": "VUG", "Value (Valor)": "VTV"}
+        factor_tickers = MARKET_PANELS["Estilo"]
         factor_data = fetch_market_data(list(factor_tickers.values()))
         if not factor_data.empty:
             factor_data.rename(columns={code: name for name, code in factor_tickers.items()}, inplace=True)
             # Ratio de performance
             factor_ratio = (factor_data["Growth (Crescimento)"] / factor_data["Value (Valor)"]).dropna()
-            st.plotly_chart(px.line(factor_ratio, title="Ratio de Performance: Growth vs. Value"), use_container_width=True)
+            st.plotly_chart(charts.line_chart(factor_ratio, title="Ratio de Performance: Growth vs. Value"), use_container_width=True)
             st.caption("Um ratio crescente indica que ações de 'Growth' estão performando melhor que ações de 'Value'.")
     with subtab_commodities:
         c1,c2 = st.columns(2)
-        comm_tickers = {"Petróleo WTI": "CL=F", "Ouro": "GC=F"}; data = fetch_market_data(list(comm_tickers.values()))
-        if not data.empty: data.rename(columns=lambda c: next(k for k,v in comm_tickers.items() if v==c), inplace=True); c1.plotly_chart(px.line(data, title="Commodities"), use_container_width=True)
-        curr_tickers = {"Dólar/Real": "BRL=X", "Euro/Dólar": "EURUSD=X"}; data=fetch_market_data(list(curr_tickers.values()))
-        if not data.empty: data.rename(columns=lambda c: next(k for k,v in curr_tickers.items() if v==c), inplace=True); c2.plotly_chart(px.line(data, title="Câmbio"), use_container_width=True)
+        comm_tickers = MARKET_PANELS["Commodities"]; data = fetch_market_data(list(comm_tickers.values()))
+        if not data.empty: data.rename(columns=lambda c: next(k for k,v in comm_tickers.items() if v==c), inplace=True); c1.plotly_chart(charts.line_chart(data, width_px=charts.CHART_WIDTH_PX // 2, title="Commodities"), use_container_width=True)
+        curr_tickers = MARKET_PANELS["Câmbio"]; data=fetch_market_data(list(curr_tickers.values()))
+        if not data.empty: data.rename(columns=lambda c: next(k for k,v in curr_tickers.items() if v==c), inplace=True); c2.plotly_chart(charts.line_chart(data, width_px=charts.CHART_WIDTH_PX // 2, title="Câmbio"), use_container_width=True)
     with subtab_risk:
         vix = fetch_market_data(["^VIX"])
         if not vix.empty:
-            fig = px.area(vix, title="Índice de Volatilidade VIX"); fig.add_hline(y=20, line_dash="dash"); fig.add_hline(y=30, line_dash="dash", line_color="red"); st.plotly_chart(fig, use_container_width=True)
+            fig = charts.area_chart(vix, title="Índice de Volatilidade VIX"); fig.add_hline(y=20, line_dash="dash"); fig.add_hline(y=30, line_dash="dash", line_color="red"); st.plotly_chart(fig, use_container_width=True)
     with subtab_big_players:
         st.subheader("Visão Consolidada dos Grandes Players")
 
@@ -1003,9 +1067,9 @@ with tab_global:
         if recommendations_df.empty:
             st.info("Nenhuma recomendação tática adicionada.")
         else:
-            latest_recs = recommendations_df.sort_values('Data', ascending=False).drop_duplicates(['Gestora', 'Classe de Ativo'])
-            pivot_table = latest_recs.pivot_table(index='Classe de Ativo', columns='Gestora', values='Recomendação', aggfunc='first').fillna("-")
-            st.dataframe(pivot_table.style.applymap(style_recommendation), use_container_width=True)
+            # Só a recomendação vigente de cada (gestora, classe de ativo), já filtrada no banco
+            pivot_table = recommendations_df.pivot_table(index='Classe de Ativo', columns='Gestora', values='Recomendação', aggfunc='first').fillna("-")
+            st.dataframe(pivot_table.style.map(style_recommendation), use_container_width=True)
         
         st.divider()
         st.markdown("##### Análise Detalhada por Gestora")
@@ -1038,9 +1102,7 @@ with tab_global:
                 classe_ativo = c2.selectbox("Classe de Ativo (Matriz)", ["Ações Brasil", "Ações EUA", "Renda Fixa Pré", "Inflação", "Dólar", "Commodities"])
                 recomendacao = c3.radio("Recomendação", ["Overweight", "Neutral", "Underweight"], horizontal=True)
                 if st.form_submit_button("Salvar na Matriz"):
-                    new_rec = pd.DataFrame([{"Gestora": gestora, "Classe de Ativo": classe_ativo, "Recomendação": recomendacao, "Data": datetime.now().strftime("%Y-%m-%d")}])
-                    updated_recs = pd.concat([recommendations_df, new_rec], ignore_index=True)
-                    updated_recs.to_csv(RECOMMENDATIONS_FILE, index=False)
+                    store.add_recommendation(gestora, classe_ativo, recomendacao, datetime.now().strftime("%Y-%m-%d"))
                     st.success("Matriz de recomendações atualizada!"); st.rerun()
 
             # Editor dos Detalhes das Gestoras
@@ -1054,6 +1116,7 @@ with tab_global:
                 uploaded_file = st.file_uploader("Subir novo relatório em PDF (opcional)")
 
                 if st.form_submit_button("Salvar Análise Detalhada"):
+                    file_path = None  # Sem upload, o relatório da versão anterior é mantido
                     if uploaded_file is not None:
                         # Cria o diretório se não existir
                         if not os.path.exists(REPORTS_DIR):
@@ -1062,12 +1125,10 @@ with tab_global:
                         file_path = os.path.join(REPORTS_DIR, uploaded_file.name)
                         with open(file_path, "wb") as f:
                             f.write(uploaded_file.getbuffer())
-                        manager_views[manager_to_edit]["report_file"] = file_path
-                    
-                    manager_views[manager_to_edit]["summary"] = new_summary
-                    manager_views[manager_to_edit]["last_updated"] = datetime.now().strftime("%Y-%m-%d")
 
-                    with open(MANAGER_VIEWS_FILE, 'w', encoding='utf-8') as f:
-                        json.dump(manager_views, f, ensure_ascii=False, indent=4)
+                    store.save_manager_view(manager_to_edit, new_summary, file_path, datetime.now().strftime("%Y-%m-%d"))
                     
                     st.success(f"Análise da {manager_to_edit} atualizada!"); st.rerun()
+
+render_freshness_panel()
+render_timing_panel()
@@ -5,11 +5,16 @@ import pandas as pd
 import yfinance as yf
 import plotly.express as px
 import numpy as np
-import numpy_financial as npf
 from datetime import date
+from pag import charts, jobs, text_index
+from pag.instrumentation import instrument
+from pag.fundamentals import calculate_credit_metrics
+from pag.fixed_income import calculate_ytm, calculate_macaulay_duration
+from pag.ui import begin_page_instrumentation, recall_job, remember_job, render_timing_panel, wait_for_job
 
 # --- CONFIGURAÇÕES E CONSTANTES ---
 st.set_page_config(page_title="PAG | Research de Empresas", page_icon="🏢", layout="wide")
+begin_page_instrumentation("Research")
 
 st.sidebar.image("logo.png", use_container_width=True)
 
@@ -43,39 +48,16 @@ if 'ticker_to_analyze' not in st.session_state:
     st.session_state.ticker_to_analyze = ""
 if 'peers_to_analyze' not in st.session_state:
     st.session_state.peers_to_analyze = ""
+# Análise aberta pela URL (?research_job=ID), ex: em outra sessão: recupera o ticker e os pares do job
+if not st.session_state.analysis_run and "research_job" in st.query_params:
+    restored_job = jobs.get_job(st.query_params["research_job"])
+    if restored_job and restored_job["kind"] == "research":
+        st.session_state.analysis_run = True
+        st.session_state.ticker_to_analyze = restored_job["params"]["ticker_symbol"]
+        st.session_state.peers_to_analyze = ", ".join(restored_job["params"]["peer_tickers"])
 
 # --- FUNÇÕES AUXILIARES ---
-
-# ADICIONE ESTA NOVA FUNÇÃO JUNTO COM AS OUTRAS FUNÇÕES AUXILIARES
-
-@st.cache_data
-def get_all_financial_data(ticker_symbol):
-    """
-    Busca todos os dados financeiros de uma vez para um ticker e os armazena em cache.
-    """
-    try:
-        ticker_obj = yf.Ticker(ticker_symbol)
-        
-        # O '.info' é a chamada mais sensível, verificamos sua validade primeiro.
-        info = ticker_obj.info
-        if not info.get('longName'):
-            # Se não houver nome longo, o ticker é inválido ou não tem dados.
-            return {"error": f"Ticker '{ticker_symbol}' não encontrado ou sem dados."}
-
-        # Se o ticker for válido, busca o resto dos dados.
-        income_stmt = ticker_obj.income_stmt
-        balance_sheet = ticker_obj.balance_sheet
-        cash_flow = ticker_obj.cashflow
-        
-        # Retorna um dicionário com todos os dados
-        return {
-            "info": info,
-            "income_stmt": income_stmt,
-            "balance_sheet": balance_sheet,
-            "cash_flow": cash_flow
-        }
-    except Exception as e:
-        return {"error": f"Erro ao buscar dados para {ticker_symbol}: {e}"}
+# Coleta de demonstrativos, premissas do DCF, Comps e momento: pag/research.py (roda como job, ver pag/jobs.py)
 
 def formatar_numero(n):
     if pd.isna(n): return "-"
@@ -93,47 +75,13 @@ def reorder_financial_statement(df, order_list):
     return df.reindex(final_order)
 
 def analisar_sentimento(texto):
-    texto = texto.lower()
-    palavras_positivas = ['crescimento', 'lucro', 'aumento', 'supera', 'expansão', 'forte', 'otimista', 'sucesso', 'melhora', 'compra', 'growth', 'profit', 'increase', 'beats', 'expansion', 'strong', 'optimistic', 'success', 'improves', 'buy', 'upgrade']
-    palavras_negativas = ['queda', 'prejuízo', 'redução', 'abaixo', 'contração', 'fraco', 'pessimista', 'falha', 'piora', 'venda', 'fall', 'loss', 'reduction', 'below', 'contraction', 'weak', 'pessimistic', 'fails', 'worsens', 'sell', 'downgrade']
-    score = 0
-    for p in palavras_positivas:
-        if p in texto: score += 1
-    for p in palavras_negativas:
-        if p in texto: score -= 1
+    # Presença de cada termo do léxico de notícias, por token (pag.text_index: uma passada pela manchete)
+    placar = text_index.scorer(text_index.NEWS_LEXICON).score(text_index.tokenize(texto), distinct=True)
+    score = placar["positivo"] - placar["negativo"]
     if score > 0: return 'Positivo', '🟢'
     elif score < 0: return 'Negativo', '🔴'
     else: return 'Neutro', '⚪️'
 
-@st.cache_data
-def get_key_stats(tickers):
-    key_stats = []
-    for ticker_symbol in tickers:
-        try:
-            ticker = yf.Ticker(ticker_symbol)
-            info = ticker.info
-            stats = {'Ativo': info.get('symbol'), 'Empresa': info.get('shortName'), 'P/L': info.get('trailingPE'), 'P/VP': info.get('priceToBook'), 'EV/EBITDA': info.get('enterpriseToEbitda'), 'Dividend Yield (%)': info.get('dividendYield', 0) * 100, 'ROE (%)': info.get('returnOnEquity', 0) * 100, 'Margem Bruta (%)': info.get('grossMargins', 0) * 100}
-            key_stats.append(stats)
-        except Exception: continue
-    return pd.DataFrame(key_stats)
-
-@st.cache_data
-def get_dcf_data_from_yf(ticker_symbol):
-    try:
-        ticker = yf.Ticker(ticker_symbol)
-        info = ticker.info
-        cashflow_statement = ticker.cashflow
-        balance_sheet = ticker.balance_sheet
-        op_cash_flow = cashflow_statement.loc['Operating Cash Flow'].iloc[0]
-        capex = cashflow_statement.loc['Capital Expenditure'].iloc[0]
-        fcf = op_cash_flow + capex
-        total_liab = balance_sheet.loc['Total Liabilities Net Minority Interest'].iloc[0]
-        total_cash = balance_sheet.loc['Cash And Cash Equivalents'].iloc[0]
-        net_debt = total_liab - total_cash
-        shares_outstanding = info['sharesOutstanding']
-        return {'fcf': fcf, 'net_debt': net_debt, 'shares_outstanding': shares_outstanding, 'ebitda': info.get('ebitda')}
-    except Exception: return None
-
 def calculate_dcf(fcf, net_debt, shares_outstanding, g, tg, wacc):
     if (wacc - tg) <= 0: return 0
     fcf_proj = [fcf * (1 + g)**i for i in range(1, 6)]
@@ -149,7 +97,7 @@ def plot_financial_statement(df, title):
     fig = px.bar(df_plot, barmode='group', title=title, text_auto='.2s')
     fig.update_layout(xaxis_title="Ano", yaxis_title="Valor"); st.plotly_chart(fig, use_container_width=True)
 
-@st.cache_data
+@instrument(cache=st.cache_data)
 def calculate_dupont_analysis(income_stmt, balance_sheet):
     try:
         net_income = income_stmt.loc['Net Income']; revenue = income_stmt.loc['Total Revenue']
@@ -160,7 +108,7 @@ def calculate_dupont_analysis(income_stmt, balance_sheet):
         return pd.DataFrame({'Margem Líquida (%)': net_profit_margin, 'Giro do Ativo': asset_turnover, 'Alavancagem Financeira': financial_leverage, 'ROE Calculado (%)': roe}).T.sort_index(axis=1)
     except KeyError: return pd.DataFrame()
 
-@st.cache_data
+@instrument(cache=st.cache_data)
 def calculate_financial_ratios(income_stmt, balance_sheet):
     ratios = {}
     try:
@@ -184,74 +132,9 @@ def calculate_financial_ratios(income_stmt, balance_sheet):
     if not ratios: return pd.DataFrame()
     return pd.DataFrame(ratios).T.sort_index(axis=1)
 
-# SUBSTITUA A FUNÇÃO ANTERIOR POR ESTA VERSÃO CORRIGIDA
-
-def calculate_credit_metrics(income_stmt, balance_sheet, cash_flow, info):
-    """
-    Calcula métricas de crédito, alavancagem, cobertura e um score de crédito proprietário.
-    VERSÃO CORRIGIDA para buscar corretamente a estrutura da dívida.
-    """
-    metrics = {}
-    scores = {}
-    try:
-        # --- Coleta de Dados Base como Séries Históricas ---
-        ebit = income_stmt.loc['Operating Income']
-        depreciation = income_stmt.get('Depreciation And Amortization', pd.Series(0, index=income_stmt.columns))
-        ebitda = ebit + depreciation
-        
-        interest_expense = income_stmt.loc['Interest Expense Non Operating'].abs()
-        
-        total_liab = balance_sheet.loc['Total Liabilities Net Minority Interest']
-        cash_and_equiv = balance_sheet.loc['Cash And Cash Equivalents']
-        net_debt = total_liab - cash_and_equiv
-
-        total_debt = balance_sheet.loc['Total Debt']
-        equity = balance_sheet.loc['Stockholders Equity']
-        total_assets = balance_sheet.loc['Total Assets']
-        cfo = cash_flow.loc['Operating Cash Flow']
-        
-        # --- LÓGICA CORRIGIDA PARA BUSCAR DÍVIDA DE CURTO E LONGO PRAZO ---
-        # Verifica se a LINHA (index) existe antes de tentar acessá-la
-        if 'Current Debt And Capital Lease Obligation' in balance_sheet.index:
-            current_debt = balance_sheet.loc['Current Debt And Capital Lease Obligation']
-        else:
-            current_debt = pd.Series(0, index=balance_sheet.columns, name='Current Debt And Capital Lease Obligation')
+# Métricas de crédito: ver pag/fundamentals.py
+calculate_credit_metrics = instrument()(calculate_credit_metrics)
 
-        if 'Long Term Debt And Capital Lease Obligation' in balance_sheet.index:
-            long_term_debt = balance_sheet.loc['Long Term Debt And Capital Lease Obligation']
-        else:
-            long_term_debt = pd.Series(0, index=balance_sheet.columns, name='Long Term Debt And Capital Lease Obligation')
-        
-        # --- Armazenamento e Cálculo das Métricas ---
-        metrics['Dívida Curto Prazo'] = current_debt
-        metrics['Dívida Longo Prazo'] = long_term_debt
-        metrics['Dívida Líquida / EBITDA'] = net_debt / ebitda
-        metrics['Dívida Total / PL'] = total_debt / equity
-        metrics['Dívida Total / Ativos'] = total_debt / total_assets
-        metrics['FCO / Dívida Total'] = cfo / total_debt
-        metrics['EBIT / Juros'] = ebit / interest_expense.replace(0, np.nan)
-        
-        # --- Lógica do Score de Crédito ---
-        last_debt_ebitda = metrics['Dívida Líquida / EBITDA'].iloc[-1]
-        if pd.isna(last_debt_ebitda): scores['Alavancagem'] = 10 # Penaliza se não for calculável
-        elif last_debt_ebitda < 1.5: scores['Alavancagem'] = 100
-        elif last_debt_ebitda < 3: scores['Alavancagem'] = 75
-        elif last_debt_ebitda < 5: scores['Alavancagem'] = 40
-        else: scores['Alavancagem'] = 10
-        
-        last_coverage = metrics['EBIT / Juros'].iloc[-1]
-        if pd.isna(last_coverage) or last_coverage < 1.5: scores['Cobertura'] = 10
-        elif last_coverage < 4: scores['Cobertura'] = 50
-        elif last_coverage < 7: scores['Cobertura'] = 80
-        else: scores['Cobertura'] = 100
-        
-        final_score = np.mean(list(scores.values()))
-        metrics['PAG Credit Score'] = final_score
-        
-        return metrics
-
-    except (KeyError, IndexError, TypeError):
-        return {}
 def calculate_quality_score(info, dcf_data):
     scores = {}
     roe = info.get('returnOnEquity', 0) or 0
@@ -294,62 +177,156 @@ def calculate_value_score(info, comps_df, dcf_upside):
     if not scores: return 0, {}
     return np.mean(list(scores.values())), scores
 
-@st.cache_data
-def calculate_momentum_score(ticker_symbol):
-    scores = {}
-    is_br = '.SA' in ticker_symbol
-    benchmark = '^BVSP' if is_br else '^GSPC'
-    try:
-        data = yf.download([ticker_symbol, benchmark], period='1y', progress=False)['Close']
-        if data.empty: return 0, {}
-        data['SMA200'] = data[ticker_symbol].rolling(window=200).mean()
-        last_price = data[ticker_symbol].iloc[-1]; last_sma200 = data['SMA200'].iloc[-1]
-        if last_price > last_sma200: scores['Tendência Longo Prazo (vs. MME200)'] = 100
-        else: scores['Tendência Longo Prazo (vs. MME200)'] = 0
-        returns = data.pct_change()
-        for period in [3, 6, 9]:
-            days = int(period * 21)
-            if len(data) > days:
-                asset_return = (1 + returns[ticker_symbol].tail(days)).prod() - 1
-                bench_return = (1 + returns[benchmark].tail(days)).prod() - 1
-                if asset_return > bench_return: scores[f'Força Relativa {period}M'] = 100
-                else: scores[f'Força Relativa {period}M'] = 0
-    except Exception: return 0, {}
-    if not scores: return 0, {}
-    return np.mean(list(scores.values())), scores
+# --- FRAGMENTOS (widgets que reexecutam só a própria seção) ---
+@st.fragment
+def render_bond_calculator(info, credit_data, comps_df, peers_string):
+    """Calculadora de títulos: os inputs e o botão reexecutam só este bloco, com os dados da empresa já carregados."""
+    st.subheader("Calculadora e Analisador de Títulos de Dívida")
+    st.markdown("Insira as informações de um título de dívida (bond/debênture) para calcular suas métricas de risco e retorno.")
+    st.info("Esta ferramenta é uma **calculadora**. Os dados do título devem ser inseridos manualmente.")
+
+    st.divider()
+
+    # --- Painel de Inputs ---
+    st.markdown("##### Parâmetros do Título")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        price_pct = st.number_input("Preço Atual (% do Valor de Face)", min_value=1.0, value=98.5, step=0.1, format="%.2f", help="Preço 'limpo' do título. Ex: 98.5 significa que o título vale 98.5% do seu valor de face.", key="bond_price")
+        face_value = st.number_input("Valor de Face (ex: R$ ou $)", min_value=1, value=1000, key="bond_face_value")
+    with col2:
+        coupon_rate_pct = st.number_input("Taxa de Cupom Anual (%)", min_value=0.0, value=5.0, step=0.1, format="%.2f", key="bond_coupon")
+        maturity_date = st.date_input("Data de Vencimento", value=pd.to_datetime("2030-01-01"), key="bond_maturity")
+    with col3:
+        freq_options = {"Anual": 1, "Semestral": 2}
+        freq_label = st.selectbox("Frequência do Cupom", options=list(freq_options.keys()), key="bond_freq")
+        freq = freq_options[freq_label]
+        st.write("")
+        st.write("")
+        calculate_button = st.button("Analisar Título", use_container_width=True, key="bond_calc_button")
+
+    if calculate_button:
+        price = (price_pct / 100) * face_value
+        coupon_rate = coupon_rate_pct / 100
+        today = date.today()
+        if maturity_date <= today:
+            st.error("A data de vencimento deve ser no futuro.")
+        else:
+            years_to_maturity = (maturity_date - today).days / 365.25
+            ytm = calculate_ytm(price, face_value, coupon_rate, years_to_maturity, freq)
+            current_yield = (coupon_rate * face_value) / price if price > 0 else 0
+            macaulay_duration = calculate_macaulay_duration(price, face_value, coupon_rate, ytm, years_to_maturity, freq)
+            modified_duration = macaulay_duration / (1 + (ytm / freq)) if macaulay_duration and ytm else None
 
-def calculate_ytm(price, face_value, coupon_rate, years_to_maturity, freq):
-    """Calcula o Yield to Maturity (YTM) de um título."""
-    try:
-        periods = years_to_maturity * freq
-        coupon_payment = (coupon_rate / freq) * face_value
-        cash_flows = [-coupon_payment] * int(periods)
-        cash_flows[-1] -= face_value
-        cash_flows = np.insert(cash_flows, 0, price)
-        ytm_period = npf.irr(cash_flows)
-        return ytm_period * freq
-    except (ValueError, TypeError):
-        return None
-
-def calculate_macaulay_duration(price, face_value, coupon_rate, ytm, years_to_maturity, freq):
-    """Calcula a Macaulay Duration de um título."""
-    if ytm is None:
-        return None
-    periods = int(years_to_maturity * freq)
-    coupon_payment = (coupon_rate / freq) * face_value
-    ytm_period = ytm / freq
-    pv_cash_flows = []
-    for t in range(1, periods + 1):
-        cf = coupon_payment
-        if t == periods:
-            cf += face_value
-        pv_cf = cf / ((1 + ytm_period) ** t)
-        pv_cash_flows.append(pv_cf)
-    duration = 0
-    for t in range(len(pv_cash_flows)):
-        weight = pv_cash_flows[t] / price
-        duration += weight * (t + 1)
-    return duration / freq
+            st.divider()
+            st.markdown("##### Resultados da Análise")
+            res_col1, res_col2, res_col3 = st.columns(3)
+            with res_col1:
+                st.metric("Yield to Maturity (YTM)", f"{ytm*100:.3f}%" if ytm else "N/A", help="A taxa de retorno anualizada total que um investidor pode esperar se mantiver o título até o vencimento.")
+            with res_col2:
+                st.metric("Current Yield", f"{current_yield*100:.3f}%", help="O retorno anual do cupom em relação ao preço de mercado atual do título.")
+            with res_col3:
+                st.metric("Preço de Compra (Calculado)", f"{face_value * price_pct / 100:,.2f}")
+
+            st.markdown("##### Análise de Risco (Sensibilidade a Juros)")
+            risk_col1, risk_col2 = st.columns(2)
+            with risk_col1:
+                st.metric("Macaulay Duration (Anos)", f"{macaulay_duration:.3f}" if macaulay_duration else "N/A", help="O tempo médio ponderado, em anos, para receber os fluxos de caixa do título.")
+            with risk_col2:
+                st.metric("Modified Duration", f"{modified_duration:.3f}" if modified_duration else "N/A", help="Estimativa da variação percentual no preço do título para uma mudança de 1% (100bps) na taxa de juros do mercado.")
+                if modified_duration:
+                    st.caption(f"Se os juros subirem 1%, o preço cairá aprox. {modified_duration:.2f}%.")
+
+            st.markdown("##### Fluxo de Caixa Projetado")
+            num_periods = int(years_to_maturity * freq)
+            coupon_payment = (coupon_rate / freq) * face_value
+            cashflow_dates = pd.date_range(start=today, periods=num_periods + 1, freq=pd.DateOffset(months=12//freq))[1:]
+            cashflows = [coupon_payment] * num_periods
+            cashflows[-1] += face_value
+            df_cashflow = pd.DataFrame({'Data Projetada': cashflow_dates, 'Pagamento': cashflows})
+            df_cashflow['Data Projetada'] = df_cashflow['Data Projetada'].dt.strftime('%Y-%m-%d')
+            st.dataframe(df_cashflow.style.format({'Pagamento': '{:,.2f}'}), use_container_width=True)
+
+            # --- SEÇÃO DE CONEXÃO: CONTEXTO DE CRÉDITO DA EMPRESA EMISSORA ---
+            st.divider()
+            st.subheader(f"Contexto de Crédito da Empresa Emissora ({info.get('shortName', 'N/A')})")
+
+            # Verifica se os dados de crédito da empresa principal foram calculados com sucesso
+            if credit_data:
+                # Extrai os dados de crédito da empresa que já foram calculados
+                company_credit_score = credit_data.get('PAG Credit Score')
+                company_debt_ebitda = credit_data.get('Dívida Líquida / EBITDA')
+                company_coverage = credit_data.get('EBIT / Juros')
+
+                # Determina o rating com base no score
+                if company_credit_score is not None:
+                    if company_credit_score >= 85: rating, emoji = "Baixo Risco", "🛡️"
+                    elif company_credit_score >= 60: rating, emoji = "Risco Moderado", "⚠️"
+                    else: rating, emoji = "Alto Risco", "🚨"
+
+                st.info(f"A seguir, um resumo da análise de crédito fundamental para a {info['shortName']}. Compare se o retorno do título acima é adequado ao risco da empresa.")
+
+                col_context1, col_context2, col_context3 = st.columns(3)
+
+                with col_context1:
+                    if company_credit_score is not None:
+                        st.metric(
+                            label="PAG Credit Score da Empresa",
+                            value=f"{rating} {emoji}",
+                            delta=f"{company_credit_score:.0f} / 100",
+                            delta_color="off",
+                            help="Score proprietário que avalia a saúde de crédito da empresa com base em sua alavancagem e cobertura de juros."
+                        )
+
+                with col_context2:
+                    if company_debt_ebitda is not None and not company_debt_ebitda.empty:
+                        st.metric(label="Alavancagem (Dív. Líq./EBITDA)", value=f"{company_debt_ebitda.iloc[-1]:.2f}x")
+
+                with col_context3:
+                    if company_coverage is not None and not company_coverage.empty:
+                        st.metric(label="Cobertura de Juros (EBIT/Juros)", value=f"{company_coverage.iloc[-1]:.2f}x")
+
+                st.caption(f"Para uma análise mais detalhada da empresa, consulte a aba '🩺 Análise de Dívida'.")
+
+            else:
+                # Mensagem caso os dados de crédito da empresa principal não estejam disponíveis
+                st.warning(f"Não foi possível carregar o resumo da análise de crédito para {info['shortName']}. Verifique se a empresa possui os dados financeiros necessários na aba 'Análise de Dívida'.")
+
+            st.header("Análise Comparativa de Múltiplos (Comps)")
+            if peers_string:
+                if not comps_df.empty:
+                    metric_cols = ['P/L', 'P/VP', 'EV/EBITDA', 'Dividend Yield (%)', 'ROE (%)', 'Margem Bruta (%)']
+                    comps_df[metric_cols] = comps_df[metric_cols].apply(pd.to_numeric, errors='coerce')
+                    st.dataframe(comps_df.set_index('Ativo').style.format("{:.2f}", subset=metric_cols, na_rep="N/A"), use_container_width=True)
+                    col_chart1, col_chart2 = st.columns(2)
+                    with col_chart1: st.plotly_chart(px.bar(comps_df, x='Ativo', y='P/L', title='Comparativo de P/L', text_auto='.2f'), use_container_width=True)
+                    with col_chart2: st.plotly_chart(px.bar(comps_df, x='Ativo', y='EV/EBITDA', title='Comparativo de EV/EBITDA', text_auto='.2f'), use_container_width=True)
+                else: st.warning("Não foi possível buscar dados para a análise comparativa.")
+            else: st.info("Insira tickers de concorrentes na barra lateral para ver a análise comparativa.")
+
+@st.fragment
+def render_dcf_valuation(dcf_data, info, current_price):
+    """Premissas do DCF: alterar um input ou calcular reexecuta só este bloco."""
+    with st.expander("Clique aqui para realizar a análise de DCF", expanded=False):
+        st.info("Insira as premissas do modelo e clique em 'Calcular' para ver o resultado.")
+        col1, col2, col3 = st.columns(3)
+        with col1: g_dcf = st.number_input("Cresc. FCF (anual %)", 5.0, step=0.5, format="%.1f", key="dcf_g") / 100
+        with col2: tg_dcf = st.number_input("Perpetuidade (%)", 2.5, step=0.1, format="%.1f", key="dcf_tg") / 100
+        with col3: wacc_dcf = st.number_input("WACC (%)", 9.0, step=0.5, format="%.1f", key="dcf_wacc") / 100
+        if st.button("Calcular Preço Justo", key="dcf_button"):
+            if dcf_data:
+                intrinsic_value = calculate_dcf(fcf=dcf_data['fcf'], net_debt=dcf_data['net_debt'], shares_outstanding=dcf_data['shares_outstanding'], g=g_dcf, tg=tg_dcf, wacc=wacc_dcf)
+                if intrinsic_value > 0 and current_price > 0:
+                    dcf_upside = ((intrinsic_value / current_price) - 1) * 100
+                    st.subheader("Resultado do Valuation")
+                    c1, c2, c3 = st.columns(3)
+                    c1.metric("Preço Justo (Valor Intrínseco)", f"{info.get('currency', '')} {intrinsic_value:.2f}")
+                    c2.metric("Preço Atual de Mercado", f"{info.get('currency', '')} {current_price:.2f}")
+                    c3.metric("Potencial de Upside/Downside", f"{dcf_upside:.2f}%")
+                    if dcf_upside > 20: st.success("RECOMENDAÇÃO (MODELO PAG): COMPRAR")
+                    elif dcf_upside < -20: st.error("RECOMENDAÇÃO (MODELO PAG): VENDER")
+                    else: st.warning("RECOMENDAÇÃO (MODELO PAG): MANTER")
+                else: st.error("Não foi possível calcular. Verifique se WACC > Perpetuidade e se há Preço Atual.")
+            else: st.error("Dados financeiros não carregados. Impossível rodar o DCF.")
 
 # --- UI E LÓGICA PRINCIPAL ---
 st.title("Painel de Research de Empresas")
@@ -363,6 +340,9 @@ if st.sidebar.button("Analisar", key="analyze_button"):
     st.session_state.analysis_run = True
     st.session_state.ticker_to_analyze = ticker_symbol_input
     st.session_state.peers_to_analyze = peers_string_input
+    if ticker_symbol_input:
+        peer_tickers = [p.strip() for p in peers_string_input.split(",") if p.strip()]
+        remember_job("research_job", jobs.submit("research", ticker_symbol=ticker_symbol_input, peer_tickers=peer_tickers))
 
 # NOVO BLOCO OTIMIZADO PARA SUBSTITUIR O ANTIGO
 
@@ -373,14 +353,16 @@ if st.session_state.analysis_run:
     if not ticker_symbol:
         st.warning("Por favor, digite um ticker principal para analisar.")
     else:
-        with st.spinner("Buscando e analisando dados..."):
-            # Chamada única à nossa nova função com cache
-            financial_data = get_all_financial_data(ticker_symbol)
+        with st.spinner("Montando a análise..."):
+            # A coleta roda como job em segundo plano; enquanto não termina, a página mostra só o progresso
+            financial_data = wait_for_job(recall_job("research_job"), "Buscando e analisando dados...")
+            if financial_data is None: render_timing_panel(); st.stop()
 
             # Verifica se a busca deu certo
             if financial_data.get("error"):
                 st.error(financial_data["error"])
                 st.session_state.analysis_run = False
+                render_timing_panel(); st.stop()
             else:
                 # Desempacota os dados para as variáveis existentes
                 info = financial_data["info"]
@@ -388,10 +370,8 @@ if st.session_state.analysis_run:
                 balance_sheet = financial_data["balance_sheet"]
                 cash_flow = financial_data["cash_flow"]
 
-                # O resto do seu código de análise continua aqui, sem alterações...
-                dcf_data = get_dcf_data_from_yf(ticker_symbol)
-                peer_tickers = [p.strip() for p in peers_string.split(",")] if peers_string else []
-                comps_df = get_key_stats(peer_tickers)
+                dcf_data = financial_data["dcf_data"]
+                comps_df = financial_data["comps_df"]
 
                 st.header(f"Análise de {info['longName']} ({info['symbol']})")
 
@@ -400,7 +380,7 @@ if st.session_state.analysis_run:
             quality_rating, quality_emoji = get_rating_from_score(quality_score)
             value_score, value_breakdown = calculate_value_score(info, comps_df, dcf_upside=None)
             value_rating, value_emoji = get_rating_from_score(value_score)
-            momentum_score, momentum_breakdown = calculate_momentum_score(ticker_symbol)
+            momentum_score, momentum_breakdown = financial_data["momentum"]
             momentum_rating, momentum_emoji = get_rating_from_score(momentum_score)
 
             col1_rat, col2_rat, col3_rat = st.columns(3)
@@ -428,8 +408,6 @@ if st.session_state.analysis_run:
             with st.expander("Descrição da Empresa"): st.write(info.get('longBusinessSummary', 'Descrição não disponível.'))
 
             st.header("Análise Financeira Histórica")
-            ticker_obj = yf.Ticker(ticker_symbol)
-            income_statement = ticker_obj.income_stmt; balance_sheet = ticker_obj.balance_sheet; cash_flow = ticker_obj.cashflow
             tab_dre, tab_bp, tab_fcf, tab_dupont, tab_ratios, tab_debt, tab_bond_calc = st.tabs(["Resultados (DRE)", "Balanço (BP)", "Fluxo de Caixa (FCF)", "🔥 Análise DuPont", "📊 Ratios", "🩺 Análise de Dívida", "📜 Calculadora de Títulos"])
             
             with tab_dre:
@@ -533,150 +511,10 @@ if st.session_state.analysis_run:
             # ADICIONE ESTE BLOCO DE CÓDIGO NO FINAL DA SEQUÊNCIA DE ABAS
 
             with tab_bond_calc:
-                st.subheader("Calculadora e Analisador de Títulos de Dívida")
-                st.markdown("Insira as informações de um título de dívida (bond/debênture) para calcular suas métricas de risco e retorno.")
-                st.info("Esta ferramenta é uma **calculadora**. Os dados do título devem ser inseridos manualmente.")
-            
-                st.divider()
-            
-                # --- Painel de Inputs ---
-                st.markdown("##### Parâmetros do Título")
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    price_pct = st.number_input("Preço Atual (% do Valor de Face)", min_value=1.0, value=98.5, step=0.1, format="%.2f", help="Preço 'limpo' do título. Ex: 98.5 significa que o título vale 98.5% do seu valor de face.", key="bond_price")
-                    face_value = st.number_input("Valor de Face (ex: R$ ou $)", min_value=1, value=1000, key="bond_face_value")
-                with col2:
-                    coupon_rate_pct = st.number_input("Taxa de Cupom Anual (%)", min_value=0.0, value=5.0, step=0.1, format="%.2f", key="bond_coupon")
-                    maturity_date = st.date_input("Data de Vencimento", value=pd.to_datetime("2030-01-01"), key="bond_maturity")
-                with col3:
-                    freq_options = {"Anual": 1, "Semestral": 2}
-                    freq_label = st.selectbox("Frequência do Cupom", options=list(freq_options.keys()), key="bond_freq")
-                    freq = freq_options[freq_label]
-                    st.write("")
-                    st.write("")
-                    calculate_button = st.button("Analisar Título", use_container_width=True, key="bond_calc_button")
-            
-                if calculate_button:
-                    price = (price_pct / 100) * face_value
-                    coupon_rate = coupon_rate_pct / 100
-                    today = date.today()
-                    if maturity_date <= today:
-                        st.error("A data de vencimento deve ser no futuro.")
-                    else:
-                        years_to_maturity = (maturity_date - today).days / 365.25
-                        ytm = calculate_ytm(price, face_value, coupon_rate, years_to_maturity, freq)
-                        current_yield = (coupon_rate * face_value) / price if price > 0 else 0
-                        macaulay_duration = calculate_macaulay_duration(price, face_value, coupon_rate, ytm, years_to_maturity, freq)
-                        modified_duration = macaulay_duration / (1 + (ytm / freq)) if macaulay_duration and ytm else None
-            
-                        st.divider()
-                        st.markdown("##### Resultados da Análise")
-                        res_col1, res_col2, res_col3 = st.columns(3)
-                        with res_col1:
-                            st.metric("Yield to Maturity (YTM)", f"{ytm*100:.3f}%" if ytm else "N/A", help="A taxa de retorno anualizada total que um investidor pode esperar se mantiver o título até o vencimento.")
-                        with res_col2:
-                            st.metric("Current Yield", f"{current_yield*100:.3f}%", help="O retorno anual do cupom em relação ao preço de mercado atual do título.")
-                        with res_col3:
-                            st.metric("Preço de Compra (Calculado)", f"{face_value * price_pct / 100:,.2f}")
-            
-                        st.markdown("##### Análise de Risco (Sensibilidade a Juros)")
-                        risk_col1, risk_col2 = st.columns(2)
-                        with risk_col1:
-                            st.metric("Macaulay Duration (Anos)", f"{macaulay_duration:.3f}" if macaulay_duration else "N/A", help="O tempo médio ponderado, em anos, para receber os fluxos de caixa do título.")
-                        with risk_col2:
-                            st.metric("Modified Duration", f"{modified_duration:.3f}" if modified_duration else "N/A", help="Estimativa da variação percentual no preço do título para uma mudança de 1% (100bps) na taxa de juros do mercado.")
-                            if modified_duration:
-                                st.caption(f"Se os juros subirem 1%, o preço cairá aprox. {modified_duration:.2f}%.")
-            
-                        st.markdown("##### Fluxo de Caixa Projetado")
-                        num_periods = int(years_to_maturity * freq)
-                        coupon_payment = (coupon_rate / freq) * face_value
-                        cashflow_dates = pd.date_range(start=today, periods=num_periods + 1, freq=pd.DateOffset(months=12//freq))[1:]
-                        cashflows = [coupon_payment] * num_periods
-                        cashflows[-1] += face_value
-                        df_cashflow = pd.DataFrame({'Data Projetada': cashflow_dates, 'Pagamento': cashflows})
-                        df_cashflow['Data Projetada'] = df_cashflow['Data Projetada'].dt.strftime('%Y-%m-%d')
-                        st.dataframe(df_cashflow.style.format({'Pagamento': '{:,.2f}'}), use_container_width=True)
-
-                        # --- SEÇÃO DE CONEXÃO: CONTEXTO DE CRÉDITO DA EMPRESA EMISSORA ---
-                        st.divider()
-                        st.subheader(f"Contexto de Crédito da Empresa Emissora ({info.get('shortName', 'N/A')})")
-                        
-                        # Verifica se os dados de crédito da empresa principal foram calculados com sucesso
-                        if credit_data:
-                            # Extrai os dados de crédito da empresa que já foram calculados
-                            company_credit_score = credit_data.get('PAG Credit Score')
-                            company_debt_ebitda = credit_data.get('Dívida Líquida / EBITDA')
-                            company_coverage = credit_data.get('EBIT / Juros')
-                        
-                            # Determina o rating com base no score
-                            if company_credit_score is not None:
-                                if company_credit_score >= 85: rating, emoji = "Baixo Risco", "🛡️"
-                                elif company_credit_score >= 60: rating, emoji = "Risco Moderado", "⚠️"
-                                else: rating, emoji = "Alto Risco", "🚨"
-                            
-                            st.info(f"A seguir, um resumo da análise de crédito fundamental para a {info['shortName']}. Compare se o retorno do título acima é adequado ao risco da empresa.")
-                        
-                            col_context1, col_context2, col_context3 = st.columns(3)
-                            
-                            with col_context1:
-                                if company_credit_score is not None:
-                                    st.metric(
-                                        label="PAG Credit Score da Empresa",
-                                        value=f"{rating} {emoji}",
-                                        delta=f"{company_credit_score:.0f} / 100",
-                                        delta_color="off",
-                                        help="Score proprietário que avalia a saúde de crédito da empresa com base em sua alavancagem e cobertura de juros."
-                                    )
-                        
-                            with col_context2:
-                                if company_debt_ebitda is not None and not company_debt_ebitda.empty:
-                                    st.metric(label="Alavancagem (Dív. Líq./EBITDA)", value=f"{company_debt_ebitda.iloc[-1]:.2f}x")
-                        
-                            with col_context3:
-                                if company_coverage is not None and not company_coverage.empty:
-                                    st.metric(label="Cobertura de Juros (EBIT/Juros)", value=f"{company_coverage.iloc[-1]:.2f}x")
-                                    
-                            st.caption(f"Para uma análise mais detalhada da empresa, consulte a aba '🩺 Análise de Dívida'.")
-                        
-                        else:
-                            # Mensagem caso os dados de crédito da empresa principal não estejam disponíveis
-                            st.warning(f"Não foi possível carregar o resumo da análise de crédito para {info['shortName']}. Verifique se a empresa possui os dados financeiros necessários na aba 'Análise de Dívida'.")
-            
-                        st.header("Análise Comparativa de Múltiplos (Comps)")
-                        if peers_string:
-                            if not comps_df.empty:
-                                metric_cols = ['P/L', 'P/VP', 'EV/EBITDA', 'Dividend Yield (%)', 'ROE (%)', 'Margem Bruta (%)']
-                                comps_df[metric_cols] = comps_df[metric_cols].apply(pd.to_numeric, errors='coerce')
-                                st.dataframe(comps_df.set_index('Ativo').style.format("{:.2f}", subset=metric_cols, na_rep="N/A"), use_container_width=True)
-                                col_chart1, col_chart2 = st.columns(2)
-                                with col_chart1: st.plotly_chart(px.bar(comps_df, x='Ativo', y='P/L', title='Comparativo de P/L', text_auto='.2f'), use_container_width=True)
-                                with col_chart2: st.plotly_chart(px.bar(comps_df, x='Ativo', y='EV/EBITDA', title='Comparativo de EV/EBITDA', text_auto='.2f'), use_container_width=True)
-                            else: st.warning("Não foi possível buscar dados para a análise comparativa.")
-                        else: st.info("Insira tickers de concorrentes na barra lateral para ver a análise comparativa.")
-            
+                render_bond_calculator(info, credit_data, comps_df, peers_string)
+
             st.header("💰 Valuation por DCF (Modelo Proprietário)")
-            with st.expander("Clique aqui para realizar a análise de DCF", expanded=False):
-                st.info("Insira as premissas do modelo e clique em 'Calcular' para ver o resultado.")
-                col1, col2, col3 = st.columns(3)
-                with col1: g_dcf = st.number_input("Cresc. FCF (anual %)", 5.0, step=0.5, format="%.1f", key="dcf_g") / 100
-                with col2: tg_dcf = st.number_input("Perpetuidade (%)", 2.5, step=0.1, format="%.1f", key="dcf_tg") / 100
-                with col3: wacc_dcf = st.number_input("WACC (%)", 9.0, step=0.5, format="%.1f", key="dcf_wacc") / 100
-                if st.button("Calcular Preço Justo", key="dcf_button"):
-                    if dcf_data:
-                        intrinsic_value = calculate_dcf(fcf=dcf_data['fcf'], net_debt=dcf_data['net_debt'], shares_outstanding=dcf_data['shares_outstanding'], g=g_dcf, tg=tg_dcf, wacc=wacc_dcf)
-                        if intrinsic_value > 0 and current_price > 0:
-                            dcf_upside = ((intrinsic_value / current_price) - 1) * 100
-                            st.subheader("Resultado do Valuation")
-                            c1, c2, c3 = st.columns(3)
-                            c1.metric("Preço Justo (Valor Intrínseco)", f"{info.get('currency', '')} {intrinsic_value:.2f}")
-                            c2.metric("Preço Atual de Mercado", f"{info.get('currency', '')} {current_price:.2f}")
-                            c3.metric("Potencial de Upside/Downside", f"{dcf_upside:.2f}%")
-                            if dcf_upside > 20: st.success("RECOMENDAÇÃO (MODELO PAG): COMPRAR")
-                            elif dcf_upside < -20: st.error("RECOMENDAÇÃO (MODELO PAG): VENDER")
-                            else: st.warning("RECOMENDAÇÃO (MODELO PAG): MANTER")
-                        else: st.error("Não foi possível calcular. Verifique se WACC > Perpetuidade e se há Preço Atual.")
-                    else: st.error("Dados financeiros não carregados. Impossível rodar o DCF.")
+            render_dcf_valuation(dcf_data, info, current_price)
 
             st.header("Histórico de Cotações")
             try:
@@ -684,7 +522,7 @@ if st.session_state.analysis_run:
                 if hist_df.empty:
                     st.warning(f"Não foi possível obter o histórico de cotações para o ticker {ticker_symbol}.")
                 else:
-                    fig_price = px.line(hist_df, y="Close", title=f"Preço de Fechamento de {info['shortName']}")
+                    fig_price = charts.line_chart(hist_df, y="Close", title=f"Preço de Fechamento de {info['shortName']}")
                     st.plotly_chart(fig_price, use_container_width=True)
             except Exception as e:
                 st.error(f"Ocorreu um erro ao buscar o histórico de cotações: {e}")
@@ -709,3 +547,5 @@ if st.session_state.analysis_run:
                 st.warning(f"Ocorreu um erro ao tentar carregar as notícias: {e}")
 else:
     st.info("Insira um ticker e clique em 'Analisar' para ver a análise completa.")
+
+render_timing_panel()
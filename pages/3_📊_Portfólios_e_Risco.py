@@ -5,6 +5,9 @@ import pandas as pd
 import yfinance as yf
 import plotly.express as px
 import numpy as np
+from pag import charts, compute, portfolio
+from pag.instrumentation import instrument
+from pag.ui import begin_page_instrumentation, render_drawdown_analysis, render_timing_panel
 
 # --- Configuração da Página ---
 st.set_page_config(
@@ -12,6 +15,7 @@ st.set_page_config(
     page_icon="📊",
     layout="wide"
 )
+begin_page_instrumentation("Portfólios")
 
 st.sidebar.image("logo.png", use_container_width=True)
 
@@ -29,7 +33,7 @@ tickers_string = st.sidebar.text_area(
 run_button = st.sidebar.button("Analisar Carteira")
 
 # --- Funções Auxiliares ---
-@st.cache_data
+@instrument(cache=st.cache_data, provider="yfinance")
 def get_price_data(tickers_list):
     """Baixa os dados de preços de fechamento para uma lista de tickers."""
     try:
@@ -40,18 +44,10 @@ def get_price_data(tickers_list):
         # Retornamos ao funcionamento silencioso, pois o erro foi identificado.
         return pd.DataFrame()
 
+@instrument()
 def calculate_portfolio_metrics(prices, weights):
-    """Calcula as métricas de um portfólio com base nos pesos."""
-    if prices.empty:
-        return 0, 0, 0, 0
-    returns = prices.pct_change().dropna()
-    portfolio_return = np.sum(returns.mean() * weights) * 252
-    cov_matrix = returns.cov() * 252
-    portfolio_volatility = np.sqrt(np.dot(weights.T, np.dot(cov_matrix, weights)))
-    sharpe_ratio = portfolio_return / portfolio_volatility if portfolio_volatility != 0 else 0
-    z_score = 1.645 # Z-score para 95% de confiança
-    daily_var = portfolio_volatility / np.sqrt(252) * z_score
-    return portfolio_return, portfolio_volatility, sharpe_ratio, daily_var
+    """Métricas da carteira (pag.portfolio); painéis grandes vão para o pool de processos (pag.compute), com os preços em memória compartilhada."""
+    return compute.run(portfolio.calculate_portfolio_metrics, prices, weights, cost=portfolio.covariance_cost(prices))
 
 # --- Lógica Principal ---
 if run_button:
@@ -89,12 +85,17 @@ if run_button:
                     returns = prices.pct_change().dropna()
                     portfolio_cumulative_returns = (1 + (returns * weights).sum(axis=1)).cumprod() - 1
                     
-                    fig_perf = px.line(portfolio_cumulative_returns, title="Retorno Acumulado da Carteira")
+                    fig_perf = charts.line_chart(portfolio_cumulative_returns, title="Retorno Acumulado da Carteira")
                     fig_perf.update_layout(yaxis_title="Retorno Acumulado", xaxis_title="Data", showlegend=False)
                     st.plotly_chart(fig_perf, use_container_width=True)
 
+                    st.subheader("Drawdowns da Carteira")
+                    render_drawdown_analysis(1 + portfolio_cumulative_returns, "Carteira")
+
         except Exception as e:
             st.error(f"Ocorreu um erro inesperado durante a análise: {e}")
 
 else:
     st.info("Insira os tickers dos ativos na barra lateral para analisar a carteira.")
+
+render_timing_panel()
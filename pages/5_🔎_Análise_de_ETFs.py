@@ -3,16 +3,23 @@
 import streamlit as st
 import yfinance as yf
 import pandas as pd
-import plotly.express as px
+from pag import charts
+from pag.drawdown import SUMMARY_FORMATS, drawdown_summary
+from pag.etf import COMPARISON_FORMATS, benchmark_for, load_etf_comparison
+from pag.instrumentation import instrument
+from pag.performance import TRAILING_PERIODS, trailing_returns
+from pag.tracking import TRACKING_FORMATS, RollingMoments, tracking_summary
+from pag.ui import begin_page_instrumentation, render_drawdown_analysis, render_timing_panel
 
 # --- Configuração da Página ---
 st.set_page_config(page_title="Analisador de ETFs", page_icon="🔎", layout="wide")
+begin_page_instrumentation("ETFs")
 
 st.sidebar.image("logo.png", use_container_width=True)
 
 # --- FUNÇÕES AUXILIARES ---
 
-@st.cache_data
+@instrument(cache=st.cache_data, provider="yfinance")
 def get_etf_data(ticker_symbol):
     """
     Busca os dados principais de um ETF e os armazena em cache.
@@ -25,7 +32,7 @@ def get_etf_data(ticker_symbol):
         if 'fundFamily' not in info:
             return {"error": f"O ticker '{ticker_symbol}' não parece ser um ETF válido ou não possui dados."}
 
-        hist = etf.history(period="5y")
+        hist = etf.history(period="max")  # Histórico completo para o retorno desde o início
         
         return {
             "info": info,
@@ -34,32 +41,39 @@ def get_etf_data(ticker_symbol):
     except Exception as e:
         return {"error": f"Ocorreu um erro ao buscar dados para {ticker_symbol}: {e}"}
 
-def calculate_cumulative_returns(history_df):
+@instrument(cache=st.cache_data)
+def calculate_trailing_returns(history_df):
     """
-    Calcula os retornos acumulados para diferentes períodos.
+    Retornos acumulados e anualizados por janelas de calendário (1M, 3M, YTD, 1A, 3A, 5A e desde o início).
+    Uma linha por período, colunas 'Acumulado' e 'Anualizado'.
     """
-    returns = {}
     if history_df.empty:
-        return returns
+        return pd.DataFrame()
+    returns = trailing_returns(history_df[['Close']]).iloc[0].unstack(0)
+    return returns.reindex(list(TRAILING_PERIODS)).dropna(how='all')
 
-    for period_days, period_name in [(365, "1 Ano"), (3*365, "3 Anos"), (5*365, "5 Anos")]:
-        if len(history_df) > period_days:
-            cumulative_return = (history_df['Close'].iloc[-1] / history_df['Close'].iloc[-period_days]) - 1
-            returns[period_name] = cumulative_return * 100
-    
-    # Retorno total do período disponível
-    total_return = (history_df['Close'].iloc[-1] / history_df['Close'].iloc[0]) - 1
-    returns["Total (5A máx)"] = total_return * 100
-    
-    return returns
+@instrument(cache=st.cache_data)
+def get_tracking_analysis(ticker_symbol):
+    """
+    Estatísticas de tracking do ETF contra o benchmark (período todo) e as somas acumuladas
+    para as janelas móveis: trocar a janela no slider não refaz nenhuma passada sobre os dados.
+    """
+    history = get_etf_data(ticker_symbol)["history"]
+    benchmark_hist, benchmark_ticker = get_benchmark_data(ticker_symbol)
+    returns = pd.DataFrame({ticker_symbol: history['Close'], benchmark_ticker: benchmark_hist['Close']}).dropna().pct_change().dropna()
+    return tracking_summary(returns[[ticker_symbol]], returns[[benchmark_ticker]]), RollingMoments(returns[[ticker_symbol]], returns[[benchmark_ticker]])
+
+@instrument(cache=st.cache_data(ttl=3600))
+def get_etf_comparison(tickers):
+    """Tabela de comparação de vários ETFs (preços em lote + cadastros em paralelo, com cache por ticker)."""
+    return load_etf_comparison(tickers)
 
-@st.cache_data
+@instrument(cache=st.cache_data, provider="yfinance")
 def get_benchmark_data(ticker_symbol):
     """
     Busca dados de um benchmark para comparação.
     """
-    is_br = '.SA' in ticker_symbol.upper()
-    benchmark_ticker = "^BVSP" if is_br else "^GSPC" # Ibovespa para BR, S&P 500 para outros
+    benchmark_ticker = benchmark_for(ticker_symbol) # Ibovespa para BR, S&P 500 para outros
     
     try:
         benchmark = yf.Ticker(benchmark_ticker)
@@ -74,87 +88,129 @@ def get_benchmark_data(ticker_symbol):
 st.title("🔎 Analisador de ETFs")
 st.markdown("Insira o ticker de um ETF para visualizar suas informações, performance e comparação com o mercado.")
 
-# --- Painel de Input ---
-ticker_input = st.text_input("Digite o Ticker do ETF (ex: IVV, BOVA11.SA, QQQ)", "IVV").upper()
-analyze_button = st.button("Analisar ETF")
+tab_single, tab_compare = st.tabs(["Análise Individual", "Comparação de ETFs"])
 
-if analyze_button:
-    if not ticker_input:
-        st.warning("Por favor, insira um ticker para analisar.")
-    else:
-        with st.spinner(f"Buscando dados para {ticker_input}..."):
-            etf_data = get_etf_data(ticker_input)
+with tab_single:
+    # --- Painel de Input ---
+    ticker_input = st.text_input("Digite o Ticker do ETF (ex: IVV, BOVA11.SA, QQQ)", "IVV").upper()
+    analyze_button = st.button("Analisar ETF")
 
-        if "error" in etf_data:
-            st.error(etf_data["error"])
+    # O ticker analisado fica na sessão para que os controles da análise (ex: janela do tracking) não a fechem
+    if analyze_button: st.session_state.etf_analyzed_ticker = ticker_input
+    if st.session_state.get("etf_analyzed_ticker") is not None:
+        ticker_input = st.session_state.etf_analyzed_ticker
+        if not ticker_input:
+            st.warning("Por favor, insira um ticker para analisar.")
         else:
-            info = etf_data["info"]
-            history = etf_data["history"]
-
-            st.header(f"Análise de: {info.get('longName', ticker_input)}")
-            
-            # --- Painel de Informações Gerais ---
-            st.subheader("Informações Gerais")
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("Gestora (Família)", info.get('fundFamily', 'N/A'))
-                st.metric("Preço Atual", f"{info.get('regularMarketPrice', 0):.2f} {info.get('currency', '')}")
-            with col2:
-                aum = info.get('totalAssets', 0)
-                st.metric("Patrimônio (AUM)", f"${aum/1_000_000_000:.2f} Bilhões" if aum > 0 else "N/A")
-                st.metric("Volume Médio", f"{info.get('averageDailyVolume10Day', 0):,}")
-            with col3:
-                ter = info.get('annualReportExpenseRatio', 0)
-                st.metric("Taxa de Adm. (TER)", f"{ter*100:.3f}%" if ter > 0 else "N/A")
-                st.metric("Beta", f"{info.get('beta3Year', 0):.2f}")
-
-            with st.expander("Resumo da Estratégia do Fundo"):
-                st.write(info.get('longBusinessSummary', 'Descrição não disponível.'))
-            
-            st.divider()
-
-            # --- Análise de Performance ---
-            st.subheader("Performance Histórica")
-            
-            # Gráfico de Preços
-            fig_price = px.line(history, y="Close", title=f"Evolução do Preço de Fechamento - {ticker_input}")
-            st.plotly_chart(fig_price, use_container_width=True)
-            
-            # Tabela de Retornos
-            returns = calculate_cumulative_returns(history)
-            if returns:
-                st.markdown("##### Retornos Acumulados")
-                df_returns = pd.DataFrame(list(returns.items()), columns=['Período', 'Retorno (%)'])
-                st.dataframe(df_returns.style.format({'Retorno (%)': '{:.2f}%'}), use_container_width=True)
-            
-            st.divider()
-
-            # --- Comparação com Benchmark ---
-            st.subheader("Comparação com o Mercado")
-            with st.spinner("Buscando dados do benchmark..."):
-                benchmark_hist, benchmark_ticker = get_benchmark_data(ticker_input)
-            
-            if not benchmark_hist.empty:
-                # Normaliza os preços para base 100
-                comparison_df = pd.DataFrame({
-                    ticker_input: history['Close'],
-                    benchmark_ticker: benchmark_hist['Close']
-                }).dropna()
-                
-                normalized_df = (comparison_df / comparison_df.iloc[0]) * 100
-                
-                fig_comparison = px.line(normalized_df, title=f"Performance Comparada (Base 100) - {ticker_input} vs. {benchmark_ticker}")
-                st.plotly_chart(fig_comparison, use_container_width=True)
+            with st.spinner(f"Buscando dados para {ticker_input}..."):
+                etf_data = get_etf_data(ticker_input)
+
+            if "error" in etf_data:
+                st.error(etf_data["error"])
+            else:
+                info = etf_data["info"]
+                history = etf_data["history"]
+
+                st.header(f"Análise de: {info.get('longName', ticker_input)}")
+
+                # --- Painel de Informações Gerais ---
+                st.subheader("Informações Gerais")
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("Gestora (Família)", info.get('fundFamily', 'N/A'))
+                    st.metric("Preço Atual", f"{info.get('regularMarketPrice', 0):.2f} {info.get('currency', '')}")
+                with col2:
+                    aum = info.get('totalAssets', 0)
+                    st.metric("Patrimônio (AUM)", f"${aum/1_000_000_000:.2f} Bilhões" if aum > 0 else "N/A")
+                    st.metric("Volume Médio", f"{info.get('averageDailyVolume10Day', 0):,}")
+                with col3:
+                    ter = info.get('annualReportExpenseRatio', 0)
+                    st.metric("Taxa de Adm. (TER)", f"{ter*100:.3f}%" if ter > 0 else "N/A")
+                    st.metric("Beta", f"{info.get('beta3Year', 0):.2f}")
+
+                with st.expander("Resumo da Estratégia do Fundo"):
+                    st.write(info.get('longBusinessSummary', 'Descrição não disponível.'))
+
+                st.divider()
+
+                # --- Análise de Performance ---
+                st.subheader("Performance Histórica")
+
+                # Gráfico de Preços
+                fig_price = charts.line_chart(history, y="Close", title=f"Evolução do Preço de Fechamento - {ticker_input}")
+                st.plotly_chart(fig_price, use_container_width=True)
+                render_drawdown_analysis(history['Close'], ticker_input)
+
+                # Tabela de Retornos
+                returns = calculate_trailing_returns(history)
+                if not returns.empty:
+                    st.markdown("##### Retornos por Período")
+                    st.caption("Janelas ancoradas no calendário a partir do último pregão. Períodos de 1 ano ou mais também são exibidos anualizados.")
+                    st.dataframe(returns.rename_axis('Período').style.format("{:.2%}", na_rep="—"), use_container_width=True)
+
+                st.divider()
+
+                # --- Comparação com Benchmark ---
+                st.subheader("Comparação com o Mercado")
+                with st.spinner("Buscando dados do benchmark..."):
+                    benchmark_hist, benchmark_ticker = get_benchmark_data(ticker_input)
+
+                if not benchmark_hist.empty:
+                    # Normaliza os preços para base 100
+                    comparison_df = pd.DataFrame({
+                        ticker_input: history['Close'],
+                        benchmark_ticker: benchmark_hist['Close']
+                    }).dropna()
+
+                    normalized_df = (comparison_df / comparison_df.iloc[0]) * 100
+
+                    fig_comparison = charts.line_chart(normalized_df, title=f"Performance Comparada (Base 100) - {ticker_input} vs. {benchmark_ticker}")
+                    st.plotly_chart(fig_comparison, use_container_width=True)
+
+                    st.markdown("##### Drawdowns Comparados")
+                    st.dataframe(drawdown_summary(comparison_df).style.format(SUMMARY_FORMATS, na_rep="Em curso"), use_container_width=True)
+
+                    # --- Tracking e Risco Ativo ---
+                    st.markdown("##### Tracking e Risco Ativo")
+                    summary, moments = get_tracking_analysis(ticker_input)
+                    st.dataframe(summary.style.format(TRACKING_FORMATS, na_rep="—"), use_container_width=True)
+                    window = st.slider("Janela móvel (pregões)", min_value=21, max_value=252, value=63, step=21, key="etf_tracking_window")
+                    rolling = moments.window(window)
+                    if rolling:
+                        c1, c2 = st.columns(2)
+                        c1.plotly_chart(charts.line_chart(rolling["Tracking Error"], width_px=charts.CHART_WIDTH_PX // 2, title=f"Tracking Error Móvel ({window}d, anualizado)").update_layout(showlegend=False, yaxis_tickformat=".1%"), use_container_width=True)
+                        beta_corr = pd.DataFrame({"Beta": rolling["Beta"].iloc[:, 0], "Correlação": rolling["Correlação"].iloc[:, 0]})
+                        c2.plotly_chart(charts.line_chart(beta_corr, width_px=charts.CHART_WIDTH_PX // 2, title=f"Beta e Correlação Móveis ({window}d) vs. {benchmark_ticker}"), use_container_width=True)
+                else:
+                    st.warning("Não foi possível carregar os dados do benchmark para comparação.")
+
+                st.divider()
+
+                # --- Seção de Composição ---
+                st.subheader("Composição do ETF (Principais Ativos)")
+                st.info("A composição detalhada de ETFs não está disponível via API gratuita.")
+
+                # Link direto para a página de holdings do Yahoo Finance
+                yahoo_finance_link = f"https://finance.yahoo.com/quote/{ticker_input}/holdings"
+                st.markdown(f"Para visualizar a lista completa e atualizada dos ativos que compõem este ETF, clique no link abaixo:")
+                st.link_button(f"Ver Composição de {ticker_input} no Yahoo Finance", yahoo_finance_link)
+
+with tab_compare:
+    st.markdown("Compare dezenas de ETFs lado a lado. Clique no cabeçalho de uma coluna para ordenar.")
+    compare_input = st.text_area("Tickers (separados por vírgula)", "IVV, VOO, SPY, QQQ, VTI, BOVA11.SA, IVVB11.SA, SMAL11.SA")
+    if st.button("Comparar ETFs"):
+        tickers = [t for t in compare_input.replace("\n", ",").split(",") if t.strip()]
+        if not tickers:
+            st.warning("Por favor, insira pelo menos um ticker.")
+        else:
+            with st.spinner(f"Buscando dados de {len(tickers)} ETFs..."):
+                comparison = get_etf_comparison(tuple(tickers))
+            if comparison.empty:
+                st.error("Não foi possível obter dados para os tickers fornecidos.")
             else:
-                st.warning("Não foi possível carregar os dados do benchmark para comparação.")
-
-            st.divider()
-
-            # --- Seção de Composição ---
-            st.subheader("Composição do ETF (Principais Ativos)")
-            st.info("A composição detalhada de ETFs não está disponível via API gratuita.")
-            
-            # Link direto para a página de holdings do Yahoo Finance
-            yahoo_finance_link = f"https://finance.yahoo.com/quote/{ticker_input}/holdings"
-            st.markdown(f"Para visualizar a lista completa e atualizada dos ativos que compõem este ETF, clique no link abaixo:")
-            st.link_button(f"Ver Composição de {ticker_input} no Yahoo Finance", yahoo_finance_link)
+                st.dataframe(comparison.style.format(COMPARISON_FORMATS, na_rep="—"), use_container_width=True)
+                st.caption("Tracking error, information ratio, beta e capture contra o benchmark de cada ETF (Ibovespa para .SA, S&P 500 para os demais), com retornos diários em um calendário comum. AUM na moeda do fundo.")
+                missing = sorted({t.strip().upper() for t in tickers} - set(comparison.index))
+                if missing: st.warning(f"Sem dados de preço para: {', '.join(missing)}")
+
+render_timing_panel()
@@ -2,125 +2,111 @@
 
 import streamlit as st
 import pandas as pd
-from fredapi import Fred
-from bcb import sgs
 import plotly.express as px
-from datetime import datetime, timedelta
-import numpy as np
-import numpy_financial as npf
+from datetime import datetime
+from pag import charts, curve_risk, curves, providers, real_rates
+from pag.fixed_income import calculate_bond_cashflows, calculate_curve_price, cashflow_times
+from pag.registry import RENDA_FIXA_START, RENDA_FIXA_WINDOW, CREDIT_SPREAD_START, CREDIT_SPREAD_SERIES
+from pag.freshness import PAGE_CACHE_TTL
+from pag.instrumentation import instrument
+from pag.ui import begin_page_instrumentation, render_freshness_panel, render_timing_panel
 
 # --- Configuração da Página ---
 st.set_page_config(page_title="Análise de Renda Fixa", page_icon="💰", layout="wide")
+begin_page_instrumentation("Renda Fixa")
 
 st.sidebar.image("logo.png", use_container_width=True)
 
 # --- INICIALIZAÇÃO DAS APIS ---
 @st.cache_resource
 def get_fred_api():
+    # Importação tardia: fredapi só é carregado quando a API é de fato usada
+    from fredapi import Fred
     try:
         api_key = st.secrets.get("FRED_API_KEY")
         if not api_key: st.error("Chave da API do FRED (FRED_API_KEY) não encontrada."); st.stop()
-        return Fred(api_key=api_key)
+        client = Fred(api_key=api_key)
+        providers.set_fred_client(client)
+        return client
     except Exception as e:
         st.error(f"Falha ao inicializar API do FRED: {e}"); st.stop()
 
 fred = get_fred_api()
 
 # --- FUNÇÕES DE BUSCA DE DADOS ---
-@st.cache_data(ttl=3600)
+# As buscas passam pelo cache persistente compartilhado (aquecido pelo job `python -m pag.warmup`)
+@instrument(cache=st.cache_data(ttl=PAGE_CACHE_TTL))
+def get_yield_curve(market, method="nss"):
+    """Curvas ajustadas (pag.curves) de todo o histórico diário do mercado; None sem dados."""
+    return curves.load_curve(market, method)
+
 def get_us_yield_curve_data():
-    codes = {'1 Mês':'DGS1MO','3 Meses':'DGS3MO','6 Meses':'DGS6MO','1 Ano':'DGS1','2 Anos':'DGS2','3 Anos':'DGS3','5 Anos':'DGS5','7 Anos':'DGS7','10 Anos':'DGS10','20 Anos':'DGS20','30 Anos':'DGS30'}
-    data = []
-    for name, code in codes.items():
-        try:
-            val = fred.get_series_latest_release(code)
-            if not val.empty: data.append({'Prazo': name, 'Taxa (%)': val.iloc[0]})
-        except: continue
-    order = list(codes.keys())
-    df = pd.DataFrame(data)
-    if not df.empty:
-        df['Prazo'] = pd.Categorical(df['Prazo'], categories=order, ordered=True)
-        return df.sort_values('Prazo')
-    return df
-
-@st.cache_data(ttl=3600)
-def get_fred_series(series_codes, start_date):
+    curve = get_yield_curve("US")
+    return curves.latest_table(curve.observed) if curve is not None else pd.DataFrame()
+
+@instrument(cache=st.cache_data(ttl=PAGE_CACHE_TTL))
+def get_fred_series(series_codes, start_date, window=None):
+    """Séries do FRED guardadas desde start_date (chave fixa do cache), recortadas na janela móvel `window` (ex: '-5y')."""
     df = pd.DataFrame()
     for name, code in series_codes.items():
-        try: df[name] = fred.get_series(code, start_date)
+        try: df[name] = providers.fetch_fred_series(code, start_date)
         except: continue
-    return df.dropna()
+    df = df.dropna()
+    return df.loc[providers.resolve_start(window):] if window else df
 
-@st.cache_data(ttl=3600)
+@instrument(cache=st.cache_data(ttl=PAGE_CACHE_TTL))
 def get_brazilian_real_interest_rate(start_date):
-    try:
-        selic = sgs.get({'selic': 432}, start=start_date) / 100
-        ipca = sgs.get({'ipca': 13522}, start=start_date) / 100
-        df = selic.resample('M').mean().join(ipca.resample('M').last()).dropna()
-        df['Juro Real (aa)'] = (((1 + df['selic']) / (1 + df['ipca'])) - 1) * 100
-        return df[['Juro Real (aa)']]
+    """Juro real ex-post/ex-ante mensal (pag.real_rates: o mesmo resultado usado pelo Macro)."""
+    try: return real_rates.real_rate_series(real_rates.real_rate_history(), start_date)
     except Exception: return pd.DataFrame()
 
-@st.cache_data(ttl=3600)
 def get_brazilian_yield_curve():
-    codes = {"1 Ano":12469,"2 Anos":12470,"3 Anos":12471,"5 Anos":12473,"10 Anos":12478}
-    data = []
-    for name, code in codes.items():
-        try:
-            val = sgs.get({name: code}, last=1)
-            if not val.empty: data.append({'Prazo': name, 'Taxa (%)': val.iloc[0, 0]})
-        except: continue
-    df = pd.DataFrame(data)
-    if not df.empty:
-        df['Prazo'] = pd.Categorical(df['Prazo'], categories=codes.keys(), ordered=True)
-        return df.sort_values('Prazo')
-    return df
-
-# --- FUNÇÕES DE CÁLCULO PARA O ANALISADOR DE TÍTULOS ---
-def calculate_bond_cashflows(face_value, coupon_rate, years_to_maturity, freq):
-    periods = int(np.floor(years_to_maturity * freq))
-    coupon_payment = (coupon_rate / freq) * face_value
-    cashflows = [coupon_payment] * periods
-    if periods > 0: cashflows[-1] += face_value
-    return cashflows
-
-def calculate_theoretical_price(cashflows, discount_rate, freq):
-    pv_sum = 0
-    for t, cf in enumerate(cashflows, 1):
-        pv_sum += cf / ((1 + discount_rate / freq) ** t)
-    return pv_sum
+    curve = get_yield_curve("BR")
+    return curves.latest_table(curve.observed) if curve is not None else pd.DataFrame()
+
+def fitted_curve_figure(curve, observed_df, title):
+    """Curva ajustada da data mais recente (linha) com as taxas observadas dos vértices (pontos), em prazo numérico."""
+    fitted = curve.zero_rates(curves.PLOT_MATURITIES, [curve.dates[-1]]).iloc[0]
+    fig = px.line(x=fitted.index, y=fitted.to_numpy(), title=title, labels={'x': 'Prazo (anos)', 'y': 'Taxa (%)'})
+    fig.data[0].name = f"Curva ajustada ({'Nelson-Siegel-Svensson' if curve.method == 'nss' else 'spline'})"; fig.data[0].showlegend = True
+    fig.add_scatter(x=observed_df['Prazo (anos)'], y=observed_df['Taxa (%)'], mode='markers', marker=dict(size=9), name='Vértices observados', text=observed_df['Prazo'].astype(str))
+    fig.update_layout(xaxis_title="Prazo (anos)", yaxis_title="Taxa de Juros Anual (%)")
+    return fig
 
 # --- INTERFACE DA APLICAÇÃO ---
 st.title("💰 Painel de Análise de Renda Fixa")
 st.markdown("Um cockpit para monitorar as condições dos mercados e analisar o valor relativo de títulos de dívida.")
-start_date = datetime.now() - timedelta(days=5*365)
+start_date, window = RENDA_FIXA_START, RENDA_FIXA_WINDOW  # Histórico guardado (mesma chave do warm-up) e janela móvel de 5 anos exibida
 
-tab_us, tab_br, tab_analyzer = st.tabs(["Mercado Americano (Referência)", "Mercado Brasileiro", "Analisador de Títulos"])
+tab_us, tab_br, tab_analyzer, tab_curve_risk = st.tabs(["Mercado Americano (Referência)", "Mercado Brasileiro", "Analisador de Títulos", "Risco de Curva da Carteira"])
 
 with tab_us:
     st.header("Indicadores do Mercado de Referência dos EUA")
     
     # Curva de Juros (Yield Curve)
     st.subheader("Curva de Juros (US Treasury Yield Curve)")
+    us_curve = get_yield_curve("US")
     yield_curve_df_us = get_us_yield_curve_data()
     if yield_curve_df_us.empty:
         st.warning("Não foi possível obter os dados da curva de juros no momento.")
     else:
-        latest_date = fred.get_series_info('DGS10').loc['last_updated'].split(' ')[0]
-        st.caption(f"Curva de juros do Tesouro Americano para a data mais recente disponível ({latest_date}).")
-        fig = px.line(yield_curve_df_us, x='Prazo', y='Taxa (%)', title="Forma da Curva de Juros Atual", markers=True)
-        fig.update_layout(xaxis_title="Vencimento do Título", yaxis_title="Taxa de Juros Anual (%)")
-        st.plotly_chart(fig, use_container_width=True)
+        latest_date = us_curve.dates[-1].strftime('%Y-%m-%d')
+        st.caption(f"Curva de juros do Tesouro Americano para a data mais recente disponível ({latest_date}), ajustada por Nelson-Siegel-Svensson sobre os vértices observados.")
+        st.plotly_chart(fitted_curve_figure(us_curve, yield_curve_df_us, "Forma da Curva de Juros Atual"), use_container_width=True)
+        with st.expander("Ver a evolução histórica da curva (mensal)"):
+            frames = us_curve.history_frames(periods=120)
+            fig = px.line(frames, x='Prazo (anos)', y='Taxa (%)', animation_frame='Data', range_y=[min(0, frames['Taxa (%)'].min()), frames['Taxa (%)'].max() + 0.5], title="Curva de Juros Ajustada no Fim de Cada Mês (últimos 10 anos)")
+            st.plotly_chart(fig, use_container_width=True)
     st.divider()
 
     # Spreads de Crédito
     st.subheader("Monitor de Spreads de Crédito")
     spread_codes = {"Spread High Yield": "BAMLH0A0HYM2", "Spread Investment Grade": "BAMLC0A4CBBB"}
-    spreads_df = get_fred_series(spread_codes, start_date)
+    spreads_df = get_fred_series(spread_codes, start_date, window)
     if spreads_df.empty:
         st.warning("Não foi possível obter os dados de spread de crédito.")
     else:
-        fig = px.line(spreads_df, title="Evolução dos Spreads de Crédito (EUA)")
+        fig = charts.line_chart(spreads_df, title="Evolução dos Spreads de Crédito (EUA)")
         st.plotly_chart(fig, use_container_width=True)
     st.divider()
     
@@ -129,15 +115,15 @@ with tab_us:
     with col1:
         st.subheader("Expectativa de Inflação")
         inflation_codes = {"10 Anos": "T10YIE", "5 Anos": "T5YIE"}
-        inflation_df = get_fred_series(inflation_codes, start_date)
+        inflation_df = get_fred_series(inflation_codes, start_date, window)
         if not inflation_df.empty:
-            st.plotly_chart(px.line(inflation_df, title="Inflação Implícita (Breakeven)"), use_container_width=True)
+            st.plotly_chart(charts.line_chart(inflation_df, width_px=charts.CHART_WIDTH_PX // 2, title="Inflação Implícita (Breakeven)"), use_container_width=True)
     with col2:
         st.subheader("Juros Reais (TIPS)")
         real_yield_codes = {"10 Anos": "DFII10"}
-        real_yield_df = get_fred_series(real_yield_codes, start_date)
+        real_yield_df = get_fred_series(real_yield_codes, start_date, window)
         if not real_yield_df.empty:
-            fig = px.area(real_yield_df, title="Juro Real Americano")
+            fig = charts.area_chart(real_yield_df, width_px=charts.CHART_WIDTH_PX // 2, title="Juro Real Americano")
             fig.add_hline(y=0, line_dash="dash", line_color="red")
             st.plotly_chart(fig, use_container_width=True)
     st.divider()
@@ -145,9 +131,9 @@ with tab_us:
     # Índice MOVE
     st.subheader("Índice de Volatilidade do Mercado de Juros (MOVE)")
     move_codes = {"Índice MOVE": "MOVE"}
-    move_df = get_fred_series(move_codes, start_date)
+    move_df = get_fred_series(move_codes, start_date, window)
     if not move_df.empty:
-        st.plotly_chart(px.line(move_df, title="Evolução do Índice de Volatilidade MOVE"), use_container_width=True)
+        st.plotly_chart(charts.line_chart(move_df, title="Evolução do Índice de Volatilidade MOVE"), use_container_width=True)
 
 
 # --- ABA DO MERCADO BRASILEIRO ---
@@ -155,32 +141,33 @@ with tab_br:
     st.header("Indicadores do Mercado Brasileiro")
 
     # Juro Real Brasileiro
-    st.subheader("Taxa de Juro Real (Ex-Post)")
-    st.caption("Calculado como a Taxa Selic anualizada subtraída da inflação (IPCA) acumulada em 12 meses.")
-    real_interest_br_df = get_brazilian_real_interest_rate(start_date)
+    st.subheader("Taxa de Juro Real (Ex-Post e Ex-Ante)")
+    st.caption("Ex-post: Selic acumulada em 12 meses (capitalização diária) deflacionada pelo IPCA acumulado em 12 meses. Ex-ante: juro pré de 1 ano deflacionado pela mediana do Focus para o IPCA dos próximos 12 meses.")
+    real_interest_br_df = get_brazilian_real_interest_rate(window)
     if real_interest_br_df.empty:
         st.warning("Não foi possível obter os dados para o cálculo do juro real brasileiro.")
     else:
-        fig = px.area(real_interest_br_df, title="Evolução da Taxa de Juro Real no Brasil")
+        fig = charts.line_chart(real_interest_br_df, title="Evolução da Taxa de Juro Real no Brasil")
         fig.add_hline(y=0, line_dash="dash", line_color="red")
-        fig.update_layout(yaxis_title="Taxa Real de Juros Anual (%)", showlegend=False)
+        fig.update_layout(yaxis_title="Taxa Real de Juros Anual (%)", legend_title="")
         st.plotly_chart(fig, use_container_width=True)
     st.divider()
     
     # Curva de Juros Brasileira
     st.subheader("Curva de Juros Pré-Fixada (ETTJ)")
+    br_curve = get_yield_curve("BR")
     yield_curve_df_br = get_brazilian_yield_curve()
     if yield_curve_df_br.empty:
         st.warning("Não foi possível obter os dados da curva de juros brasileira.")
     else:
-        st.caption("Taxas de mercado para Títulos Públicos Prefixados (LTN). Fonte: B3 / Anbima")
-        fig = px.line(yield_curve_df_br, x='Prazo', y='Taxa (%)', title="Forma da Curva de Juros Pré-Fixada Atual", markers=True)
-        fig.update_layout(xaxis_title="Vencimento do Título", yaxis_title="Taxa de Juros Anual (%)")
-        st.plotly_chart(fig, use_container_width=True)
+        st.caption(f"Taxas de mercado para Títulos Públicos Prefixados (LTN) em {br_curve.dates[-1].strftime('%Y-%m-%d')}. Fonte: B3 / Anbima")
+        st.plotly_chart(fitted_curve_figure(br_curve, yield_curve_df_br, "Forma da Curva de Juros Pré-Fixada Atual"), use_container_width=True)
 
 
 # --- ABA DO ANALISADOR DE TÍTULOS ---
-with tab_analyzer:
+# Fragmento: os inputs e o botão reexecutam só esta aba, sem remontar as curvas das outras abas
+@st.fragment
+def render_bond_analyzer():
     st.header("Analisador de Valor Relativo de Títulos")
     st.info("Esta ferramenta calcula o 'preço justo' de um título com base nas condições de mercado atuais (juros e spreads) e o compara com o preço real de negociação.")
 
@@ -202,21 +189,20 @@ with tab_analyzer:
 
     if analyze_bond_button:
         # --- PREPARAÇÃO DOS DADOS DE MERCADO ---
+        us_curve = get_yield_curve("US")
         us_yield_curve = get_us_yield_curve_data()
-        spread_codes = {"BBB": "BAMLC0A4CBBB", "HY": "BAMLH0A0HYM2"}
-        spreads_df = get_fred_series({k: v for k, v in spread_codes.items() if k in risk_levels.values()}, "2000-01-01")
+        spread_codes = CREDIT_SPREAD_SERIES
+        spreads_df = get_fred_series({k: v for k, v in spread_codes.items() if k in risk_levels.values()}, CREDIT_SPREAD_START)
         
         if us_yield_curve.empty or spreads_df.empty:
             st.error("Não foi possível carregar os dados de mercado necessários para a análise.")
         else:
             # --- CÁLCULO ---
             years_to_maturity = (maturity_date - datetime.now().date()).days / 365.25
-            if years_to_maturity <= 0: st.error("Data de vencimento deve ser no futuro."); st.stop()
+            if years_to_maturity <= 0: st.error("Data de vencimento deve ser no futuro."); return
 
-            # 1. Obter Taxa Livre de Risco interpolada da curva de juros
-            maturities_num = {'1 Mês':1/12,'3 Meses':3/12,'6 Meses':6/12,'1 Ano':1,'2 Anos':2,'3 Anos':3,'5 Anos':5,'7 Anos':7,'10 Anos':10,'20 Anos':20,'30 Anos':30}
-            us_yield_curve['PrazoNum'] = us_yield_curve['Prazo'].map(maturities_num)
-            risk_free_rate = np.interp(years_to_maturity, us_yield_curve['PrazoNum'], us_yield_curve['Taxa (%)']) / 100
+            # 1. Obter Taxa Livre de Risco da curva ajustada (NSS) no prazo do título
+            risk_free_rate = us_curve.zero_rate(years_to_maturity) / 100
 
             # 2. Obter Spread de Crédito
             selected_risk = risk_levels[risk_level]
@@ -224,10 +210,11 @@ with tab_analyzer:
             if selected_risk != "AAA":
                 credit_spread = spreads_df[selected_risk].iloc[-1] / 100
 
-            # 3. Calcular Taxa de Desconto Teórica e Preço Justo
+            # 3. Calcular Taxa de Desconto Teórica e Preço Justo (cada fluxo descontado pela curva no seu prazo + spread)
             theoretical_discount_rate = risk_free_rate + credit_spread
             bond_cashflows = calculate_bond_cashflows(face_value, coupon_rate_pct/100, years_to_maturity, freq)
-            theoretical_price = calculate_theoretical_price(bond_cashflows, theoretical_discount_rate, freq)
+            discount_factors = us_curve.discount_factors(cashflow_times(bond_cashflows, freq), spread=credit_spread, freq=freq)
+            theoretical_price = calculate_curve_price(bond_cashflows, discount_factors)
             
             # --- EXIBIÇÃO DOS RESULTADOS ---
             st.divider()
@@ -250,7 +237,72 @@ with tab_analyzer:
             
             # Visualização na Curva de Juros
             with st.expander("Ver Posição do Título na Curva de Juros"):
-                fig = px.line(us_yield_curve, x='Prazo', y='Taxa (%)', title="Curva de Juros dos EUA vs. Taxa Exigida pelo Título", markers=True)
+                fig = fitted_curve_figure(us_curve, us_yield_curve, "Curva de Juros dos EUA vs. Taxa Exigida pelo Título")
                 # Adiciona o ponto da taxa teórica
-                fig.add_scatter(x=[f"{years_to_maturity:.1f} Anos"], y=[theoretical_discount_rate*100], mode='markers', marker=dict(size=12, color='red'), name='Taxa Exigida (Justa)')
+                fig.add_scatter(x=[years_to_maturity], y=[theoretical_discount_rate*100], mode='markers', marker=dict(size=12, color='red'), name='Taxa Exigida (Justa)')
                 st.plotly_chart(fig, use_container_width=True)
+
+with tab_analyzer:
+    render_bond_analyzer()
+
+
+# --- ABA DE RISCO DE CURVA DA CARTEIRA ---
+@st.fragment
+def render_curve_risk():
+    st.header("Risco de Curva da Carteira de Títulos")
+    st.info("Key-rate durations, duration/convexidade efetivas e P&L de cenários de curva, com cada título reprecificado pela curva ajustada (Nelson-Siegel-Svensson) mais o seu spread.")
+    market = st.radio("Curva de referência", ["US", "BR"], format_func=lambda m: "Treasuries (EUA)" if m == "US" else "Pré (Brasil)", horizontal=True)
+    curve = get_yield_curve(market)
+    if curve is None: st.error("Não foi possível carregar a curva de juros."); return
+
+    st.markdown("##### 1. Carteira")
+    uploaded = st.file_uploader("Importar carteira (CSV com as colunas: " + ", ".join(curve_risk.BOND_COLUMNS) + ")", type="csv", key=f"curve_risk_csv_{market}")
+    if uploaded is None: bonds = curve_risk.sample_portfolio(market)
+    else:
+        try: bonds = pd.read_csv(uploaded, parse_dates=["Vencimento"])
+        except Exception as e: st.error(f"Não foi possível ler o CSV da carteira: {e}"); return
+    bonds = st.data_editor(bonds, num_rows="dynamic", use_container_width=True, key=f"curve_risk_bonds_{market}",
+                           column_config={"Vencimento": st.column_config.DateColumn(), "Frequência": st.column_config.SelectboxColumn(options=curve_risk.BOND_FREQUENCIES)})
+    try: bonds, invalid = curve_risk.validate_bonds(bonds)
+    except ValueError as e: st.error(f"Carteira inválida: {e}"); return
+    if not invalid.empty:
+        st.warning(f"{len(invalid)} título(s) ignorado(s) por dados inválidos:")
+        st.dataframe(invalid[["Título", "Problema"]], use_container_width=True, hide_index=True)
+    if bonds.empty: st.warning("Inclua ao menos um título válido."); return
+
+    st.markdown("##### 2. Cenários")
+    size = st.slider("Choque paralelo (bps)", 25, 300, 100, 25)
+    scenarios = pd.concat([curve_risk.standard_scenarios(size), curve_risk.historical_scenarios(curve, market)])
+    with st.expander("Ver os choques de cada cenário nos vértices (bps)"):
+        st.dataframe(scenarios.style.format("{:+.0f}"), use_container_width=True)
+
+    risk = curve_risk.curve_risk(curve, bonds, scenarios)
+    if risk["bonds"].empty: st.warning("Todos os títulos informados já venceram."); return
+    totals = curve_risk.portfolio_totals(risk)
+
+    st.markdown(f"##### 3. Risco da Carteira (curva de {curve.dates[-1]:%d/%m/%Y})")
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Valor de Mercado", f"{totals['Valor']:,.0f}")
+    c2.metric("DV01", f"{totals['DV01']:,.0f}", help="Variação do valor da carteira para uma queda paralela de 1 bp na curva.")
+    c3.metric("Duration Efetiva", f"{totals['Duration Efetiva']:.2f}")
+    c4.metric("Convexidade", f"{totals['Convexidade']:.1f}")
+
+    krd = totals["krd"].rename(index=lambda m: f"{m:g}A")
+    fig = px.bar(x=krd.index, y=krd.to_numpy(), title="Key-Rate Durations da Carteira (soma = duration efetiva)", labels={"x": "Vértice", "y": "Duration"})
+    st.plotly_chart(fig, use_container_width=True)
+
+    pnl = totals["pnl"].sort_values()
+    fig = px.bar(x=pnl.to_numpy(), y=pnl.index, orientation="h", title="P&L da Carteira por Cenário", labels={"x": "P&L", "y": ""}, color=pnl.to_numpy() > 0, color_discrete_map={True: "#2E8B57", False: "#C70039"})
+    fig.update_layout(showlegend=False)
+    st.plotly_chart(fig, use_container_width=True)
+
+    with st.expander("Ver o risco por título"):
+        st.dataframe(risk["bonds"].style.format({"Prazo (anos)": "{:.2f}", "Preço": "{:.2f}", "Valor": "{:,.0f}", "Duration Efetiva": "{:.2f}", "Convexidade": "{:.1f}", "DV01": "{:,.0f}"}, na_rep="—"), use_container_width=True, hide_index=True)
+        st.dataframe(risk["krd"].rename(columns=lambda m: f"{m:g}A").style.format("{:.2f}"), use_container_width=True)
+        st.dataframe(risk["pnl"].style.format("{:,.0f}").background_gradient(cmap="RdYlGn", axis=None), use_container_width=True)
+
+with tab_curve_risk:
+    render_curve_risk()
+
+render_freshness_panel()
+render_timing_panel()